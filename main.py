@@ -1,29 +1,48 @@
+from __future__ import annotations
 from asyncio.log import logger
 import os
 import sys
+import argparse
 import signal
 import logging
 import time
 import colorlog
 import json
+from typing import Optional, TYPE_CHECKING
 import pycatdetector.channels
 from pycatdetector.Config import Config
-from pycatdetector.Recorder import Recorder
-from pycatdetector.NeuralNetPyTorch import NeuralNetPyTorch
-from pycatdetector.Detector import Detector
-from pycatdetector.Notifier import Notifier
-from pycatdetector.Screener import Screener
-
-recorder: Recorder
+from pycatdetector.BoundedQueue import BoundedQueue
+from pycatdetector.Metrics import Metrics
+
+# The heavy components (torch, cv2, matplotlib, requests) are imported where
+# used, only if enabled, e.g. '--check-config' or a headless run (no Screener)
+if TYPE_CHECKING:
+    from pycatdetector.AbstractNeuralNet import AbstractNeuralNet
+    from pycatdetector.ClipRecorder import ClipRecorder
+    from pycatdetector.Detector import Detector
+    from pycatdetector.EncoderWorker import EncoderWorker
+    from pycatdetector.MetricsServer import MetricsServer
+    from pycatdetector.MotionGate import MotionGate
+    from pycatdetector.Notifier import Notifier
+    from pycatdetector.Recorder import Recorder
+    from pycatdetector.Screener import Screener
+
+recorders: list[Recorder] = []
+gates: list[MotionGate] = []
+metrics_server: Optional[MetricsServer] = None
+clips: Optional[ClipRecorder] = None
+encoder: Optional[EncoderWorker] = None
 detector: Detector
 notifier: Notifier
-screener: Screener
+screener: Optional[Screener] = None
 logger: logging.Logger
 
 
 def main():
-    global recorder, detector, notifier, screener, logger
+    global recorders, gates, metrics_server, clips, encoder, detector, notifier
+    global screener, logger
 
+    started = time.monotonic()
     config = Config()
 
     if len(sys.argv) > 1:
@@ -36,68 +55,458 @@ def main():
     logger.info("PATH: " + os.environ["PATH"])
     logger.info("Python Sys Prefix: " + sys.prefix)
 
+    models_folder = config.get_str("models_folder", "./models")
+    if "--export" in sys.argv:
+        from pycatdetector.ModelExporter import ModelExporter
+
+        exporter = ModelExporter(config.get_str("net_model_name"), models_folder)
+        exporter.export()
+        exit(0)
+    if "--preload" in sys.argv:
+        models_preload(config, models_folder)
+        exit(0)
+
+    if len(sys.argv) > 1 and sys.argv[1] == "analyze":
+        analyze(config, sys.argv[2:], models_folder)
+        exit(0)
+
+    from pycatdetector.ClipRecorder import ClipRecorder
+    from pycatdetector.DetectionLog import DetectionLog
+    from pycatdetector.Detector import Detector
+    from pycatdetector.EncoderWorker import EncoderWorker
+    from pycatdetector.FrameRegion import FrameRegion
+    from pycatdetector.MetricsServer import MetricsServer
+    from pycatdetector.MotionGate import MotionGate
+    from pycatdetector.Notifier import Notifier
+    from pycatdetector.RateController import RateController
+    from pycatdetector.Recorder import Recorder
+    from pycatdetector.Scheduler import Scheduler
+    from pycatdetector.Tracker import Tracker
+
     signal.signal(signal.SIGINT, handler)
 
-    recorder = Recorder(config.get_str("rtsp_url"))
+    scheduler = Scheduler()
+    videos_folder = config.get_str("videos_folder")
+    if config.get_bool("clips.enabled", False):
+        # Event clips replace the per run video of the matching frames
+        clips = ClipRecorder(
+            videos_folder,
+            config.get_float("clips.pre_roll", ClipRecorder.PRE_ROLL),
+            config.get_float("clips.post_roll", ClipRecorder.POST_ROLL),
+            config.get_float("clips.max_length", ClipRecorder.MAX_LENGTH),
+            config.get_str("clips.fourcc", ClipRecorder.FOURCC),
+            config.get_float("clips.max_age_hours", 7 * 24) * 60 * 60,
+            config.get_int("clips.max_size_mb", 2048) * 1024 * 1024,
+        )
+
+    rate = None
+    if config.get_bool("rate.enabled", False):
+        # Cameras sample at 'sample_hz' only while active, see RateController
+        rate = RateController(
+            config.get_float("rate.target_latency", RateController.TARGET_LATENCY),
+            config.get_float("rate.cpu_budget", RateController.CPU_BUDGET),
+            config.get_float("rate.idle_hz", RateController.IDLE_HZ),
+            config.get_float("rate.hold", RateController.HOLD),
+        )
+
+    cameras = load_cameras(config)
+    for camera in cameras:
+        if camera["latest_frame"]:
+            # Single-slot buffer, the newest frame replaces the unread one
+            images = BoundedQueue(1, BoundedQueue.DROP_OLDEST, "images")
+        else:
+            images = load_queue(config, "images", 10)
+        frames = images
+        motion = camera["motion"]
+        if motion["enabled"]:
+            # The recorder feeds the gate, the gate feeds the images queue
+            frames = BoundedQueue(1, BoundedQueue.DROP_OLDEST, "frames")
+            gates.append(
+                MotionGate(
+                    camera["id"],
+                    frames,
+                    images,
+                    motion["method"],
+                    motion["sensitivity"],
+                    motion["rois"],
+                    motion["heartbeat"],
+                )
+            )
+        recorder = Recorder(
+            camera["rtsp_url"], camera["id"], frames, camera["sample_hz"]
+        )
+        if rate is not None:
+            rate.add_camera(camera["id"], recorder, camera["sample_hz"])
+            if motion["enabled"]:
+                gates[-1].add_listener(lambda camera_id, _: rate.set_active(camera_id))
+        scheduler.add_camera(camera["id"], images, camera["weight"])
+        if clips is not None:
+            clips.add_camera(camera["id"], camera["sample_hz"])
+            recorder.add_listener(clips.add_frame)
+        add_queue_metrics(images, camera["id"])
+        if frames is not images:
+            add_queue_metrics(frames, camera["id"])
+        recorders.append(recorder)
 
     screener_enabled = not config.get_bool("headless")
-    net_model_name = config.get_str("net_model_name")
-    net = NeuralNetPyTorch(net_model_name)
+    metrics = Metrics.get_default()
+    metrics.describe(
+        "startup_seconds", Metrics.GAUGE, "Startup time (model_load, warm_up, total)"
+    )
+    begin = time.monotonic()
+    if config.get_bool("net_cache", False):
+        models_preload(config, models_folder)
+    net = load_net(config, models_folder)
+    metrics.set("startup_seconds", time.monotonic() - begin, stage="model_load")
     notify_min_score = config.get_float("notify_min_score")
 
-    videos_folder = config.get_str("videos_folder")
+    if clips is None and len(videos_folder) > 0:
+        encoder = EncoderWorker(videos_folder, load_queue(config, "encoder", 30))
+        add_queue_metrics(encoder.get_images())
+
+    batch_size = config.get_int("batch_size", 1)
+    batch_timeout = config.get_int("batch_timeout_ms", 0) / 1000
 
     detector = Detector(
-        images=recorder.get_images(),
+        images=scheduler,
         screener_enabled=screener_enabled,
         net=net,
         notify_min_score=notify_min_score,
-        encoder_folder=videos_folder,
+        encoder=encoder,
+        batch_size=batch_size,
+        batch_timeout=batch_timeout,
+        detections=load_queue(config, "detections", 100),
+        images_boxed=load_queue(config, "screener", 2),
+        clips=clips,
+        rate=rate,
     )
+    for camera in cameras:
+        detector.set_region(
+            camera["id"], FrameRegion(camera["roi"], camera["inference_size"])
+        )
+        if config.get_bool("tracking.enabled", False):
+            detector.set_tracker(
+                camera["id"],
+                Tracker(
+                    config.get_float("tracking.iou_threshold", Tracker.IOU_THRESHOLD),
+                    config.get_float("tracking.max_age", Tracker.MAX_AGE),
+                    # Gated: no frames (still scene) until the heartbeat
+                    (
+                        Tracker.GATED_MIN_MISSES
+                        if camera["motion"]["enabled"]
+                        else Tracker.MIN_MISSES
+                    ),
+                ),
+            )
+
+    add_queue_metrics(detector.get_detections())
+    add_queue_metrics(detector.get_images())
 
-    notifier = Notifier(detector.get_detections())
+    warm_up_runs = config.get_int("warm_up.runs", 0)
+    if warm_up_runs > 0:
+        # Before the recorders start, the first frames are not delayed
+        seconds = detector.warm_up(
+            config.get_int("warm_up.width", 1280),
+            config.get_int("warm_up.height", 720),
+            warm_up_runs,
+        )
+        metrics.set("startup_seconds", seconds, stage="warm_up")
+
+    log = None
+    if config.get_bool("detection_log.enabled", False):
+        log = DetectionLog(
+            config.get_str("detection_log.path", "./data/detections.db"),
+            config.get_float("detection_log.sync_interval", DetectionLog.SYNC_INTERVAL),
+            config.get_float("detection_log.max_age_hours", 7 * 24) * 60 * 60,
+            config.get_int("detection_log.max_size_mb", 512) * 1024 * 1024,
+        )
+        logger.info("Detection log: " + log.path)
+
+    notifier = Notifier(detector.get_detections(), log)
     load_channels(config, notifier)
 
     detector.set_labels(notifier.get_labels())
 
+    if config.get_bool("metrics.enabled", False):
+        metrics_server = MetricsServer(
+            config.get_str("metrics.host", "127.0.0.1"),
+            config.get_int("metrics.port", 9100),
+        )
+
+    startup = time.monotonic() - started
+    metrics.set("startup_seconds", startup, stage="total")
+    logger.info("Startup: %.3fs" % startup)
+
     logger.info("Threads starting...")
-    recorder.start()
+    if metrics_server is not None:
+        metrics_server.start()
+    for recorder in recorders:
+        recorder.start()
+    for gate in gates:
+        gate.start()
+    if clips is not None:
+        clips.start()
+    if encoder is not None:
+        encoder.start()
     detector.start()
     notifier.start()
 
     if screener_enabled:
+        from pycatdetector.Screener import Screener  # matplotlib
+
         screener = Screener(detector.get_images())
         screener.show()
         detector.disable_screener()
 
     logger.info("Threads joining...")
     notifier.join()
-    recorder.join()
+    for recorder in recorders:
+        recorder.join()
+    for gate in gates:
+        gate.join()
+    if clips is not None:
+        clips.join()
     detector.join()
+    if encoder is not None:
+        encoder.stop()  # after the detector, the last images are queued
+        encoder.join()
+    net.close()
+    if log is not None:
+        log.close()
+    if metrics_server is not None:
+        metrics_server.stop()
+        metrics_server.join()
 
 
 def handler(signum, frame):
-    global recorder, detector, notifier, screener
+    global recorders, gates, metrics_server, clips, encoder, detector, notifier
+    global screener
     if signum == signal.SIGINT:  # CTRL + C
         if screener is not None:
             screener.close()
         if notifier is not None:
             notifier.stop()
-        if recorder is not None:
+        for recorder in recorders:
             recorder.stop()
+        for gate in gates:
+            gate.stop()
+        if clips is not None:
+            clips.stop()
         if detector is not None:
             detector.stop()
 
 
-def models_preload():
+def models_preload(config: Config, models_folder: str):
+    """
+    Exports the weights cache of the configured model to 'models_folder'
+    if missing (the only download), the next starts load it from there
+    without network (see NeuralNetPyTorch), exported artifact variants
+    (TorchScript, ONNX) don't use it.
+    """
     global logger
-    logger.info("Preloading PyTorch models...")
-    NeuralNetPyTorch("FasterRCNN_MobileNet_V3_Large_FPN")
-    NeuralNetPyTorch("FasterRCNN_MobileNet_V3_Large_320_FPN")
+    from pycatdetector.ModelExporter import ModelExporter
+    from pycatdetector.NeuralNetPyTorch import NeuralNetPyTorch
+
+    model_name = config.get_str("net_model_name")
+    variant = NeuralNetPyTorch.split_model_name(model_name)[1]
+    if variant in [NeuralNetPyTorch.TORCHSCRIPT, NeuralNetPyTorch.ONNX]:
+        return
+    path = NeuralNetPyTorch.get_weights_path(models_folder, model_name)
+    if os.path.exists(path):
+        logger.info("Weights cache: " + path)
+        return
+    logger.info("Preloading weights cache: " + path)
+    ModelExporter(model_name, models_folder).export_weights()
     logger.info("Preloading: Done.")
 
 
+def load_queue(config: Config, name: str, size: int) -> BoundedQueue:
+    """
+    Returns a new pipeline queue with the 'queues.<name>' settings,
+    by default of the given size and with the drop_oldest policy.
+    """
+    settings = config.get_dict("queues." + name, {})
+    queue = BoundedQueue(
+        int(settings.get("size", size)),
+        str(settings.get("policy", BoundedQueue.DROP_OLDEST)),
+        name,
+    )
+    logger.info("Queue '%s': size %i, %s" % (name, queue.maxsize, queue.policy))
+    return queue
+
+
+def add_queue_metrics(queue: BoundedQueue, camera_id: Optional[str] = None):
+    """
+    Adds the depth and dropped items metrics of a pipeline queue.
+    """
+    labels = {"queue": queue.name}
+    if camera_id is not None:
+        labels["camera"] = camera_id
+    metrics = Metrics.get_default()
+    metrics.describe("queue_depth", Metrics.GAUGE, "Items waiting in the queue")
+    metrics.describe("queue_dropped_total", Metrics.COUNTER, "Items dropped (full)")
+    metrics.add_callback("queue_depth", queue.qsize, **labels)
+    metrics.add_callback("queue_dropped_total", lambda: queue.dropped, **labels)
+
+
+def load_net(config: Config, models_folder: str) -> AbstractNeuralNet:
+    """
+    Returns the neural network ('net_model_name'), a pool of worker
+    processes if 'net_workers' > 0.
+    """
+    from pycatdetector.NeuralNetProcessPool import NeuralNetProcessPool
+    from pycatdetector.NeuralNetPyTorch import NeuralNetPyTorch
+
+    net_model_name = config.get_str("net_model_name")
+    net_workers = config.get_int("net_workers", 0)
+    if net_workers > 0:
+        return NeuralNetProcessPool(
+            net_model_name, workers=net_workers, models_folder=models_folder
+        )
+    return NeuralNetPyTorch.create(net_model_name, models_folder=models_folder)
+
+
+def analyze(config: Config, argv: list[str], models_folder: str):
+    """
+    Offline analysis of video files and image folders (see Analyzer),
+    e.g. main.py analyze ./videos --output detections.csv --min-score 0.5
+    """
+    from pycatdetector.Analyzer import Analyzer
+
+    parser = argparse.ArgumentParser(
+        prog="main.py analyze", description="Analyze video files and image folders"
+    )
+    parser.add_argument("paths", nargs="+", help="video files or folders")
+    parser.add_argument("--output", help="detections file (default: stdout)")
+    parser.add_argument("--format", choices=Analyzer.FORMATS, help="default: jsonl")
+    parser.add_argument(
+        "--min-score", type=float, help="default: notify_min_score (config)"
+    )
+    parser.add_argument(
+        "--labels", help="comma separated (default: the notifiers objects)"
+    )
+    parser.add_argument("--jobs", type=int, default=2, help="decoding threads")
+    parser.add_argument("--batch-size", type=int, help="default: batch_size (config)")
+    parser.add_argument(
+        "--sample-hz", type=float, default=0, help="video frames/s (0 => all)"
+    )
+    args = parser.parse_args(argv)
+
+    if args.labels is not None:
+        labels = [label.strip() for label in args.labels.split(",")]
+    else:
+        labels = sorted(
+            {
+                label
+                for settings in config.get_dict("notifiers", {}).values()
+                if settings.get("enabled")
+                for label in settings.get("objects", [])
+            }
+        )
+    min_score = args.min_score
+    if min_score is None:
+        min_score = config.get_float("notify_min_score")
+    batch_size = args.batch_size or max(4, config.get_int("batch_size", 1))
+
+    net = load_net(config, models_folder)
+    analyzer = Analyzer(net, labels, min_score, batch_size, args.jobs, args.sample_hz)
+    format = Analyzer.get_format(args.output, args.format)
+    output = sys.stdout if args.output is None else open(args.output, "w", newline="")
+    try:
+        summary = analyzer.run(args.paths, output, format)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+        net.close()
+    print(
+        "Analyzed %i frames of %i sources in %.1fs (%.1f fps), %i detections"
+        % (
+            summary["frames"],
+            summary["sources"],
+            summary["seconds"],
+            summary["fps"],
+            summary["detections"],
+        ),
+        file=sys.stderr,
+    )
+
+
+def load_cameras(config: Config) -> list[dict]:
+    """
+    Returns the cameras settings ('id', 'rtsp_url', 'weight', 'sample_hz',
+    'latest_frame', 'motion', 'roi' and 'inference_size'), from the 'cameras'
+    list or the single 'rtsp_url' (camera id 'default'), 'sample_hz',
+    'latest_frame', 'motion' and 'inference_size' defaults are the root ones
+    (camera 'motion' keys override them), 'roi' is only per camera.
+    """
+    from pycatdetector.Recorder import Recorder
+
+    sample_hz = config.get_float("sample_hz", Recorder.SAMPLE_HZ)
+    latest_frame = config.get_bool("latest_frame", False)
+    motion = load_motion(config.get_dict("motion", {}))
+    inference_size = config.get_int("inference_size", 0)
+
+    if not config.has_key("cameras"):
+        return [
+            {
+                "id": "default",
+                "rtsp_url": config.get_str("rtsp_url"),
+                "weight": 1,
+                "sample_hz": sample_hz,
+                "latest_frame": latest_frame,
+                "motion": motion,
+                "roi": None,
+                "inference_size": inference_size,
+            }
+        ]
+
+    cameras = []
+    for i, camera in enumerate(config.get_list("cameras")):
+        if not isinstance(camera, dict) or "rtsp_url" not in camera:
+            raise ValueError("Camera #%i has no 'rtsp_url' configured" % i)
+        cameras.append(
+            {
+                "id": str(camera.get("id", "camera" + str(i))),
+                "rtsp_url": camera["rtsp_url"],
+                "weight": int(camera.get("weight", 1)),
+                "sample_hz": float(camera.get("sample_hz", sample_hz)),
+                "latest_frame": bool(camera.get("latest_frame", latest_frame)),
+                "motion": load_motion(camera.get("motion", {}), motion),
+                "roi": camera.get("roi"),
+                "inference_size": int(camera.get("inference_size", inference_size)),
+            }
+        )
+        logger.info("Added camera '%s'" % cameras[-1]["id"])
+    return cameras
+
+
+def load_motion(settings: dict, defaults: Optional[dict] = None) -> dict:
+    """
+    Returns the motion gate settings ('enabled', 'method', 'sensitivity',
+    'rois' and 'heartbeat'), missing keys from the defaults (disabled).
+    """
+    from pycatdetector.MotionGate import MotionGate
+
+    if defaults is None:
+        defaults = {
+            "enabled": False,
+            "method": MotionGate.DIFF,
+            "sensitivity": MotionGate.SENSITIVITY,
+            "rois": None,
+            "heartbeat": MotionGate.HEARTBEAT,
+        }
+    return {
+        "enabled": bool(settings.get("enabled", defaults["enabled"])),
+        "method": str(settings.get("method", defaults["method"])),
+        "sensitivity": float(settings.get("sensitivity", defaults["sensitivity"])),
+        "rois": settings.get("rois", defaults["rois"]),
+        "heartbeat": float(settings.get("heartbeat", defaults["heartbeat"])),
+    }
+
+
 def load_channels(config: Config, notifier: Notifier):
+    from pycatdetector.ChannelWorker import ChannelWorker
+    from pycatdetector.ImageArtifact import ImageArtifact
 
     for channel_name, settings in config.get_dict("notifiers").items():
 
@@ -110,9 +519,19 @@ def load_channels(config: Config, notifier: Notifier):
         # Load channel class and add it to notifier
         class_name = Config.snake_to_camel(channel_name)  # e.g. MyChannel
         channel_config = config.get_dict("notifiers." + channel_name)
-        channel = eval("pycatdetector.channels." + class_name)(channel_config)
+        # Imported on first use, the disabled channels are never loaded
+        channel = getattr(pycatdetector.channels, class_name)(channel_config)
         notifier.add_channel(
-            channel, config.get_list("notifiers." + channel_name + ".objects")
+            channel,
+            config.get_list("notifiers." + channel_name + ".objects"),
+            config.get_list("notifiers." + channel_name + ".cameras", None),
+            config.get_int(
+                "notifiers." + channel_name + ".queue_size", ChannelWorker.QUEUE_SIZE
+            ),
+            config.get_int("notifiers." + channel_name + ".image_size", 0),
+            config.get_int(
+                "notifiers." + channel_name + ".image_quality", ImageArtifact.QUALITY
+            ),
         )
 
         # Get channel notification window names
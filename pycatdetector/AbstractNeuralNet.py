@@ -1,6 +1,9 @@
 from abc import ABC, abstractmethod
+import numpy as np
 from PIL import Image
 from typing import Optional
+from .BoxedImage import BoxedImage
+from .ScoredLabels import ScoredLabels
 
 
 class AbstractNeuralNet(ABC):
@@ -8,14 +11,41 @@ class AbstractNeuralNet(ABC):
     def analyze(self, image) -> dict:
         pass
 
+    @abstractmethod
+    def analyze_batch(self, images: list) -> list[dict]:
+        pass
+
     @abstractmethod
     def get_classes(self) -> list:
         pass
 
+    @abstractmethod
+    def get_class_ids(self, labels: list) -> np.ndarray:
+        pass
+
+    @abstractmethod
+    def get_detections(
+        self,
+        result: dict,
+        min_score: Optional[float] = -1,
+        class_ids: Optional[np.ndarray] = None,
+    ) -> ScoredLabels:
+        pass
+
     @abstractmethod
     def get_scored_labels(self, result: dict, min_score: Optional[float] = -1) -> list:
         pass
 
+    @abstractmethod
+    def render(self, result: dict) -> BoxedImage:
+        pass
+
     @abstractmethod
     def plot(self, result: dict) -> Image.Image:
         pass
+
+    def close(self):
+        """
+        Releases the resources held by the neural network (if any).
+        """
+        pass
@@ -0,0 +1,183 @@
+import os
+import csv
+import json
+import logging
+from queue import Empty
+from time import monotonic
+from typing import Optional, TextIO
+from .AbstractNeuralNet import AbstractNeuralNet
+from .BoundedQueue import BoundedQueue
+from .Detector import Detector
+from .FileReader import FileReader
+from .Scheduler import Scheduler
+
+
+class Analyzer:
+    """
+    The Analyzer class runs the detection pipeline offline over recorded
+    sources (video files and image folders, e.g. archived footage) as
+    fast as possible: 'jobs' FileReader threads decode the sources in
+    parallel, the Detector analyzes them in batches and the matches are
+    written as JSON lines or CSV rows (e.g. to tune notify_min_score).
+
+    Args:
+        net (AbstractNeuralNet): The neural network object.
+        labels (list): The labels written (e.g. ["cat"]).
+        min_score (float): The minimum score of the detections written.
+        batch_size (int): The max images analyzed in one forward pass.
+        jobs (int): The decoding threads (sources are split among them).
+        sample_hz (float): The video frames per second analyzed, 0 for all.
+    """
+
+    FORMATS = ["jsonl", "csv"]
+    COLUMNS = ["source", "frame", "position", "label", "score", "box"]
+    BATCH_TIMEOUT = 0.05  # seconds, max wait for a batch to fill
+    QUEUE_TIMEOUT = 0.5  # seconds, max wait for detections between checks
+
+    def __init__(
+        self,
+        net: AbstractNeuralNet,
+        labels: list,
+        min_score: float,
+        batch_size: int = 4,
+        jobs: int = 2,
+        sample_hz: float = 0,
+    ):
+        self.logger = logging.getLogger(__name__)
+        if jobs < 1:
+            raise ValueError("Invalid jobs %r" % jobs)
+        self.net = net
+        self.labels = labels
+        self.min_score = min_score
+        self.batch_size = batch_size
+        self.jobs = jobs
+        self.sample_hz = sample_hz
+
+    @classmethod
+    def get_format(cls, path: Optional[str], format: Optional[str] = None) -> str:
+        """
+        Returns the output format, the given one or by the path extension
+        (JSON lines by default).
+
+        Raises:
+            ValueError: If the format is not one of FORMATS.
+        """
+        if format is None:
+            extension = os.path.splitext(path or "")[1].lower().lstrip(".")
+            format = extension if extension in cls.FORMATS else "jsonl"
+        if format not in cls.FORMATS:
+            raise ValueError("Invalid format %r, one of %r" % (format, cls.FORMATS))
+        return format
+
+    def run(self, paths: list[str], output: TextIO, format: str = "jsonl") -> dict:
+        """
+        Analyzes the sources of paths (see FileReader.list_sources),
+        writing the detections to output while they are found.
+
+        Args:
+            paths (list): The video files and folders.
+            output (TextIO): The detections output (text stream).
+            format (str): The output format, one of FORMATS.
+
+        Returns:
+            dict: The 'sources', 'frames', 'detections', 'errors' (frames
+                  failed), 'seconds' and 'fps' (frames analyzed per second).
+        """
+        format = self.get_format(None, format)
+        sources = FileReader.list_sources(paths)
+        readers, scheduler = [], Scheduler()
+        for i in range(min(self.jobs, len(sources))):
+            reader = FileReader(
+                sources[i :: self.jobs],  # every jobs-th source
+                "reader" + str(i),
+                BoundedQueue(
+                    max(FileReader.QUEUE_SIZE, self.batch_size),
+                    BoundedQueue.BLOCK,
+                    "images",
+                ),
+                self.sample_hz,
+            )
+            scheduler.add_camera(reader.reader_id, reader.get_images())
+            readers.append(reader)
+
+        detector = Detector(
+            images=scheduler,
+            screener_enabled=False,
+            net=self.net,
+            notify_min_score=self.min_score,
+            encoder=None,
+            batch_size=self.batch_size,
+            batch_timeout=self.BATCH_TIMEOUT,
+            detections=BoundedQueue(1000, BoundedQueue.BLOCK, "detections"),
+        )
+        detector.set_labels(self.labels)
+
+        writer = csv.writer(output) if format == "csv" else None
+        if writer is not None:
+            writer.writerow(self.COLUMNS)
+        detections = detector.get_detections()
+        count = 0
+
+        begin = monotonic()
+        for reader in readers:
+            reader.start()
+        detector.start()
+        try:
+            while True:
+                try:
+                    detection = detections.get(timeout=self.QUEUE_TIMEOUT)
+                except Empty:
+                    if self._finished(readers, detector) and detections.empty():
+                        break
+                    continue
+                self._write(output, writer, detection)
+                count += 1
+        finally:
+            for reader in readers:
+                reader.stop()
+            detector.stop()
+            for reader in readers:
+                reader.join()
+            detector.join()
+            output.flush()
+        seconds = monotonic() - begin
+
+        frames = detector.frames_analyzed
+        summary = {
+            "sources": len(sources),
+            "frames": frames,
+            "detections": count,
+            "errors": detector.frames_failed,
+            "seconds": round(seconds, 3),
+            "fps": round(frames / seconds, 2) if seconds > 0 else 0.0,
+        }
+        self.logger.info("Analyzed: %r" % summary)
+        return summary
+
+    def _finished(self, readers: list[FileReader], detector: Detector) -> bool:
+        """
+        Returns True if every frame read was analyzed (or failed), or if
+        the detector stopped (e.g. died on an unexpected error).
+        """
+        if not detector.is_alive():
+            self.logger.error("Detector stopped before the end of the sources")
+            return True
+        if not all(reader.done for reader in readers):
+            return False
+        total = sum(reader.frames_read for reader in readers)
+        return detector.frames_analyzed + detector.frames_failed >= total
+
+    def _write(self, output: TextIO, writer, detection: dict):
+        row = {
+            "source": detection.get("source"),
+            "frame": detection.get("frame"),
+            "position": detection.get("position"),
+            "label": detection["label"],
+            "score": round(float(detection["score"]), 4),
+            "box": [round(float(v), 1) for v in detection["box"]],
+        }
+        if writer is None:
+            output.write(json.dumps(row) + "\n")
+        else:
+            row["box"] = " ".join(str(v) for v in row["box"])
+            writer.writerow([row[column] for column in self.COLUMNS])
@@ -0,0 +1,156 @@
+import threading
+from collections import deque
+from queue import Empty
+from time import monotonic
+from typing import Callable, Optional
+
+
+class BoundedQueue:
+    """
+    The BoundedQueue class is a thread-safe FIFO queue with a hard size
+    limit, used between pipeline stages (e.g. Recorder => Detector).
+
+    When the queue is full the overflow policy decides what happens:
+    - drop_oldest: the oldest item is discarded (newest data wins).
+    - drop_newest: the new item is discarded (oldest data wins).
+    - block: the producer waits until there is room or the queue is closed.
+
+    Attributes:
+        name (str): The queue name (for logging and statistics).
+        maxsize (int): The maximum number of items (0 => unbounded).
+        policy (str): The overflow policy (see POLICIES).
+        dropped (int): The number of items discarded due to overflow.
+    """
+
+    DROP_OLDEST = "drop_oldest"
+    DROP_NEWEST = "drop_newest"
+    BLOCK = "block"
+    POLICIES = [DROP_OLDEST, DROP_NEWEST, BLOCK]
+
+    def __init__(self, maxsize: int = 0, policy: str = DROP_OLDEST, name="queue"):
+        """
+        Initializes an empty BoundedQueue.
+
+        Args:
+            maxsize (int): The maximum number of items (0 => unbounded).
+            policy (str): The overflow policy, one of POLICIES.
+            name (str): The queue name.
+
+        Raises:
+            ValueError: If the size or the policy is invalid.
+        """
+        if maxsize < 0:
+            raise ValueError("Invalid queue size %i for %r" % (maxsize, name))
+        if policy not in self.POLICIES:
+            raise ValueError("Invalid queue policy %r for %r" % (policy, name))
+        self.name = name
+        self.maxsize = maxsize
+        self.policy = policy
+        self.dropped = 0
+        self.closed = False
+        self.items = deque()
+        self.lock = threading.Lock()
+        self.not_empty = threading.Condition(self.lock)
+        self.not_full = threading.Condition(self.lock)
+        self.listeners: list[Callable[[], None]] = []
+
+    def add_listener(self, listener: Callable[[], None]):
+        """
+        Adds a callback invoked (without arguments) after each queued item.
+
+        Args:
+            listener (callable): The callback.
+        """
+        self.listeners.append(listener)
+
+    def put(self, item) -> bool:
+        """
+        Puts an item into the queue applying the overflow policy.
+
+        Args:
+            item: The item to queue.
+
+        Returns:
+            bool: True if the item was queued, False if it was dropped
+                  (drop_newest) or the queue was closed while blocked.
+        """
+        with self.lock:
+            if self.maxsize > 0 and len(self.items) >= self.maxsize:
+                if self.policy == self.DROP_NEWEST:
+                    self.dropped += 1
+                    return False
+                elif self.policy == self.DROP_OLDEST:
+                    self.items.popleft()
+                    self.dropped += 1
+                else:
+                    while len(self.items) >= self.maxsize and not self.closed:
+                        self.not_full.wait()
+            if self.closed and self.policy == self.BLOCK:
+                return False
+            self.items.append(item)
+            self.not_empty.notify()
+
+        for listener in self.listeners:
+            listener()
+        return True
+
+    def get(self, block: bool = True, timeout: Optional[float] = None):
+        """
+        Removes and returns the oldest item from the queue.
+
+        Args:
+            block (bool): Wait until an item is available.
+            timeout (float): The maximum time in seconds to wait (None => forever).
+
+        Returns:
+            The oldest item.
+
+        Raises:
+            Empty: If no item is available (after the timeout if blocking).
+        """
+        with self.not_empty:
+            if not block:
+                if len(self.items) == 0:
+                    raise Empty
+            elif timeout is None:
+                while len(self.items) == 0:
+                    self.not_empty.wait()
+            else:
+                deadline = monotonic() + timeout
+                while len(self.items) == 0:
+                    remaining = deadline - monotonic()
+                    if remaining <= 0:
+                        raise Empty
+                    self.not_empty.wait(remaining)
+            item = self.items.popleft()
+            self.not_full.notify()
+            return item
+
+    def clear(self):
+        """
+        Discards all the queued items.
+        """
+        with self.lock:
+            self.items.clear()
+            self.not_full.notify_all()
+
+    def close(self):
+        """
+        Closes the queue, producers blocked on a full queue are released
+        and later puts on a blocking queue are discarded.
+        """
+        with self.lock:
+            self.closed = True
+            self.not_full.notify_all()
+
+    def empty(self) -> bool:
+        """
+        Returns True if the queue is empty.
+        """
+        return len(self.items) == 0
+
+    def qsize(self) -> int:
+        """
+        Returns the number of queued items.
+        """
+        return len(self.items)
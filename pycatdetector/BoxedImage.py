@@ -0,0 +1,118 @@
+import cv2
+import threading
+import numpy as np
+from PIL import Image
+
+
+class BoxedImage:
+    """
+    The BoxedImage class represents the boxed (annotated) image of an
+    analysis result, a lazy handle: the boxes are only drawn (with OpenCV,
+    straight onto a copy of the uint8 BGR frame) when a consumer asks for
+    the pixels (e.g. a channel, the encoder or the screener) and cached, so
+    most of the analyzed frames never pay the drawing cost.
+
+    Args:
+        frame (numpy.ndarray): The analyzed uint8 BGR HxWx3 frame.
+        labels (list): The detected class labels.
+        scores (numpy.ndarray): The detection scores.
+        boxes (numpy.ndarray): The detection boxes [x1, y1, x2, y2].
+    """
+
+    # Vivid dark colors (BGR), cycled through the boxes, green first
+    PALETTE = [
+        (0, 255, 0),  # Green
+        (0, 0, 255),  # Red
+        (255, 0, 0),  # Blue
+        (0, 255, 255),  # Yellow
+        (255, 0, 255),  # Magenta
+        (255, 255, 0),  # Cyan
+        (0, 128, 255),  # Orange
+        (255, 0, 128),  # Purple
+        (255, 128, 0),  # Sky Blue
+        (0, 255, 128),  # Lime
+        (128, 255, 0),  # Aqua
+        (128, 0, 255),  # Pink
+    ]
+    FONT = cv2.FONT_HERSHEY_SIMPLEX
+
+    def __init__(
+        self, frame: np.ndarray, labels: list, scores: np.ndarray, boxes: np.ndarray
+    ):
+        self.frame = frame
+        self.labels = labels
+        self.scores = scores
+        self.boxes = boxes
+        self.lock = threading.Lock()
+        self.array = None  # drawn BGR frame, cached
+        self.image = None  # drawn RGB PIL image, cached
+
+    @classmethod
+    def from_result(cls, result: dict) -> "BoxedImage":
+        """
+        Returns the handle of an analysis result (every detection of the
+        result is boxed), nothing is drawn yet.
+        """
+        return cls(
+            result["image"].permute(1, 2, 0).numpy(),  # BGR CxHxW => HxWxC
+            result["labels"],
+            result["scores"].detach().numpy(),
+            result["boxes"].detach().numpy(),
+        )
+
+    def get_size(self) -> tuple[int, int]:
+        """
+        Returns the image (width, height).
+        """
+        return self.frame.shape[1], self.frame.shape[0]
+
+    def get_array(self) -> np.ndarray:
+        """
+        Returns the boxed image, a uint8 BGR HxWx3 array (drawn on first
+        use, don't modify it, it's shared by the consumers).
+        """
+        with self.lock:  # several consumers may ask at the same time
+            if self.array is None:
+                self.array = self._draw()
+            return self.array
+
+    def get_image(self) -> Image.Image:
+        """
+        Returns the boxed image as a RGB PIL image (converted on first use).
+        """
+        array = self.get_array()
+        with self.lock:
+            if self.image is None:
+                self.image = Image.fromarray(cv2.cvtColor(array, cv2.COLOR_BGR2RGB))
+            return self.image
+
+    def _draw(self) -> np.ndarray:
+        array = np.ascontiguousarray(self.frame).copy()
+        # Line and text sizes relative to the frame (e.g. 3px on 720p)
+        thickness = max(1, round(min(array.shape[:2]) / 240))
+        scale = thickness * 0.4
+        for i, (label, score, box) in enumerate(
+            zip(self.labels, self.scores.tolist(), self.boxes.tolist())
+        ):
+            color = self.PALETTE[i % len(self.PALETTE)]
+            x1, y1, x2, y2 = (int(round(v)) for v in box)
+            cv2.rectangle(array, (x1, y1), (x2, y2), color, thickness)
+            text = "%s: %.2f" % (label, score)
+            (width, height), baseline = cv2.getTextSize(
+                text, self.FONT, scale, thickness
+            )
+            top = max(0, y1 - height - baseline)
+            cv2.rectangle(
+                array, (x1, top), (x1 + width, top + height + baseline), color, -1
+            )
+            cv2.putText(
+                array,
+                text,
+                (x1, top + height),
+                self.FONT,
+                scale,
+                (0, 0, 0),
+                thickness,
+                cv2.LINE_AA,
+            )
+        return array
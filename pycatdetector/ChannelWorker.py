@@ -0,0 +1,214 @@
+import logging
+import threading
+import traceback
+from queue import Empty
+from time import monotonic
+from typing import Callable, Optional
+from .BoundedQueue import BoundedQueue
+from .DetectionLog import DetectionLog
+from .ImageArtifact import ImageArtifact
+from .Metrics import Metrics
+from .channels.AbstractChannel import AbstractChannel
+
+
+class ChannelWorker(threading.Thread):
+    """
+    The ChannelWorker class represents a thread sending the notifications
+    of a single channel from its own bounded queue, so a slow channel
+    (e.g. a Home Assistant speech) doesn't hold up the other channels or
+    the detections queue. When the queue is full the oldest pending
+    notification is dropped.
+
+    With a DetectionLog the worker consumes the log instead, from the
+    channel offset (replaying the detections not handled before a
+    restart), a failed notification is retried with backoff until sent
+    (at-least-once) and the offset is committed once handled. Whether the
+    channel notifies a logged detection was decided when appended.
+
+    Args:
+        channel (AbstractChannel): The channel instance.
+        queue_size (int): The max pending notifications of the channel.
+        image_size (int): The max width and height in pixels of the image
+                          sent (e.g. a thumbnail), 0 for the full size.
+        image_quality (int): The JPEG quality of the image sent.
+        log (DetectionLog): The durable detections log, None to send the
+                            notifications submitted to the worker queue.
+        replay (Callable): With a log, returns whether the channel notifies
+                           a logged detection and its content, see
+                           Notifier.replay.
+    """
+
+    QUEUE_SIZE = 10  # default max pending notifications
+    QUEUE_TIMEOUT = 1  # seconds, max wait for notifications between stop checks
+    LOG_BATCH = 10  # detections read from the log at once
+    RETRY_DELAY = 1  # seconds, first retry delay of a failed (logged) one
+    RETRY_MAX_DELAY = 60  # seconds, doubled on every retry up to it
+
+    def __init__(
+        self,
+        channel: AbstractChannel,
+        queue_size: int = QUEUE_SIZE,
+        image_size: int = 0,
+        image_quality: int = ImageArtifact.QUALITY,
+        log: Optional[DetectionLog] = None,
+        replay: Optional[Callable] = None,
+    ):
+        threading.Thread.__init__(self, name="ChannelWorker-" + channel.get_name())
+        self.logger = logging.getLogger(__name__)
+        self.channel = channel
+        self.pending = BoundedQueue(
+            queue_size, BoundedQueue.DROP_OLDEST, "channel-" + channel.get_name()
+        )
+        self.image_size = image_size
+        self.image_quality = image_quality
+        if log is not None and replay is None:
+            raise ValueError("A log requires a replay callable")
+        self.log = log
+        self.replay = replay
+        self.must_stop = False
+        self.stopped = threading.Event()  # interrupts the retry delays
+        self.metrics = Metrics.get_default()
+        self.metrics.describe(
+            "notify_seconds", Metrics.HISTOGRAM, "Channel notification time"
+        )
+        self.metrics.describe(
+            "notifications_total", Metrics.COUNTER, "Channel notifications sent"
+        )
+        self.metrics.describe(
+            "notify_failures_total", Metrics.COUNTER, "Channel notifications failed"
+        )
+        self.metrics.describe(
+            "queue_depth", Metrics.GAUGE, "Items waiting in the queue"
+        )
+        self.metrics.add_callback(
+            "queue_depth", self.pending.qsize, queue=self.pending.name
+        )
+
+    def submit(self, content: Optional[dict] = None) -> bool:
+        """
+        Queues a notification for the channel (non blocking).
+
+        Args:
+            content (dict): The channel custom content (e.g. image), an
+                            'image_artifact' is encoded when sent.
+
+        Returns:
+            bool: True if queued, False if the worker is stopped.
+        """
+        if self.must_stop:
+            return False
+        return self.pending.put(content)
+
+    def run(self):
+        self.logger.info("Started Thread ID: %s" % threading.get_native_id())
+        if self.log is not None:
+            self._consume()
+        while not self.must_stop:
+            try:
+                content = self.pending.get(timeout=self.QUEUE_TIMEOUT)
+            except Empty:
+                continue
+            try:
+                if not self.send(content):
+                    self.logger.warning(
+                        "Channel '%s' failed to notify" % self.channel.get_name()
+                    )
+            except:  # noqa -- flake8 skip
+                self.logger.error(traceback.format_exc())
+        self.logger.info("Stopped.")
+
+    def stop(self):
+        if not self.must_stop:
+            self.logger.info("Stopping...")
+            self.must_stop = True
+            self.stopped.set()
+            self.pending.close()
+            self.metrics.remove_callback("queue_depth", queue=self.pending.name)
+        else:
+            self.logger.info("Already stopped.")
+
+    def _consume(self):
+        """
+        Consumes the detections log from the channel offset, committing
+        the offset of every handled (notified or skipped) detection.
+        """
+        log, replay = self.log, self.replay
+        if log is None or replay is None:
+            return
+        name = self.channel.get_name()
+        offset = log.get_offset(name)
+        self.logger.info("Consuming detections log from offset %i" % offset)
+        while not self.must_stop:
+            entries = log.read(offset, self.LOG_BATCH)
+            if len(entries) == 0:
+                log.wait(offset, self.QUEUE_TIMEOUT)
+                continue
+            for entry in entries:
+                if self.must_stop:
+                    return
+                try:
+                    send, content = replay(self.channel, entry)
+                except:  # noqa -- flake8 skip
+                    self.logger.error(traceback.format_exc())
+                    send, content = False, None
+                if send and not self._deliver(content):
+                    return  # stopped, not delivered (replayed on restart)
+                offset = entry["id"]
+                log.commit_offset(name, offset)
+
+    def _deliver(self, content: Optional[dict]) -> bool:
+        """
+        Sends the notification, retrying with backoff until sent.
+
+        Returns:
+            bool: True if sent, False if stopped before.
+        """
+        delay = self.RETRY_DELAY
+        while not self.must_stop:
+            try:
+                if self.send(content):
+                    return True
+            except:  # noqa -- flake8 skip
+                self.logger.error(traceback.format_exc())
+            self.logger.warning(
+                "Channel '%s' failed to notify, retrying in %is"
+                % (self.channel.get_name(), delay)
+            )
+            self.stopped.wait(delay)
+            delay = min(delay * 2, self.RETRY_MAX_DELAY)
+        return False
+
+    def send(self, content: Optional[dict] = None) -> bool:
+        """
+        Sends the notification through the channel, measuring its
+        latency and counting it as failed if it raised or returned False.
+        An 'image_artifact' content is replaced by its 'image_data' in the
+        channel size and quality (encoded once for all the channels).
+
+        Args:
+            content (dict): The channel custom content (e.g. image).
+
+        Returns:
+            bool: True if the channel notified.
+
+        Raises:
+            Exception: The channel exception, if any.
+        """
+        begin = monotonic()
+        if content is not None and "image_artifact" in content:
+            content = dict(content)
+            artifact = content.pop("image_artifact")
+            content["image_data"] = artifact.get_data(
+                self.image_size, self.image_quality
+            )
+        sent = False
+        try:
+            sent = self.channel.notify(content)
+        finally:
+            name = self.channel.get_name()
+            self.metrics.observe("notify_seconds", monotonic() - begin, channel=name)
+            if sent is False:
+                self.metrics.inc("notify_failures_total", channel=name)
+            else:
+                self.metrics.inc("notifications_total", channel=name)
+        return sent is not False
@@ -0,0 +1,287 @@
+import os
+import cv2
+import logging
+import threading
+import numpy as np
+from collections import deque
+from datetime import datetime
+from queue import Empty
+from time import monotonic, time
+from typing import Optional
+from .BoundedQueue import BoundedQueue
+
+
+class ClipRecorder(threading.Thread):
+    """
+    The ClipRecorder class represents a thread recording a video clip per
+    detection event, with the frames before (pre-roll), during and after
+    (post-roll) the event, instead of encoding every matching frame into
+    one ever-growing video per run.
+
+    The recent frames of every camera (see Recorder.add_listener) are kept
+    JPEG compressed in a ring buffer of 'pre_roll' seconds, on an event
+    they are written to a new clip followed by the live frames until no
+    event happened for 'post_roll' seconds (or the clip reaches 'max_length'
+    seconds). Clips are encoded with a real codec (MJPG by default) and
+    rotated by age and total size. A clip has a fixed frame rate, the frames
+    are placed by their timestamps (repeated or dropped), so it plays in real
+    time even if the sampling rate changes (see RateController).
+
+    Args:
+        folder (str): The clips folder.
+        pre_roll (float): The seconds recorded before the event.
+        post_roll (float): The seconds recorded after the last event.
+        max_length (float): The max seconds of a clip.
+        fourcc (str): The clip codec, e.g. 'MJPG' or 'avc1' (H.264, if
+                      supported by the OpenCV build).
+        max_age (float): The max age in seconds of the clips kept, 0 for
+                         no age limit.
+        max_bytes (int): The max total size of the clips kept, 0 for no
+                         size limit.
+    """
+
+    PRE_ROLL = 10  # seconds
+    POST_ROLL = 10  # seconds
+    MAX_LENGTH = 120  # seconds
+    FOURCC = "MJPG"
+    EXTENSION = ".avi"
+    JPEG_QUALITY = 80  # ring buffer frames compression
+    MAX_AGE = 7 * 24 * 60 * 60  # seconds, a week
+    MAX_BYTES = 2 * 1024 * 1024 * 1024  # 2 GiB
+    QUEUE_SIZE = 30  # frames waiting to be buffered (all cameras)
+    QUEUE_TIMEOUT = 1  # seconds, max wait for frames between stop checks
+
+    def __init__(
+        self,
+        folder: str,
+        pre_roll: float = PRE_ROLL,
+        post_roll: float = POST_ROLL,
+        max_length: float = MAX_LENGTH,
+        fourcc: str = FOURCC,
+        max_age: float = MAX_AGE,
+        max_bytes: int = MAX_BYTES,
+    ):
+        threading.Thread.__init__(self, name="ClipRecorder")
+        self.logger = logging.getLogger(__name__)
+        if len(fourcc) != 4:
+            raise ValueError("Invalid fourcc %r" % fourcc)
+        self.folder = folder
+        self.pre_roll = pre_roll
+        self.post_roll = post_roll
+        self.max_length = max_length
+        self.fourcc = fourcc
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self.frames = BoundedQueue(self.QUEUE_SIZE, BoundedQueue.DROP_OLDEST, "clips")
+        self.cameras = {}  # indexed per camera id, ring buffer and clip
+        self.lock = threading.Lock()
+        self.events = {}  # indexed per camera id, last event time (pending)
+        self.must_stop = False
+
+    def add_camera(self, camera_id: str, fps: float):
+        """
+        Adds a camera, its frames are buffered and recorded at fps.
+
+        Args:
+            camera_id (str): The camera id.
+            fps (float): The clip frames per second (e.g. the max sample_hz).
+        """
+        if camera_id in self.cameras:
+            raise ValueError("Camera %r already added" % camera_id)
+        self.cameras[camera_id] = {
+            "fps": fps,
+            # (time, jpeg) pairs, bounded in case the camera fps is higher
+            "ring": deque(maxlen=max(1, int(self.pre_roll * fps * 2) + 1)),
+            "writer": None,
+            "size": None,
+            "path": None,
+            "begin": 0.0,
+            "end": 0.0,
+            "start": 0.0,  # clip first frame time
+            "written": 0,  # clip frames written
+            "last": None,  # clip last frame, repeated until the next one
+        }
+
+    def add_frame(self, camera_id: str, frame: np.ndarray):
+        """
+        Queues a camera frame (non blocking), Recorder listener.
+        """
+        self.frames.put((camera_id, monotonic(), frame))
+
+    def trigger(self, camera_id: str):
+        """
+        Records (or extends) the clip of a camera for an event (detection).
+        """
+        with self.lock:
+            self.events[camera_id] = monotonic()
+
+    def get_clip_path(self, camera_id: str) -> Optional[str]:
+        """
+        Returns the clip being recorded for a camera, None if not recording.
+        """
+        return self.cameras[camera_id]["path"]
+
+    def run(self):
+        self.logger.info("Starting with Thread ID: %s" % threading.get_native_id())
+        self.logger.info(
+            "Clips folder: %s, Pre-roll: %is, Post-roll: %is, Codec: %s"
+            % (self.folder, self.pre_roll, self.post_roll, self.fourcc)
+        )
+        self.rotate()
+        while not self.must_stop:
+            try:
+                camera_id, timestamp, frame = self.frames.get(
+                    timeout=self.QUEUE_TIMEOUT
+                )
+            except Empty:
+                self.process_events()
+                continue
+            self.process_events()
+            self.process_frame(camera_id, timestamp, frame)
+
+        for camera_id in self.cameras:
+            self.close_clip(camera_id)
+        self.logger.info("Stopped.")
+
+    def stop(self):
+        if not self.must_stop:
+            self.logger.info("Stopping...")
+            self.must_stop = True
+            self.frames.close()
+        else:
+            self.logger.info("Already stopped.")
+
+    def process_events(self):
+        """
+        Opens (with the pre-roll frames) or extends the clips of the
+        triggered cameras and closes the clips whose post-roll elapsed.
+        """
+        with self.lock:
+            events, self.events = self.events, {}
+        now = monotonic()
+        for camera_id, event_time in events.items():
+            camera = self.cameras.get(camera_id)
+            if camera is None:
+                continue
+            if camera["writer"] is None:
+                self.open_clip(camera_id, event_time)
+            if camera["writer"] is not None:
+                camera["end"] = min(
+                    event_time + self.post_roll, camera["begin"] + self.max_length
+                )
+        for camera_id, camera in self.cameras.items():
+            if camera["writer"] is not None and now >= camera["end"]:
+                self.close_clip(camera_id)
+
+    def process_frame(self, camera_id: str, timestamp: float, frame: np.ndarray):
+        """
+        Buffers a frame (compressed) and writes it to the open clip.
+        """
+        camera = self.cameras.get(camera_id)
+        if camera is None:
+            return
+        ok, jpeg = cv2.imencode(
+            ".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.JPEG_QUALITY]
+        )
+        if ok:
+            ring = camera["ring"]
+            ring.append((timestamp, jpeg))
+            while len(ring) > 0 and ring[0][0] < timestamp - self.pre_roll:
+                ring.popleft()
+        if camera["writer"] is not None:
+            self.write(camera, timestamp, frame)
+
+    def open_clip(self, camera_id: str, event_time: float):
+        """
+        Opens the clip of a camera and writes its pre-roll frames.
+        """
+        camera = self.cameras[camera_id]
+        frames = [
+            (timestamp, jpeg)
+            for timestamp, jpeg in camera["ring"]
+            if timestamp >= event_time - self.pre_roll
+        ]
+        if len(frames) == 0:
+            return  # no frames yet, retried on the next event
+        if not os.path.exists(self.folder):
+            self.logger.info("Creating folder: " + self.folder)
+            os.makedirs(self.folder)
+        path = os.path.join(
+            self.folder,
+            "clip-"
+            + camera_id
+            + "-"
+            + datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+            + self.EXTENSION,
+        )
+        first = cv2.imdecode(frames[0][1], cv2.IMREAD_COLOR)
+        height, width = first.shape[:2]
+        writer = cv2.VideoWriter(
+            path,
+            cv2.VideoWriter.fourcc(*self.fourcc),
+            camera["fps"],
+            (width, height),
+        )
+        if not writer.isOpened():
+            self.logger.error("Failed to open clip: %s (%s)" % (path, self.fourcc))
+            return
+        camera.update({"writer": writer, "size": (width, height), "path": path})
+        camera.update({"begin": event_time, "start": frames[0][0], "written": 0})
+        for timestamp, jpeg in frames:
+            self.write(camera, timestamp, cv2.imdecode(jpeg, cv2.IMREAD_COLOR))
+        self.logger.info(
+            "Recording clip: %s (Pre-roll: %i frames)" % (path, len(frames))
+        )
+
+    def close_clip(self, camera_id: str):
+        """
+        Closes the clip of a camera (if recording) and rotates the clips.
+        """
+        camera = self.cameras[camera_id]
+        if camera["writer"] is None:
+            return
+        camera["writer"].release()
+        self.logger.info("Closed clip: %s" % camera["path"])
+        camera.update({"writer": None, "size": None, "path": None, "last": None})
+        self.rotate()
+
+    def write(self, camera: dict, timestamp: float, frame: np.ndarray):
+        """
+        Writes a frame at its time in the clip, the previous frame repeated
+        until then (sampled slower than fps), dropped if its time is already
+        written (sampled faster than fps).
+        """
+        if (frame.shape[1], frame.shape[0]) != camera["size"]:
+            frame = cv2.resize(frame, camera["size"])  # e.g. camera reconnected
+        position = round((timestamp - camera["start"]) * camera["fps"])
+        while camera["last"] is not None and camera["written"] < position:
+            camera["writer"].write(camera["last"])
+            camera["written"] += 1
+        if camera["written"] <= position:
+            camera["writer"].write(frame)
+            camera["written"] += 1
+        camera["last"] = frame
+
+    def rotate(self):
+        """
+        Deletes the clips older than max_age and the oldest ones beyond
+        max_bytes (the clips being recorded are kept).
+        """
+        if not os.path.exists(self.folder):
+            return
+        recording = {camera["path"] for camera in self.cameras.values()}
+        clips = []
+        for name in os.listdir(self.folder):
+            path = os.path.join(self.folder, name)
+            if name.startswith("clip-") and name.endswith(self.EXTENSION):
+                if path not in recording:
+                    stat = os.stat(path)
+                    clips.append((stat.st_mtime, stat.st_size, path))
+        clips.sort(reverse=True)  # newest first
+        now, total = time(), 0
+        for mtime, size, path in clips:
+            total += size
+            expired = self.max_age > 0 and now - mtime > self.max_age
+            if expired or (self.max_bytes > 0 and total > self.max_bytes):
+                self.logger.info("Deleting clip: %s" % path)
+                os.remove(path)
@@ -13,6 +13,7 @@ class Config:
     """
 
     _CONFIG = {}
+    _MISSING = object()  # sentinel, distinguishes "no default" from None
 
     def __init__(self, config_file="config.yaml"):
         """
@@ -48,7 +49,7 @@ class Config:
             current = current[key]
         return current
 
-    def _get(self, name: str) -> Any:
+    def _get(self, name: str, default: Any = _MISSING) -> Any:
         """
         Retrieves a configuration value by its key.
         Supports dot-separated strings for nested keys.
@@ -59,53 +60,73 @@ class Config:
 
         Returns:
             The configuration value or default if not found
+
+        Raises:
+            KeyError: If the key is not found and no default is given
         """
-        if "." not in name:
-            return self._CONFIG[name]
-        else:
-            keys = name.split(".")
-            return self._get_nested_value(keys)
+        try:
+            if "." not in name:
+                return self._CONFIG[name]
+            else:
+                keys = name.split(".")
+                return self._get_nested_value(keys)
+        except KeyError:
+            if default is self._MISSING:
+                raise
+            return default
 
-    def get_str(self, name: str) -> str:
+    def get_str(self, name: str, default: Any = _MISSING) -> str:
         """Get a string configuration value."""
-        value = self._get(name)
+        value = self._get(name, default)
+        if value is default:
+            return value
         if not isinstance(value, str):
             raise TypeError(f"Configuration value '{name}' is not a string")
         return value
 
-    def get_int(self, name: str) -> int:
+    def get_int(self, name: str, default: Any = _MISSING) -> int:
         """Get an integer configuration value."""
-        value = self._get(name)
+        value = self._get(name, default)
+        if value is default:
+            return value
         if not isinstance(value, int):
             raise TypeError(f"Configuration value '{name}' is not an integer")
         return value
 
-    def get_float(self, name: str) -> float:
+    def get_float(self, name: str, default: Any = _MISSING) -> float:
         """Get a float configuration value."""
-        value = self._get(name)
+        value = self._get(name, default)
+        if value is default:
+            return value
         if not isinstance(value, (int, float)):
             raise TypeError(f"Configuration value '{name}' is not a number")
         return float(value)
 
-    def get_bool(self, name: str) -> bool:
+    def get_bool(self, name: str, default: Any = _MISSING) -> bool:
         """Get a boolean configuration value."""
-        value = self._get(name)
+        value = self._get(name, default)
+        if value is default:
+            return value
         if not isinstance(value, bool):
             raise TypeError(f"Configuration value '{name}' is not a boolean")
         return value
 
-    def get_dict(self, name: Optional[str] = None) -> dict:
+    def get_dict(self, name: Optional[str] = None, default: Any = _MISSING) -> dict:
         """Get a dictionary configuration value."""
         if name is None:
             return self._CONFIG
-        value = self._get(name)
+        value = self._get(name, default)
+        if value is default:
+            return value
         if not isinstance(value, dict):
             raise TypeError(f"Configuration value '{name}' is not a dictionary")
         return value
 
-    def get_list(self, name: str) -> list:
+    def get_list(self, name: str, default: Any = _MISSING) -> list:
         """Get a list configuration value."""
-        value = self._get(name)
+        value = self._get(name, default)
+        if value is default:
+            return value
         if not isinstance(value, list):
             raise TypeError(f"Configuration value '{name}' is not a list")
         return value
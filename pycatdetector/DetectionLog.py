@@ -0,0 +1,285 @@
+import os
+import json
+import logging
+import sqlite3
+import threading
+from time import monotonic, time
+from typing import Optional
+
+
+class DetectionLog:
+    """
+    The DetectionLog class represents a durable, append-only log of the
+    detections (SQLite in WAL mode) consumed by the channel workers with
+    at-least-once delivery, each channel commits its own offset (last
+    handled detection id), so pending notifications survive a restart
+    or a channel outage. The channels notifying a detection are decided
+    when appended (notify window and same object delay at detection time)
+    and stored with it, a replay doesn't decide again:
+    - https://www.sqlite.org/wal.html
+
+    Writes are grouped in a transaction committed (fsync) at most every
+    'sync_interval' seconds, a crash loses at most that interval. Old
+    detections are pruned by age ('max_age') and total image size
+    ('max_bytes'), even if not delivered.
+
+    Args:
+        path (str): The SQLite database file path.
+        sync_interval (float): The max seconds between commits (0 => on
+                               every write).
+        max_age (float): The max age in seconds of the detections kept,
+                         0 for no age limit.
+        max_bytes (int): The max total size of the images kept, 0 for no
+                         size limit.
+    """
+
+    SYNC_INTERVAL = 1  # seconds
+    MAX_AGE = 7 * 24 * 60 * 60  # seconds, a week
+    MAX_BYTES = 512 * 1024 * 1024  # 512 MiB
+    PRUNE_INTERVAL = 60  # seconds
+
+    def __init__(
+        self,
+        path: str,
+        sync_interval: float = SYNC_INTERVAL,
+        max_age: float = MAX_AGE,
+        max_bytes: int = MAX_BYTES,
+    ):
+        self.logger = logging.getLogger(__name__)
+        folder = os.path.dirname(path)
+        if len(folder) > 0 and not os.path.exists(folder):
+            self.logger.info("Creating folder: " + folder)
+            os.makedirs(folder)
+        self.path = path
+        self.sync_interval = sync_interval
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.appended = threading.Condition(self.lock)
+        # Shared by the notifier and the channel workers (serialized by lock),
+        # uncommitted writes are visible to all of them
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=FULL")  # fsync on (batched) commit
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS detections ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " created REAL NOT NULL,"
+            " timestamp TEXT, camera TEXT, label TEXT, score REAL,"
+            " image BLOB, channels TEXT)"
+        )
+        columns = [row[1] for row in self.db.execute("PRAGMA table_info(detections)")]
+        if "channels" not in columns:  # log created by a previous version
+            self.db.execute("ALTER TABLE detections ADD COLUMN channels TEXT")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS offsets ("
+            " channel TEXT PRIMARY KEY, last_id INTEGER NOT NULL)"
+        )
+        self.db.commit()
+        self.last_commit = monotonic()
+        self.last_prune = 0.0
+        self.closed = False
+
+    def append(
+        self,
+        detection: dict,
+        image_data: Optional[bytes] = None,
+        channels: Optional[list[str]] = None,
+    ) -> int:
+        """
+        Appends a detection to the log, waking up the waiting consumers.
+
+        Args:
+            detection (dict): The detection ('timestamp', 'camera', 'label'
+                              and 'score' are stored).
+            image_data (bytes): The encoded detection image, if any.
+            channels (list): The names of the channels notifying it, None
+                             for all of them.
+
+        Returns:
+            int: The detection id (increasing).
+        """
+        with self.lock:
+            cursor = self.db.execute(
+                "INSERT INTO detections"
+                " (created, timestamp, camera, label, score, image, channels)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    time(),
+                    detection.get("timestamp"),
+                    detection.get("camera", "default"),
+                    detection["label"],
+                    float(detection["score"]),
+                    image_data,
+                    json.dumps(channels) if channels is not None else None,
+                ),
+            )
+            self._sync()
+            self.appended.notify_all()
+            return int(cursor.lastrowid)  # type: ignore
+
+    def read(self, offset: int, limit: int = 10) -> list[dict]:
+        """
+        Returns the detections after an offset (oldest first), the
+        'image' key has the encoded image (bytes) or None, the 'channels'
+        key the names of the channels notifying it (None => all).
+
+        Args:
+            offset (int): The last handled detection id.
+            limit (int): The max detections returned.
+        """
+        with self.lock:
+            rows = self.db.execute(
+                "SELECT id, created, timestamp, camera, label, score, image,"
+                " channels"
+                " FROM detections WHERE id > ? ORDER BY id LIMIT ?",
+                (offset, limit),
+            ).fetchall()
+        return [
+            {
+                "id": row[0],
+                "created": row[1],
+                "timestamp": row[2],
+                "camera": row[3],
+                "label": row[4],
+                "score": row[5],
+                "image": row[6],
+                "channels": json.loads(row[7]) if row[7] is not None else None,
+            }
+            for row in rows
+        ]
+
+    def wait(self, offset: int, timeout: float) -> bool:
+        """
+        Waits until there are detections after the offset.
+
+        Returns:
+            bool: True if there are detections after the offset.
+        """
+        with self.lock:
+            return self.appended.wait_for(
+                lambda: self.closed or self._last_id() > offset, timeout
+            )
+
+    def get_offset(self, channel_name: str) -> int:
+        """
+        Returns the offset of a channel, a new channel starts at the end
+        of the log (older detections are not replayed to it).
+        """
+        with self.lock:
+            row = self.db.execute(
+                "SELECT last_id FROM offsets WHERE channel = ?", (channel_name,)
+            ).fetchone()
+            if row is not None:
+                return int(row[0])
+            offset = self._last_id()
+            self.db.execute(
+                "INSERT INTO offsets (channel, last_id) VALUES (?, ?)",
+                (channel_name, offset),
+            )
+            self._sync()
+            return offset
+
+    def commit_offset(self, channel_name: str, offset: int):
+        """
+        Commits the offset of a channel, the detections up to it were
+        handled (notified or skipped) and won't be replayed.
+        """
+        with self.lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO offsets (channel, last_id) VALUES (?, ?)",
+                (channel_name, offset),
+            )
+            self._sync()
+
+    def get_pending(self) -> dict:
+        """
+        Returns the detections pending per channel (after its offset).
+        """
+        with self.lock:
+            last_id = self._last_id()
+            rows = self.db.execute("SELECT channel, last_id FROM offsets").fetchall()
+            return {
+                channel: (
+                    self.db.execute(
+                        "SELECT COUNT(*) FROM detections WHERE id > ?", (offset,)
+                    ).fetchone()[0]
+                    if offset < last_id
+                    else 0
+                )
+                for channel, offset in rows
+            }
+
+    def flush(self):
+        """
+        Commits the pending writes if the sync interval elapsed and prunes
+        the old detections every PRUNE_INTERVAL (call it periodically).
+        """
+        with self.lock:
+            if monotonic() - self.last_prune >= self.PRUNE_INTERVAL:
+                self._prune()
+            self._sync()
+
+    def close(self):
+        """
+        Commits the pending writes and closes the database.
+        """
+        with self.lock:
+            if self.closed:
+                return
+            self.db.commit()
+            self.db.close()
+            self.closed = True
+            self.appended.notify_all()
+
+    def _sync(self, force: bool = False):
+        """
+        Commits (fsync) if the sync interval elapsed, lock held.
+        """
+        now = monotonic()
+        if force or now - self.last_commit >= self.sync_interval:
+            self.db.commit()
+            self.last_commit = now
+
+    def _last_id(self) -> int:
+        if self.closed:
+            return 0
+        # The last id ever appended (AUTOINCREMENT), even if pruned
+        row = self.db.execute(
+            "SELECT seq FROM sqlite_sequence WHERE name = 'detections'"
+        ).fetchone()
+        return int(row[0]) if row is not None else 0
+
+    def _prune(self):
+        """
+        Deletes the detections older than max_age and the oldest ones
+        beyond max_bytes of images, lock held.
+        """
+        self.last_prune = monotonic()
+        deleted = 0
+        if self.max_age > 0:
+            deleted += self.db.execute(
+                "DELETE FROM detections WHERE created < ?", (time() - self.max_age,)
+            ).rowcount
+        if self.max_bytes > 0:
+            total = self.db.execute(
+                "SELECT COALESCE(SUM(LENGTH(image)), 0) FROM detections"
+            ).fetchone()[0]
+            if total > self.max_bytes:
+                # Oldest first, until the newer ones fit in max_bytes
+                kept, cutoff = 0, None
+                for row_id, size in self.db.execute(
+                    "SELECT id, COALESCE(LENGTH(image), 0)"
+                    " FROM detections ORDER BY id DESC"
+                ):
+                    kept += size
+                    if kept > self.max_bytes:
+                        cutoff = row_id
+                        break
+                if cutoff is not None:
+                    deleted += self.db.execute(
+                        "DELETE FROM detections WHERE id <= ?", (cutoff,)
+                    ).rowcount
+        if deleted > 0:
+            self.logger.info("Pruned %i detections" % deleted)
+            self._sync(force=True)
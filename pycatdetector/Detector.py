@@ -1,15 +1,22 @@
-import os
 import logging
 import threading
 import traceback
 from typing import Optional
+import numpy as np
 from numpy import ndarray
-from queue import SimpleQueue
-from time import sleep
+from queue import Empty
+from time import monotonic
 from datetime import datetime
-from PIL import Image
 from .AbstractNeuralNet import AbstractNeuralNet
-from .Encoder import Encoder
+from .BoundedQueue import BoundedQueue
+from .ClipRecorder import ClipRecorder
+from .EncoderWorker import EncoderWorker
+from .FrameRegion import FrameRegion
+from .ImageArtifact import ImageArtifact
+from .Metrics import Metrics
+from .RateController import RateController
+from .Scheduler import Scheduler
+from .Tracker import Tracker
 
 
 class Detector(threading.Thread):
@@ -18,22 +25,39 @@ class Detector(threading.Thread):
     detection using a neural network reading from image queue.
 
     Args:
-        recorder (Recorder): The recorder object providing the image queue.
+        images (Scheduler): The scheduler serving the cameras image queues,
+                            frames or (frame, info) pairs (see process).
         screener_enabled (bool): Flag indicating if the screener is enabled.
         net (AbstractNeuralNet): The neural network object.
         notify_min_score (int): The minimum score for notifications.
-        encoder_folder (str): The folder path for encoding videos.
+        encoder (EncoderWorker): The videos encoder of the matching boxed
+                                 images, None to disable the videos.
+        batch_size (int): The maximum number of queued images analyzed
+                          together in one forward pass (1 = no batching).
+        batch_timeout (float): The maximum time in seconds to wait for
+                               a batch to fill once the first image arrived.
+        detections (BoundedQueue): The detections queue (to the notifier).
+        images_boxed (BoundedQueue): The boxed images queue (to the screener).
+        clips (ClipRecorder): The event clips recorder, triggered on matches.
+        rate (RateController): The cameras sampling rate controller, fed
+                               with the analysis times and the matches.
     """
 
-    SLEEP_TIME_MIN = 0.05  # seconds, avoid CPU overload
+    QUEUE_TIMEOUT = 1  # seconds, max wait for images, honor stop signals
 
     def __init__(
         self,
-        images: SimpleQueue,
+        images: Scheduler,
         screener_enabled: bool,
         net: AbstractNeuralNet,
         notify_min_score: float,
-        encoder_folder: str,
+        encoder: Optional[EncoderWorker],
+        batch_size: int = 1,
+        batch_timeout: float = 0,
+        detections: Optional[BoundedQueue] = None,
+        images_boxed: Optional[BoundedQueue] = None,
+        clips: Optional[ClipRecorder] = None,
+        rate: Optional[RateController] = None,
     ):
         threading.Thread.__init__(self)
         self.logger = logging.getLogger(__name__)
@@ -41,13 +65,45 @@ class Detector(threading.Thread):
         self.net = net
         self.notify_min_score = notify_min_score
         self.screener_enabled = screener_enabled
-        self.images_boxed = SimpleQueue()
+        if images_boxed is None:
+            images_boxed = BoundedQueue(2, BoundedQueue.DROP_OLDEST, "screener")
+        self.images_boxed = images_boxed
         self.labels = []
-        self.detections = SimpleQueue()
-        self.encoder_folder = encoder_folder
-        self.video_path = ""
-        self.sleep_time = 10  # seconds, start with worst case
+        self.class_ids = self.net.get_class_ids(self.labels)
+        if detections is None:
+            detections = BoundedQueue(100, BoundedQueue.DROP_OLDEST, "detections")
+        self.detections = detections
+        self.encoder = encoder
+        self.regions = {}  # indexed per camera id, default full frame
+        self.trackers = {}  # indexed per camera id, default not tracking
+        self.clips = clips
+        self.rate = rate
+        self.batch_size = max(1, batch_size)
+        self.batch_timeout = max(0, batch_timeout)
+        self.frames_analyzed = 0
+        self.frames_failed = 0  # analysis or processing errors
         self.must_stop = False
+        self.metrics = Metrics.get_default()
+        self.metrics.describe(
+            "inference_seconds", Metrics.HISTOGRAM, "Neural net batch analysis time"
+        )
+        self.metrics.describe(
+            "inference_frames_total", Metrics.COUNTER, "Frames analyzed"
+        )
+        self.metrics.describe(
+            "inference_errors_total", Metrics.COUNTER, "Failed batch analyses"
+        )
+        self.metrics.describe(
+            "process_errors_total", Metrics.COUNTER, "Failed frame result processing"
+        )
+        self.metrics.describe(
+            "detections_total", Metrics.COUNTER, "Matches sent to the notifier"
+        )
+        self.metrics.describe(
+            "matches_tracked_total", Metrics.COUNTER, "Matches of an existing track"
+        )
+        self.metrics.describe("tracks_started_total", Metrics.COUNTER, "Tracks started")
+        self.metrics.describe("tracks_ended_total", Metrics.COUNTER, "Tracks ended")
 
     def disable_screener(self):
         """
@@ -56,7 +112,7 @@ class Detector(threading.Thread):
         self.screener_enabled = False
 
         if self.images_boxed is not None:
-            self.images_boxed.empty()
+            self.images_boxed.clear()
             self.logger.info(
                 "Screener disabled. Queue: %i." % self.images_boxed.qsize()
             )
@@ -66,16 +122,16 @@ class Detector(threading.Thread):
         Get the detections queue, used by the notifier.
 
         Returns:
-            SimpleQueue: The detections queue.
+            BoundedQueue: The detections queue.
         """
         return self.detections
 
-    def get_images(self) -> SimpleQueue:
+    def get_images(self) -> BoundedQueue:
         """
-        Get the images queue coming from the recorder.
+        Get the boxed images queue, used by the screener.
 
         Returns:
-            SimpleQueue: The images queue.
+            BoundedQueue: The boxed images queue.
         """
         return self.images_boxed
 
@@ -87,26 +143,81 @@ class Detector(threading.Thread):
             labels (list): The list of labels.
         """
         self.labels = labels
+        self.class_ids = self.net.get_class_ids(labels)
 
-    def get_video_path(self) -> str:
+    def set_region(self, camera_id: str, region: FrameRegion):
         """
-        Get the video path.
+        Set the region of interest analyzed in the frames of a camera.
+
+        Args:
+            camera_id (str): The camera id.
+            region (FrameRegion): The region (crop and inference size).
+        """
+        self.regions[camera_id] = region
+
+    def get_region(self, camera_id: str) -> FrameRegion:
+        """
+        Get the region of interest of a camera (full frame by default).
+
+        Args:
+            camera_id (str): The camera id.
 
         Returns:
-            str: The video path.
+            FrameRegion: The camera region.
         """
-        return self.video_path
+        if camera_id not in self.regions:
+            self.regions[camera_id] = FrameRegion()
+        return self.regions[camera_id]
 
-    def set_video_path(self):
+    def set_tracker(self, camera_id: str, tracker: Optional[Tracker]):
         """
-        Set the video path.
+        Set the tracker of the matches of a camera, only the match starting
+        a track is sent to the notifier (None to send every match).
+
+        Args:
+            camera_id (str): The camera id.
+            tracker (Tracker): The tracker.
+        """
+        if tracker is None:
+            self.trackers.pop(camera_id, None)
+        else:
+            self.trackers[camera_id] = tracker
+
+    def get_tracker(self, camera_id: str) -> Optional[Tracker]:
+        """
+        Get the tracker of a camera, None if not tracking.
+        """
+        return self.trackers.get(camera_id)
+
+    def warm_up(self, width: int, height: int, runs: int = 2) -> float:
         """
-        if not os.path.exists(self.encoder_folder):
-            self.logger.info("Creating folder: " + self.encoder_folder)
-            os.makedirs(self.encoder_folder)
-        video_name = "output-" + datetime.now().strftime("%Y-%m-%d_%H-%M-%S") + ".avi"
+        Analyzes blank frames through the cameras regions (the inference
+        input sizes) before the recorders start, the first analyses pay
+        one-off costs (allocations, kernels selection, weights paging).
 
-        self.video_path = os.path.join(self.encoder_folder, video_name)
+        Args:
+            width (int): The frames width (e.g. the cameras resolution).
+            height (int): The frames height.
+            runs (int): The batches analyzed per inference input size.
+
+        Returns:
+            float: The warm-up time in seconds.
+        """
+        begin = monotonic()
+        frame = np.zeros((height, width, 3), dtype=np.uint8)
+        regions = list(self.regions.values()) or [FrameRegion()]
+        images = {}  # indexed per shape, one warm-up per inference size
+        for region in regions:
+            image = region.crop(frame)
+            images[image.shape] = image
+        for image in images.values():
+            for _ in range(runs):
+                self.net.analyze_batch([image] * self.batch_size)
+        seconds = monotonic() - begin
+        self.logger.info(
+            "Warm-up: %.3fs, Sizes: %r" % (seconds, [s[:2] for s in images])
+        )
+        return seconds
 
     def stop(self):
         """
@@ -116,112 +227,206 @@ class Detector(threading.Thread):
             self.logger.info("Stopping...")
 
             self.must_stop = True
+            self.detections.close()  # release if blocked on a full queue
+            self.images_boxed.close()
         else:
             self.logger.info("Already stopped")
 
-    def run(self):
-        """
-        Run the detector thread.
+    def get_batch(self) -> list[tuple[str, ndarray]]:
         """
-        self.logger.info("Starting with Thread ID: %s" % threading.get_native_id())
-        self.logger.info("Minimum Score: " + str(self.notify_min_score))
+        Drains up to batch_size images from the images queue, waiting at
+        most QUEUE_TIMEOUT seconds for the first image and then at most
+        batch_timeout seconds for the batch to fill.
 
-        encoder = None
-        if len(self.encoder_folder) > 0:
-            self.logger.info("Encoder folder: " + self.encoder_folder)
-            self.set_video_path()
-            self.logger.info("Encoding video to: " + self.video_path)
-            encoder = Encoder(self.video_path)
+        Returns:
+            list[tuple]: The camera id and image pairs (at least one).
 
-        while not self.must_stop:
-            if not self.images.empty():
-                image_raw: ndarray = self.images.get(False)
+        Raises:
+            Empty: If no image arrived within QUEUE_TIMEOUT.
+        """
+        batch = [self.images.get(timeout=self.QUEUE_TIMEOUT)]
+        deadline = monotonic() + self.batch_timeout
+        while len(batch) < self.batch_size:
+            timeout = deadline - monotonic()
+            try:
+                if timeout > 0:
+                    batch.append(self.images.get(timeout=timeout))
+                else:
+                    batch.append(self.images.get(False))
+            except Empty:
+                break
+        return batch
 
-                try:
-                    analyze_begin = datetime.now()
-                    result = self.net.analyze(image_raw)
-                    analyze_end = datetime.now()
-                except:  # noqa -- flake8 skip
-                    self.logger.error(traceback.format_exc())
-                    continue
+    def process(self, camera_id: str, result: dict, info: Optional[dict] = None):
+        """
+        Processes the analysis result of a single image, pushing the
+        boxed image to the screener, the matches to notifier (only the new
+        tracks if tracking) and their boxed image to the encoder.
 
-                analyze_duration = analyze_end - analyze_begin
-                analyze_duration = analyze_duration.total_seconds()
-                if analyze_duration < self.SLEEP_TIME_MIN:
-                    # Avoid CPU overload on next cycle
-                    self.sleep_time = self.SLEEP_TIME_MIN
-                else:
-                    if analyze_duration > self.sleep_time:
-                        # Keep worst case for one more cycle
-                        self.sleep_time = analyze_duration
-                    else:
-                        # Reduce based on average on next sleep
-                        self.sleep_time = (analyze_duration + self.sleep_time) / 2
-
-                images_queued = self.images.qsize()
-                self.logger.debug(
-                    "Analisis: %.3fs, Shape: %s, Queue: %i"
-                    % (analyze_duration, str(image_raw.shape), images_queued)
+        Args:
+            camera_id (str): The id of the camera which took the image.
+            result (dict): The analysis result of the neural network.
+            info (dict): The image info queued with it (e.g. the 'source'
+                         file and 'position'), added to the detections.
+        """
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(
+                "Scores: %s" % repr(self.net.get_detections(result).to_dicts())
+            )
+
+        # Vectorized score and label filtering (the precomputed class ids)
+        matches = self.net.get_detections(
+            result, self.notify_min_score, self.class_ids
+        ).to_dicts()
+        self.logger.debug("Matches >%.2f: %r", self.notify_min_score, matches)
+
+        # Lazy, the boxes are drawn only if a consumer needs the pixels
+        image_boxed = self.net.render(result)
+        if self.screener_enabled:
+            self.images_boxed.put(image_boxed)
+
+        # detection: dict
+        # 'camera': The id of the camera which took the image.
+        # 'image': The boxed image (BoxedImage), drawn on first use.
+        # 'artifact': The image encodings (ImageArtifact), shared by the
+        #             detections of the same image (encoded once).
+        # 'label': The detected object's class label (e.g., "cat").
+        # 'score': The confidence score for the detection (e.g., 0.92).
+        # 'box': The bounding box coordinates (e.g., [x1, y1, x2, y2]).
+        # 'timestamp': The time (e.g., "2023-10-01T12:00:00Z").
+        # 'track_id': The track id (if tracking), the same object in the
+        #             following frames has the same id.
+        # 'source', 'frame', 'position': The file, frame index and video
+        #                                time (offline analysis only).
+
+        artifact = ImageArtifact(image_boxed)
+
+        tracker = self.trackers.get(camera_id)
+        if tracker is not None:
+            started, ended = tracker.update(matches)
+            for track in started:
+                self.metrics.inc(
+                    "tracks_started_total", camera=camera_id, label=track["label"]
+                )
+            for track in ended:
+                self.metrics.inc(
+                    "tracks_ended_total", camera=camera_id, label=track["label"]
+                )
+                self.logger.info(
+                    "Track ended: %r"
+                    % {
+                        "camera": camera_id,
+                        "track": track["id"],
+                        "label": track["label"],
+                        "duration": round(track["last_seen"] - track["begin"], 1),
+                    }
                 )
 
-                all_scored_labels = self.net.get_scored_labels(result=result)
+        if self.rate is not None and (
+            len(matches) > 0 or (tracker is not None and len(tracker.get_tracks()) > 0)
+        ):
+            self.rate.set_active(camera_id)  # objects seen (or still tracked)
 
-                min_scored_labels = self.net.get_scored_labels(
-                    result=result, min_score=self.notify_min_score
-                )
+        for detection in matches:
+            if self.clips is not None:
+                self.clips.trigger(camera_id)  # extended while matching
 
-                self.logger.debug("Scores: %s" % repr(all_scored_labels))
-                self.logger.debug(
-                    "Scores >%.2f): %s"
-                    % (self.notify_min_score, repr(min_scored_labels))
+            if not detection.get("track_new", True):
+                self.metrics.inc(
+                    "matches_tracked_total", camera=camera_id, label=detection["label"]
                 )
+                self.logger.debug("Tracked: " + repr(detection))
+                continue
+
+            detection["camera"] = camera_id
+            detection["image"] = image_boxed
+            detection["artifact"] = artifact
+            detection["timestamp"] = str(datetime.now().astimezone().isoformat())
+            if info is not None:
+                detection.update(info)
+
+            self.detections.put(detection)
+            self.metrics.inc(
+                "detections_total", camera=camera_id, label=detection["label"]
+            )
 
-                image_boxed: Optional[Image.Image] = None
-                if self.screener_enabled or encoder:
-                    image_boxed = self.net.plot(result)
-                    if self.screener_enabled:
-                        self.images_boxed.put(image_boxed)
-
-                # detection: dict
-                # 'image': The original image data (e.g., numpy array).
-                # 'label': The detected object's class label (e.g., "cat").
-                # 'score': The confidence score for the detection (e.g., 0.92).
-                # 'box': The bounding box coordinates (e.g., [x1, y1, x2, y2]).
-                # 'timestamp': The time (e.g., "2023-10-01T12:00:00Z").
-
-                for detection in min_scored_labels:
-
-                    if detection["label"] not in self.labels:
-                        self.logger.debug("Ignored: " + repr(detection))
-                        continue
-
-                    detection["image"] = image_boxed
-                    detection["timestamp"] = str(
-                        datetime.now().astimezone().isoformat()
-                    )
-
-                    self.detections.put(detection)
-
-                    self.logger.info(
-                        "Match: "
-                        + repr(
-                            {"label": detection["label"], "score": detection["score"]}
-                        )
-                    )
-
-                    if encoder and image_boxed is not None:
-                        self.logger.debug("Adding +1 frame to: %s", self.video_path)
-                        encoder.add_image(image_boxed)
-
-                self.logger.debug(
-                    "Sleeping %.3fs due to empty queue..." % self.sleep_time
+            self.logger.info(
+                "Match: "
+                + repr(
+                    {
+                        "camera": camera_id,
+                        "label": detection["label"],
+                        "score": detection["score"],
+                        "track": detection.get("track_id"),
+                    }
                 )
+            )
 
-                # Better sleep than not answering termination signals
-                sleep(self.sleep_time)
+        if len(matches) > 0 and self.encoder is not None:
+            # Queued (one frame per image), encoded off the inference thread
+            self.encoder.add_image(camera_id, image_boxed)
 
-        if encoder:
-            self.logger.info("Closing video at: " + self.video_path)
-            encoder.close()
+    def run(self):
+        """
+        Run the detector thread.
+        """
+        self.logger.info("Starting with Thread ID: %s" % threading.get_native_id())
+        self.logger.info("Minimum Score: " + str(self.notify_min_score))
+        self.logger.info(
+            "Batch Size: %i, Timeout: %.3fs" % (self.batch_size, self.batch_timeout)
+        )
+
+        while not self.must_stop:
+            try:
+                batch = self.get_batch()
+            except Empty:
+                continue  # idle, check stop signal
+
+            # Queued items are frames or (frame, info) pairs (see FileReader)
+            batch = [
+                (camera_id, *(item if isinstance(item, tuple) else (item, None)))
+                for camera_id, item in batch
+            ]
+            images_raw = [
+                self.get_region(camera_id).crop(image) for camera_id, image, _ in batch
+            ]
+
+            try:
+                analyze_begin = datetime.now()
+                results = self.net.analyze_batch(images_raw)
+                analyze_end = datetime.now()
+            except:  # noqa -- flake8 skip
+                self.logger.error(traceback.format_exc())
+                self.metrics.inc("inference_errors_total")
+                self.frames_failed += len(batch)
+                continue
+
+            analyze_duration = analyze_end - analyze_begin
+            analyze_duration = analyze_duration.total_seconds()
+            self.metrics.observe("inference_seconds", analyze_duration)
+            self.metrics.inc("inference_frames_total", len(images_raw))
+            if self.rate is not None:
+                self.rate.update(analyze_duration, len(batch), self.images.qsize())
+
+            self.logger.debug(
+                "Analisis: %.3fs, Batch: %i, Shape: %s, Queue: %i"
+                % (
+                    analyze_duration,
+                    len(images_raw),
+                    str(images_raw[0].shape),
+                    self.images.qsize(),
+                )
+            )
+
+            for (camera_id, image, info), result in zip(batch, results):
+                try:
+                    result = self.get_region(camera_id).map_result(result, image)
+                    self.process(camera_id, result, info)
+                except:  # noqa -- flake8 skip
+                    self.logger.error(traceback.format_exc())
+                    self.metrics.inc("process_errors_total")
+                    self.frames_failed += 1
+                    continue
+                self.frames_analyzed += 1
 
         self.logger.info("Stopped.")
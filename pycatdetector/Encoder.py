@@ -43,13 +43,15 @@ class Encoder:
         Adds an image to the video file.
 
         Args:
-        - image: The image to be added.
+        - image: The image to be added, a PIL Image (RGB) or a numpy
+                 array (BGR, as read by OpenCV).
 
         Raises:
         - ValueError: If the image is not a valid PIL Image or numpy array.
         """
         if isinstance(image, PIL.Image.Image):
-            frame = np.array(image)
+            # PIL images are RGB, OpenCV writes BGR frames
+            frame = cv2.cvtColor(np.asarray(image.convert("RGB")), cv2.COLOR_RGB2BGR)
         elif isinstance(image, np.ndarray):
             frame = image
         else:
@@ -0,0 +1,164 @@
+import os
+import logging
+import threading
+import traceback
+from datetime import datetime
+from queue import Empty
+from time import monotonic
+from typing import Optional
+from PIL import Image
+from numpy import ndarray
+from .BoundedQueue import BoundedQueue
+from .BoxedImage import BoxedImage
+from .Encoder import Encoder
+from .Metrics import Metrics
+
+
+class EncoderWorker(threading.Thread):
+    """
+    The EncoderWorker class represents a thread encoding the boxed images
+    of the matches into one video per camera (and run), fed by the
+    Detector through a bounded queue, so a slow disk never stalls the
+    inference. When the queue is full the overflow policy applies (by
+    default the oldest queued image is dropped).
+
+    Args:
+        folder (str): The videos folder.
+        images (BoundedQueue): The (camera id, image) pairs to encode, the
+                               lazy boxed images are drawn by the worker.
+    """
+
+    QUEUE_SIZE = 30  # default max images waiting to be encoded
+    QUEUE_TIMEOUT = 1  # seconds, max wait for images between stop checks
+
+    def __init__(self, folder: str, images: Optional[BoundedQueue] = None):
+        threading.Thread.__init__(self, name="EncoderWorker")
+        self.logger = logging.getLogger(__name__)
+        self.folder = folder
+        if images is None:
+            images = BoundedQueue(self.QUEUE_SIZE, BoundedQueue.DROP_OLDEST, "encoder")
+        self.images = images
+        self.video_paths = {}  # indexed per camera id
+        self.encoders = {}  # indexed per camera id
+        self.must_stop = False
+        self.metrics = Metrics.get_default()
+        self.metrics.describe(
+            "encoder_write_seconds", Metrics.HISTOGRAM, "Video frame write time"
+        )
+        self.metrics.describe(
+            "encoder_frames_total", Metrics.COUNTER, "Frames written to videos"
+        )
+        self.metrics.describe(
+            "encoder_errors_total", Metrics.COUNTER, "Failed video frame writes"
+        )
+
+    def get_images(self) -> BoundedQueue:
+        """
+        Get the images queue, used by the detector.
+
+        Returns:
+            BoundedQueue: The (camera id, image) pairs queue.
+        """
+        return self.images
+
+    def add_image(
+        self, camera_id: str, image: Image.Image | ndarray | BoxedImage
+    ) -> bool:
+        """
+        Queues an image of a camera to be encoded (non blocking unless
+        the queue policy is block).
+
+        Returns:
+            bool: True if queued, False if dropped.
+        """
+        return self.images.put((camera_id, image))
+
+    def get_video_path(self, camera_id: str) -> str:
+        """
+        Get the video path of a camera.
+
+        Args:
+            camera_id (str): The camera id.
+
+        Returns:
+            str: The video path (empty if nothing encoded yet).
+        """
+        return self.video_paths.get(camera_id, "")
+
+    def set_video_path(self, camera_id: str):
+        """
+        Set the video path of a camera.
+
+        Args:
+            camera_id (str): The camera id.
+        """
+        if not os.path.exists(self.folder):
+            self.logger.info("Creating folder: " + self.folder)
+            os.makedirs(self.folder)
+        video_name = (
+            "output-"
+            + camera_id
+            + "-"
+            + datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+            + ".avi"
+        )
+
+        self.video_paths[camera_id] = os.path.join(self.folder, video_name)
+
+    def get_encoder(self, camera_id: str) -> Encoder:
+        """
+        Get (or create on first use) the video encoder of a camera.
+
+        Args:
+            camera_id (str): The camera id.
+
+        Returns:
+            Encoder: The camera encoder.
+        """
+        if camera_id not in self.encoders:
+            self.set_video_path(camera_id)
+            self.logger.info("Encoding video to: " + self.video_paths[camera_id])
+            self.encoders[camera_id] = Encoder(self.video_paths[camera_id])
+        return self.encoders[camera_id]
+
+    def write(self, camera_id: str, image: Image.Image | ndarray | BoxedImage):
+        """
+        Writes an image to the video of its camera.
+        """
+        write_begin = monotonic()
+        try:
+            if isinstance(image, BoxedImage):
+                image = image.get_array()  # drawn here, off the inference thread
+            self.get_encoder(camera_id).add_image(image)
+        except:  # noqa -- flake8 skip
+            self.logger.error(traceback.format_exc())
+            self.metrics.inc("encoder_errors_total", camera=camera_id)
+            return
+        self.metrics.observe("encoder_write_seconds", monotonic() - write_begin)
+        self.metrics.inc("encoder_frames_total", camera=camera_id)
+
+    def run(self):
+        self.logger.info("Starting with Thread ID: %s" % threading.get_native_id())
+        self.logger.info("Encoder folder: " + self.folder)
+        while not self.must_stop:
+            try:
+                camera_id, image = self.images.get(timeout=self.QUEUE_TIMEOUT)
+            except Empty:
+                continue  # idle, check stop signal
+            self.write(camera_id, image)
+
+        while not self.images.empty():  # the images queued before stopping
+            camera_id, image = self.images.get(False)
+            self.write(camera_id, image)
+        for camera_id, encoder in self.encoders.items():
+            self.logger.info("Closing video at: " + self.video_paths[camera_id])
+            encoder.close()
+        self.logger.info("Stopped.")
+
+    def stop(self):
+        if not self.must_stop:
+            self.logger.info("Stopping...")
+            self.must_stop = True
+            self.images.close()
+        else:
+            self.logger.info("Already stopped.")
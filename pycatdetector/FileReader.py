@@ -0,0 +1,155 @@
+import os
+import cv2
+import logging
+import threading
+from typing import Optional
+from .BoundedQueue import BoundedQueue
+
+
+class FileReader(threading.Thread):
+    """
+    The FileReader class represents a thread that decodes the frames of
+    recorded sources (video files or folders of images) into the images
+    queue, as fast as the consumer allows (a block policy queue gives
+    backpressure instead of dropping frames), the offline counterpart of
+    the Recorder (see Analyzer).
+
+    Each queued item is a (frame, info) pair, info is a dict with the
+    'source' path, the 'frame' index and the 'position' in seconds (video
+    time, 0 for images), see Detector.
+
+    Args:
+        sources (list): The video files and image folders, read in order.
+        reader_id (str): The reader unique identifier (Scheduler camera id).
+        images (BoundedQueue): The images queue.
+        sample_hz (float): The video frames per second read (the others
+                           are grabbed but not decoded), 0 for all frames.
+    """
+
+    VIDEO_EXTENSIONS = (".avi", ".mkv", ".mov", ".mp4", ".mpg", ".ts", ".webm")
+    IMAGE_EXTENSIONS = (".bmp", ".jpeg", ".jpg", ".png", ".tif", ".tiff", ".webp")
+    QUEUE_SIZE = 16  # default images queue size (frames)
+
+    def __init__(
+        self,
+        sources: list[str],
+        reader_id: str = "reader",
+        images: Optional[BoundedQueue] = None,
+        sample_hz: float = 0,
+    ):
+        threading.Thread.__init__(self, name="FileReader-" + reader_id)
+        self.logger = logging.getLogger(__name__)
+        self.sources = sources
+        self.reader_id = reader_id
+        if images is None:
+            images = BoundedQueue(self.QUEUE_SIZE, BoundedQueue.BLOCK, "images")
+        self.images = images
+        if sample_hz < 0:
+            raise ValueError("Invalid sample_hz %r for %r" % (sample_hz, reader_id))
+        self.sample_hz = sample_hz
+        self.frames_read = 0
+        self.done = False  # all the sources were read (or stopped)
+        self.must_stop = False
+
+    @classmethod
+    def list_sources(cls, paths: list[str]) -> list[str]:
+        """
+        Returns the sources of paths: a video file is a source, a folder
+        is a source if it has images and each of its videos is a source.
+
+        Raises:
+            FileNotFoundError: If a path doesn't exist.
+        """
+        sources = []
+        for path in paths:
+            if not os.path.exists(path):
+                raise FileNotFoundError("Path not found: " + path)
+            if not os.path.isdir(path):
+                sources.append(path)
+                continue
+            names = sorted(os.listdir(path))
+            if any(name.lower().endswith(cls.IMAGE_EXTENSIONS) for name in names):
+                sources.append(path)
+            sources += [
+                os.path.join(path, name)
+                for name in names
+                if name.lower().endswith(cls.VIDEO_EXTENSIONS)
+            ]
+        return sources
+
+    def get_images(self) -> BoundedQueue:
+        return self.images
+
+    def run(self):
+        self.logger.info("Starting with Thread ID: %s" % threading.get_native_id())
+        for source in self.sources:
+            if self.must_stop:
+                break
+            self.logger.info("Reading: %s" % source)
+            if os.path.isdir(source):
+                self.read_folder(source)
+            else:
+                self.read_video(source)
+        self.done = True
+        self.logger.info("Stopped, %i frames read." % self.frames_read)
+
+    def stop(self):
+        if not self.must_stop:
+            self.logger.info("Stopping...")
+            self.must_stop = True
+            self.images.close()  # release if blocked on a full queue
+        else:
+            self.logger.info("Already stopped.")
+
+    def read_folder(self, folder: str):
+        """
+        Queues the images of a folder (sorted by name).
+        """
+        names = sorted(
+            name
+            for name in os.listdir(folder)
+            if name.lower().endswith(self.IMAGE_EXTENSIONS)
+        )
+        for index, name in enumerate(names):
+            if self.must_stop:
+                return
+            path = os.path.join(folder, name)
+            frame = cv2.imread(path, cv2.IMREAD_COLOR)
+            if frame is None:
+                self.logger.warning("Unreadable image: %s" % path)
+                continue
+            self.put(frame, {"source": path, "frame": index, "position": 0.0})
+
+    def read_video(self, path: str):
+        """
+        Queues the frames of a video file (sampled at sample_hz).
+        """
+        capture = cv2.VideoCapture(path)
+        if not capture.isOpened():
+            self.logger.warning("Unreadable video: %s" % path)
+            return
+        fps = capture.get(cv2.CAP_PROP_FPS) or 0
+        step = 1
+        if self.sample_hz > 0 and fps > 0:
+            step = max(1, round(fps / self.sample_hz))
+        index = 0
+        try:
+            while not self.must_stop:
+                if index % step != 0:
+                    if not capture.grab():  # skipped, not decoded
+                        break
+                    index += 1
+                    continue
+                ok, frame = capture.read()
+                if not ok:
+                    break
+                position = index / fps if fps > 0 else 0.0
+                info = {"source": path, "frame": index, "position": round(position, 3)}
+                self.put(frame, info)
+                index += 1
+        finally:
+            capture.release()
+
+    def put(self, frame, info: dict):
+        if self.images.put((frame, info)):
+            self.frames_read += 1
@@ -0,0 +1,125 @@
+import cv2
+import numpy as np
+import torch
+from typing import Optional
+
+
+class FrameRegion:
+    """
+    The FrameRegion class represents the region of interest of a camera,
+    frames are cropped to it (and optionally downscaled) before inference
+    and the detected boxes are mapped back to the full frame coordinates,
+    so plotting and encoding still show the full frame.
+
+    The region is a rectangle [x, y, width, height] or a polygon
+    [[x, y], ...] (cropped to its bounding rectangle, the pixels outside
+    the polygon are blacked out), as ratios (0..1) of the frame size.
+
+    Args:
+        roi (list): The region of interest, None for the full frame.
+        max_size (int): The max width and height in pixels of the analyzed
+                        image (keeping the aspect ratio), None or 0 for no
+                        downscaling.
+
+    Raises:
+        ValueError: If an invalid roi or max_size is provided.
+    """
+
+    def __init__(self, roi: Optional[list] = None, max_size: Optional[int] = None):
+        self.polygon = None
+        if roi is None:
+            self.rect = (0.0, 0.0, 1.0, 1.0)
+        elif len(roi) == 4 and all(isinstance(v, (int, float)) for v in roi):
+            self.rect = tuple(float(v) for v in roi)
+        elif len(roi) >= 3 and all(len(point) == 2 for point in roi):
+            self.polygon = np.array(roi, dtype=np.float64)
+            x0, y0 = self.polygon.min(axis=0)
+            x1, y1 = self.polygon.max(axis=0)
+            self.rect = (x0, y0, x1 - x0, y1 - y0)
+        else:
+            raise ValueError("Invalid roi %r" % roi)
+        x, y, w, h = self.rect
+        if not (0 <= x < 1 and 0 <= y < 1 and 0 < w <= 1 - x and 0 < h <= 1 - y):
+            raise ValueError("Invalid roi %r, out of the frame" % roi)
+        if max_size is not None and max_size < 0:
+            raise ValueError("Invalid max_size %r" % max_size)
+        self.max_size = max_size or None
+        self.shape = None  # frame shape of the cached geometry
+        self.box = (0, 0, 0, 0)  # crop rectangle in pixels (x0, y0, x1, y1)
+        self.scale = 1.0  # analyzed image size / crop size
+        self.mask = None  # polygon mask of the crop
+
+    def is_full_frame(self) -> bool:
+        """
+        Returns whether frames are analyzed as they are (no crop or resize).
+        """
+        return self.rect == (0.0, 0.0, 1.0, 1.0) and self.max_size is None
+
+    def _fit(self, shape: tuple):
+        """
+        Computes the crop rectangle, scale and mask of a frame shape,
+        cached until the frame shape changes (e.g. camera reconnection).
+        """
+        if shape == self.shape:
+            return
+        height, width = shape[:2]
+        x, y, w, h = self.rect
+        x0, y0 = int(x * width), int(y * height)
+        x1 = min(width, max(x0 + 1, round((x + w) * width)))
+        y1 = min(height, max(y0 + 1, round((y + h) * height)))
+        self.box = (x0, y0, x1, y1)
+        crop_w, crop_h = self.box[2] - x0, self.box[3] - y0
+        self.scale = 1.0
+        if self.max_size is not None and max(crop_w, crop_h) > self.max_size:
+            self.scale = self.max_size / max(crop_w, crop_h)
+        self.mask = None
+        if self.polygon is not None:
+            points = self.polygon * [width, height] - [x0, y0]
+            self.mask = np.zeros((crop_h, crop_w), dtype=np.uint8)
+            cv2.fillPoly(self.mask, [np.round(points).astype(np.int32)], 255)
+        self.shape = shape
+
+    def crop(self, frame: np.ndarray) -> np.ndarray:
+        """
+        Returns the region of interest of the frame, downscaled to max_size.
+
+        Args:
+            frame (numpy.ndarray): The OpenCV BGR frame.
+
+        Returns:
+            numpy.ndarray: The image to analyze (the frame if full frame).
+        """
+        if self.is_full_frame():
+            return frame
+        self._fit(frame.shape)
+        x0, y0, x1, y1 = self.box
+        image = frame[y0:y1, x0:x1]
+        if self.mask is not None:
+            image = cv2.bitwise_and(image, image, mask=self.mask)
+        if self.scale < 1:
+            size = (
+                max(1, round((x1 - x0) * self.scale)),
+                max(1, round((y1 - y0) * self.scale)),
+            )
+            image = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+        return np.ascontiguousarray(image)
+
+    def map_result(self, result: dict, frame: np.ndarray) -> dict:
+        """
+        Maps an analysis result of a cropped image back to the frame, the
+        boxes are moved to the frame coordinates and the image is the frame.
+
+        Args:
+            result (dict): The analysis result of the crop(frame) image.
+            frame (numpy.ndarray): The OpenCV BGR frame.
+
+        Returns:
+            dict: The analysis result of the frame (updated in place).
+        """
+        if self.is_full_frame():
+            return result
+        x0, y0 = self.box[:2]
+        offset = torch.tensor([x0, y0, x0, y0], dtype=result["boxes"].dtype)
+        result["boxes"] = result["boxes"] / self.scale + offset
+        result["image"] = torch.from_numpy(frame).permute(2, 0, 1)  # BGR CxHxW
+        return result
@@ -0,0 +1,73 @@
+import io
+import threading
+from typing import Optional, Union
+from PIL import Image
+from .BoxedImage import BoxedImage
+
+
+class ImageArtifact:
+    """
+    The ImageArtifact class represents the encoded versions (JPEG) of a
+    detection image shared by all the channels notified for it, each size
+    and quality is encoded lazily once (on first use, e.g. by the first
+    channel worker needing it) and cached.
+
+    Args:
+        image (PIL.Image.Image or BoxedImage): The detection (boxed) image,
+                                               drawn on first encode if
+                                               lazy, None if only the
+                                               encoded one is known (see
+                                               from_data).
+    """
+
+    FORMAT = "JPEG"
+    QUALITY = 75  # PIL default JPEG quality
+
+    def __init__(self, image: Optional[Union[Image.Image, BoxedImage]]):
+        self.image = image
+        self.lock = threading.Lock()
+        self.encoded = {}  # indexed per (max_size, quality)
+
+    @classmethod
+    def from_data(cls, data: bytes) -> "ImageArtifact":
+        """
+        Returns an artifact of an already encoded (full size, default
+        quality) image, e.g. replayed from the DetectionLog, only decoded
+        if another size or quality is requested.
+        """
+        artifact = cls(None)
+        artifact.encoded[(None, cls.QUALITY)] = data
+        return artifact
+
+    def get_extension(self) -> str:
+        return self.FORMAT.lower()
+
+    def get_data(self, max_size: Optional[int] = None, quality: int = QUALITY) -> bytes:
+        """
+        Returns the image encoded, downscaled to fit max_size if larger.
+
+        Args:
+            max_size (int): The max width and height in pixels (keeping the
+                            aspect ratio), None or 0 for the full size.
+            quality (int): The JPEG quality (1-95).
+
+        Returns:
+            bytes: The encoded image.
+        """
+        key = (max_size or None, quality)
+        with self.lock:  # several channel workers may ask at the same time
+            if key not in self.encoded:
+                if self.image is None:
+                    self.image = Image.open(
+                        io.BytesIO(self.encoded[(None, self.QUALITY)])
+                    )
+                if isinstance(self.image, BoxedImage):
+                    self.image = self.image.get_image()
+                image = self.image
+                if key[0] is not None and max(image.size) > key[0]:
+                    image = image.copy()
+                    image.thumbnail((key[0], key[0]))
+                buffer = io.BytesIO()
+                image.save(fp=buffer, format=self.FORMAT, quality=quality)
+                self.encoded[key] = buffer.getvalue()
+            return self.encoded[key]
@@ -0,0 +1,34 @@
+import types
+import importlib
+
+
+class LazyPackage(types.ModuleType):
+    """
+    The LazyPackage class is the module type of the packages exporting one
+    class per module (named after it, e.g. pycatdetector.Detector), the
+    classes of __all__ are imported on first use (PEP 562), importing the
+    package (e.g. the configuration check or a single channel) doesn't
+    load the heavy dependencies (torch, cv2, matplotlib, requests) of the
+    classes not used.
+
+    Usage, at the end of the package __init__.py (after __all__):
+        sys.modules[__name__].__class__ = LazyPackage
+    """
+
+    def __getattr__(self, name: str):
+        if name in self.__all__:
+            module = importlib.import_module("." + name, self.__name__)
+            value = getattr(module, name)
+            super().__setattr__(name, value)  # cached, next lookups are free
+            return value
+        raise AttributeError("module %r has no attribute %r" % (self.__name__, name))
+
+    def __setattr__(self, name: str, value):
+        # The import system binds every imported submodule to its package,
+        # the class keeps the name instead (as the eager imports did)
+        if name in self.__all__ and isinstance(value, types.ModuleType):
+            return
+        super().__setattr__(name, value)
+
+    def __dir__(self) -> list:
+        return sorted(set(super().__dir__()) | set(self.__all__))
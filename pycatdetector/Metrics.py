@@ -0,0 +1,223 @@
+import bisect
+import threading
+from typing import Callable, Optional
+
+
+class Metrics:
+    """
+    The Metrics class is a thread-safe registry of the pipeline metrics
+    (counters, gauges and histograms with labels), rendered in the
+    Prometheus text exposition format (see MetricsServer):
+    - https://prometheus.io/docs/instrumenting/exposition_formats/
+
+    The pipeline stages share the default registry (get_default), same
+    as loggers, so no registry has to be passed around.
+
+    Metric names are prefixed with PREFIX, counters end with '_total'.
+    """
+
+    PREFIX = "pycatdetector_"
+    COUNTER = "counter"
+    GAUGE = "gauge"
+    HISTOGRAM = "histogram"
+    # seconds, from a fast screener frame to a slow notification upload
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+    _default: Optional["Metrics"] = None
+    _default_lock = threading.Lock()
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.metrics = {}  # indexed per name, {type, help, buckets, values}
+        self.callbacks = []  # (name, labels, callback) sampled on render
+
+    @classmethod
+    def get_default(cls) -> "Metrics":
+        """
+        Returns the default (process wide) registry.
+        """
+        with cls._default_lock:
+            if cls._default is None:
+                cls._default = Metrics()
+            return cls._default
+
+    def describe(
+        self,
+        name: str,
+        metric_type: str,
+        help: str,
+        buckets: Optional[tuple] = None,
+    ):
+        """
+        Declares a metric, metrics used without a declaration are untyped.
+
+        Args:
+            name (str): The metric name (without PREFIX).
+            metric_type (str): COUNTER, GAUGE or HISTOGRAM.
+            help (str): The metric description.
+            buckets (tuple): The histogram buckets upper bounds (sorted),
+                             defaults to BUCKETS.
+
+        Raises:
+            ValueError: If an invalid metric_type is provided.
+        """
+        if metric_type not in [self.COUNTER, self.GAUGE, self.HISTOGRAM]:
+            raise ValueError("Invalid metric type %r for %r" % (metric_type, name))
+        with self.lock:
+            metric = self._get(name)
+            metric["type"] = metric_type
+            metric["help"] = help
+            metric["buckets"] = tuple(buckets or self.BUCKETS)
+
+    def inc(self, name: str, value: float = 1, **labels):
+        """
+        Increments a counter (or gauge) by value.
+        """
+        key = self._key(labels)
+        with self.lock:
+            values = self._get(name)["values"]
+            values[key] = values.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels):
+        """
+        Sets a gauge value.
+        """
+        key = self._key(labels)
+        with self.lock:
+            self._get(name)["values"][key] = value
+
+    def observe(self, name: str, value: float, **labels):
+        """
+        Observes a value (e.g. a latency in seconds) in a histogram.
+        """
+        key = self._key(labels)
+        with self.lock:
+            metric = self._get(name)
+            if metric["buckets"] is None:
+                metric["type"] = self.HISTOGRAM
+                metric["buckets"] = self.BUCKETS
+            histogram = metric["values"].get(key)
+            if histogram is None:
+                histogram = {"counts": [0] * len(metric["buckets"]), "sum": 0.0}
+                histogram["count"] = 0
+                metric["values"][key] = histogram
+            i = bisect.bisect_left(metric["buckets"], value)
+            if i < len(histogram["counts"]):
+                histogram["counts"][i] += 1  # cumulated on render
+            histogram["sum"] += value
+            histogram["count"] += 1
+
+    def add_callback(self, name: str, callback: Callable[[], float], **labels):
+        """
+        Adds a value sampled on every render (e.g. a queue depth or a
+        counter kept by another object), instead of set() on every change.
+        A callback of the same name and labels is replaced (a single series).
+
+        Args:
+            name (str): The metric name (without PREFIX).
+            callback (Callable): Returns the current value.
+            labels: The metric labels.
+        """
+        key = self._key(labels)
+        with self.lock:
+            self._get(name)
+            self.callbacks = [
+                c for c in self.callbacks if (c[0], c[1]) != (name, key)
+            ] + [(name, key, callback)]
+
+    def remove_callback(self, name: str, **labels):
+        """
+        Removes a sampled value (see add_callback) and its series, e.g.
+        when its object is stopped.
+
+        Args:
+            name (str): The metric name (without PREFIX).
+            labels: The metric labels.
+        """
+        key = self._key(labels)
+        with self.lock:
+            self.callbacks = [c for c in self.callbacks if (c[0], c[1]) != (name, key)]
+            if name in self.metrics:
+                self.metrics[name]["values"].pop(key, None)
+
+    def get(self, name: str, **labels) -> Optional[float]:
+        """
+        Returns a counter or gauge value, None if never set.
+        """
+        with self.lock:
+            metric = self.metrics.get(name)
+            if metric is None:
+                return None
+            value = metric["values"].get(self._key(labels))
+            return value if not isinstance(value, dict) else value["count"]
+
+    def render(self) -> str:
+        """
+        Returns all the metrics in the Prometheus text exposition format.
+        """
+        with self.lock:
+            callbacks = list(self.callbacks)
+        sampled = [(name, key, callback()) for name, key, callback in callbacks]
+
+        lines = []
+        with self.lock:
+            for name, key, value in sampled:
+                self.metrics[name]["values"][key] = value
+            for name, metric in sorted(self.metrics.items()):
+                full_name = self.PREFIX + name
+                if metric["help"] is not None:
+                    lines.append("# HELP %s %s" % (full_name, metric["help"]))
+                lines.append("# TYPE %s %s" % (full_name, metric["type"]))
+                for key, value in sorted(metric["values"].items()):
+                    if metric["type"] == self.HISTOGRAM:
+                        lines.extend(self._render_histogram(full_name, metric, key))
+                    else:
+                        lines.append(
+                            "%s%s %s" % (full_name, self._labels(key), repr(value))
+                        )
+        return "\n".join(lines) + "\n"
+
+    def _render_histogram(self, full_name: str, metric: dict, key: tuple) -> list:
+        histogram = metric["values"][key]
+        lines, cumulated = [], 0
+        for bound, count in zip(metric["buckets"], histogram["counts"]):
+            cumulated += count
+            lines.append(
+                "%s_bucket%s %i"
+                % (full_name, self._labels(key + (("le", repr(bound)),)), cumulated)
+            )
+        lines.append(
+            "%s_bucket%s %i"
+            % (full_name, self._labels(key + (("le", "+Inf"),)), histogram["count"])
+        )
+        lines.append("%s_sum%s %r" % (full_name, self._labels(key), histogram["sum"]))
+        lines.append(
+            "%s_count%s %i" % (full_name, self._labels(key), histogram["count"])
+        )
+        return lines
+
+    def _get(self, name: str) -> dict:
+        """
+        Returns a metric (created untyped if not declared), lock held.
+        """
+        if name not in self.metrics:
+            self.metrics[name] = {
+                "type": "untyped",
+                "help": None,
+                "buckets": None,
+                "values": {},
+            }
+        return self.metrics[name]
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def _labels(self, key: tuple) -> str:
+        if len(key) == 0:
+            return ""
+        escaped = [
+            '%s="%s"'
+            % (k, v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+            for k, v in key
+        ]
+        return "{" + ",".join(escaped) + "}"
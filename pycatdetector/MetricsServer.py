@@ -0,0 +1,74 @@
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from .Metrics import Metrics
+
+
+class MetricsServer(threading.Thread):
+    """
+    The MetricsServer class represents a thread serving the metrics
+    registry on a local HTTP '/metrics' endpoint (Prometheus scraping).
+
+    Args:
+        host (str): The listening address, e.g. '127.0.0.1' (local only).
+        port (int): The listening port.
+        metrics (Metrics): The metrics registry, defaults to the default one.
+    """
+
+    PATH = "/metrics"
+    CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+    def __init__(self, host: str, port: int, metrics: Optional[Metrics] = None):
+        threading.Thread.__init__(self, name="MetricsServer")
+        self.logger = logging.getLogger(__name__)
+        self.metrics = metrics if metrics is not None else Metrics.get_default()
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self.must_stop = False
+
+    def get_port(self) -> int:
+        """
+        Returns the listening port (the bound one if port 0 was requested).
+        """
+        return self.server.server_address[1]
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != server.PATH:
+                    self.send_error(404)
+                    return
+                body = server.metrics.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", server.CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                server.logger.debug(format % args)
+
+        return Handler
+
+    def run(self):
+        self.logger.info(
+            "Serving metrics at http://%s:%i%s"
+            % (self.server.server_address[0], self.get_port(), self.PATH)
+        )
+        self.server.serve_forever()
+        self.server.server_close()
+        self.logger.info("Stopped.")
+
+    def stop(self):
+        if not self.must_stop:
+            self.logger.info("Stopping...")
+            self.must_stop = True
+            if self.is_alive():
+                self.server.shutdown()  # waits for serve_forever to return
+            else:
+                self.server.server_close()
+        else:
+            self.logger.info("Already stopped.")
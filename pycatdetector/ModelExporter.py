@@ -0,0 +1,124 @@
+# pyright: reportMissingImports=false
+
+import os
+import logging
+import torch
+from .NeuralNetPyTorch import NeuralNetPyTorch
+
+
+class ModelExporter:
+    """
+    The ModelExporter class creates the artifacts of the NeuralNetPyTorch
+    model variants served from files, a TorchScript (scripted, tracing
+    doesn't support the detection models control flow) and an ONNX export:
+    - https://pytorch.org/docs/stable/jit.html
+    - https://pytorch.org/vision/stable/models.html#object-detection
+
+    The artifacts are exported with the torchvision default (low) score
+    threshold, the NeuralNetPyTorch min_score is applied after inference.
+
+    Args:
+        model_name (str): The base model name (see NeuralNetPyTorch.MODELS).
+        models_folder (str): The folder where the artifacts are saved.
+
+    Raises:
+        ValueError: If an invalid model_name is provided.
+    """
+
+    EXPORT_MIN_SCORE = 0.05  # torchvision default box_score_thresh
+    ONNX_OPSET = 17
+    SAMPLE_SHAPE = (3, 480, 640)  # sample input (dynamic height and width)
+
+    def __init__(self, model_name: str, models_folder: str):
+        """
+        Initializes a ModelExporter object.
+
+        Args:
+            model_name (str): The model name (variant suffix is ignored).
+            models_folder (str): The folder where the artifacts are saved.
+
+        Raises:
+            ValueError: If an invalid model_name is provided.
+        """
+        self.logger = logging.getLogger(__name__)
+        self.model_name = NeuralNetPyTorch.split_model_name(model_name)[0]
+        self.models_folder = models_folder
+
+    def _build(self) -> torch.nn.Module:
+        """
+        Returns the eager model (pretrained weights) in evaluation mode.
+        """
+        builder, weights = NeuralNetPyTorch.MODELS[self.model_name]
+        model = builder(weights=weights.DEFAULT, box_score_thresh=self.EXPORT_MIN_SCORE)
+        return model.eval()
+
+    def _make_folder(self):
+        if not os.path.exists(self.models_folder):
+            self.logger.info("Creating folder: " + self.models_folder)
+            os.makedirs(self.models_folder)
+
+    def _get_path(self, variant: str) -> str:
+        """
+        Returns the artifact path of a variant (creating the folder).
+        """
+        self._make_folder()
+        return os.path.join(
+            self.models_folder,
+            self.model_name + variant + NeuralNetPyTorch.VARIANTS[variant],
+        )
+
+    def export_torchscript(self) -> str:
+        """
+        Exports the scripted model.
+
+        Returns:
+            str: The artifact path.
+        """
+        path = self._get_path(NeuralNetPyTorch.TORCHSCRIPT)
+        torch.jit.script(self._build()).save(path)
+        self.logger.info("Exported TorchScript model: " + path)
+        return path
+
+    def export_onnx(self) -> str:
+        """
+        Exports the model to ONNX (single image input, dynamic size).
+
+        Returns:
+            str: The artifact path.
+        """
+        path = self._get_path(NeuralNetPyTorch.ONNX)
+        torch.onnx.export(
+            self._build(),
+            ([torch.rand(self.SAMPLE_SHAPE)],),
+            path,
+            opset_version=self.ONNX_OPSET,
+            input_names=["image"],
+            output_names=["boxes", "labels", "scores"],
+            dynamic_axes={"image": {1: "height", 2: "width"}},
+            dynamo=False,  # TorchScript based exporter (no onnxscript needed)
+        )
+        self.logger.info("Exported ONNX model: " + path)
+        return path
+
+    def export_weights(self) -> str:
+        """
+        Exports the weights cache (state dict) loaded by NeuralNetPyTorch
+        instead of the torchvision weights (no download, memory mapped).
+
+        Returns:
+            str: The artifact path.
+        """
+        self._make_folder()
+        path = NeuralNetPyTorch.get_weights_path(self.models_folder, self.model_name)
+        torch.save(self._build().state_dict(), path)
+        self.logger.info("Exported weights cache: " + path)
+        return path
+
+    def export(self) -> list[str]:
+        """
+        Exports the weights cache and all the model variants with artifacts.
+
+        Returns:
+            list[str]: The artifacts paths.
+        """
+        return [self.export_weights(), self.export_torchscript(), self.export_onnx()]
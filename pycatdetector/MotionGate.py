@@ -0,0 +1,229 @@
+import cv2
+import logging
+import threading
+import numpy as np
+from queue import Empty
+from time import monotonic
+from typing import Callable, Optional
+from .BoundedQueue import BoundedQueue
+from .Metrics import Metrics
+
+
+class MotionGate(threading.Thread):
+    """
+    The MotionGate class represents a thread between a Recorder and the
+    Detector that only forwards the frames with motion to inference, a
+    static scene (e.g. an empty litter box) doesn't run the neural net.
+
+    Motion is detected on a downscaled greyscale copy of the frame, by
+    differencing with the previous frame ('diff') or with an OpenCV MOG2
+    background subtractor ('mog2'), optionally restricted to regions of
+    interest. A heartbeat frame is forwarded if no frame was forwarded
+    for 'heartbeat' seconds.
+
+    Args:
+        camera_id (str): The camera unique identifier.
+        frames (BoundedQueue): The frames queue of the Recorder (input).
+        images (BoundedQueue): The images queue of the Detector (output).
+        method (str): The motion detection method, 'diff' or 'mog2'.
+        sensitivity (float): The min changed area ratio (0..1) of the
+                             regions of interest to forward a frame.
+        rois (list): The regions of interest [x, y, width, height], as
+                     ratios (0..1) of the frame size, None for full frame.
+        heartbeat (float): The max seconds without forwarding a frame,
+                           0 disables the heartbeat.
+
+    Raises:
+        ValueError: If an invalid method, sensitivity or roi is provided.
+    """
+
+    DIFF = "diff"
+    MOG2 = "mog2"
+    METHODS = [DIFF, MOG2]
+    SENSITIVITY = 0.005  # default min changed area ratio
+    HEARTBEAT = 60  # default seconds
+    WIDTH = 160  # downscaled frame width (pixels)
+    BLUR_SIZE = 5  # gaussian blur kernel size, removes sensor noise
+    DIFF_THRESHOLD = 25  # min greyscale difference of a changed pixel
+    MOG2_HISTORY = 120  # frames in the background model
+    QUEUE_TIMEOUT = 1  # seconds, max wait for frames between stop checks
+    must_stop = False
+
+    def __init__(
+        self,
+        camera_id: str,
+        frames: BoundedQueue,
+        images: BoundedQueue,
+        method: str = DIFF,
+        sensitivity: float = SENSITIVITY,
+        rois: Optional[list] = None,
+        heartbeat: float = HEARTBEAT,
+    ):
+        threading.Thread.__init__(self, name="MotionGate-" + camera_id)
+        self.logger = logging.getLogger(__name__)
+        if method not in self.METHODS:
+            raise ValueError("Invalid motion method %r for %r" % (method, camera_id))
+        if not 0 <= sensitivity <= 1:
+            raise ValueError(
+                "Invalid motion sensitivity %r for %r" % (sensitivity, camera_id)
+            )
+        for roi in rois or []:
+            if len(roi) != 4 or not all(0 <= float(v) <= 1 for v in roi):
+                raise ValueError("Invalid motion roi %r for %r" % (roi, camera_id))
+        self.camera_id = camera_id
+        self.frames = frames
+        self.images = images
+        self.method = method
+        self.sensitivity = sensitivity
+        self.rois = rois
+        self.heartbeat = heartbeat
+        self.mask = None  # regions of interest mask, built on first frame
+        self.previous = None
+        self.subtractor = None
+        if method == self.MOG2:
+            self.subtractor = cv2.createBackgroundSubtractorMOG2(
+                history=self.MOG2_HISTORY, detectShadows=False
+            )
+        self.listeners = []  # called with (camera_id, frame) per motion frame
+        self.last_passed = None
+        self.passed = 0
+        self.gated = 0
+        self.metrics = Metrics.get_default()
+        self.metrics.describe(
+            "motion_frames_total",
+            Metrics.COUNTER,
+            "Frames forwarded (passed) or skipped (gated) by the motion gate",
+        )
+
+    def get_images(self) -> BoundedQueue:
+        return self.images
+
+    def add_listener(self, listener: Callable[[str, object], None]):
+        """
+        Adds a callable invoked with the camera id and every frame with
+        motion (e.g. RateController.set_active), it must not block.
+        """
+        self.listeners.append(listener)
+
+    def get_counters(self) -> dict:
+        """
+        Returns the forwarded ('passed', including heartbeats) and
+        skipped ('gated') frames counters.
+        """
+        return {"passed": self.passed, "gated": self.gated}
+
+    def run(self):
+        self.logger.info(
+            "Starting camera '%s' (%s) with Thread ID: %s"
+            % (self.camera_id, self.method, threading.get_native_id())
+        )
+        while not self.must_stop:
+            try:
+                frame = self.frames.get(timeout=self.QUEUE_TIMEOUT)
+            except Empty:
+                continue
+            self.process(frame)
+        self.logger.info("Stopped. Passed: %i, Gated: %i" % (self.passed, self.gated))
+
+    def stop(self):
+        if not self.must_stop:
+            self.logger.info("Stopping...")
+            self.must_stop = True
+            self.images.close()  # release if blocked on a full queue
+        else:
+            self.logger.info("Already stopped.")
+
+    def process(self, frame) -> bool:
+        """
+        Forwards the frame to the images queue if it has motion or the
+        heartbeat is due.
+
+        Args:
+            frame (numpy.ndarray): The OpenCV BGR frame.
+
+        Returns:
+            bool: True if the frame was forwarded, False if gated.
+        """
+        now = monotonic()
+        motion = self.has_motion(frame)
+        heartbeat = self.heartbeat > 0 and (
+            self.last_passed is None or now - self.last_passed >= self.heartbeat
+        )
+        if not motion and not heartbeat:
+            self.gated += 1
+            self.metrics.inc(
+                "motion_frames_total", camera=self.camera_id, result="gated"
+            )
+            return False
+
+        if motion:
+            for listener in self.listeners:
+                listener(self.camera_id, frame)
+        self.passed += 1
+        self.metrics.inc("motion_frames_total", camera=self.camera_id, result="passed")
+        self.last_passed = now
+        self.images.put(frame)
+        self.logger.debug(
+            "%s, Passed: %i, Gated: %i"
+            % ("Motion" if motion else "Heartbeat", self.passed, self.gated)
+        )
+        return True
+
+    def has_motion(self, frame) -> bool:
+        """
+        Returns whether the changed area ratio of the frame regions of
+        interest reaches the sensitivity (the first frame has motion).
+
+        Args:
+            frame (numpy.ndarray): The OpenCV BGR frame.
+        """
+        small = self._downscale(frame)
+        if self.mask is None or self.mask.shape != small.shape:
+            self.mask = self._build_mask(small.shape)
+            self.previous = None
+
+        if self.subtractor is not None:
+            changed = self.subtractor.apply(small)
+            first = self.previous is None
+            self.previous = small
+            if first:
+                return True  # empty background model
+        else:
+            if self.previous is None:
+                self.previous = small
+                return True
+            diff = cv2.absdiff(small, self.previous)
+            self.previous = small
+            _, changed = cv2.threshold(
+                diff, self.DIFF_THRESHOLD, 255, cv2.THRESH_BINARY
+            )
+
+        if self.rois is not None:
+            changed = cv2.bitwise_and(changed, self.mask)
+        area = cv2.countNonZero(self.mask)
+        return area > 0 and cv2.countNonZero(changed) / area >= self.sensitivity
+
+    def _downscale(self, frame) -> np.ndarray:
+        """
+        Returns the frame as a blurred greyscale image of WIDTH pixels.
+        """
+        height, width = frame.shape[:2]
+        size = (self.WIDTH, max(1, round(height * self.WIDTH / width)))
+        small = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return cv2.GaussianBlur(small, (self.BLUR_SIZE, self.BLUR_SIZE), 0)
+
+    def _build_mask(self, shape: tuple) -> np.ndarray:
+        """
+        Returns the regions of interest mask (255 inside) of a frame shape.
+        """
+        if self.rois is None:
+            return np.full(shape, 255, dtype=np.uint8)
+        height, width = shape
+        mask = np.zeros(shape, dtype=np.uint8)
+        for x, y, w, h in self.rois:
+            x0, y0 = round(x * width), round(y * height)
+            x1, y1 = round((x + w) * width), round((y + h) * height)
+            mask[y0:y1, x0:x1] = 255
+        return mask
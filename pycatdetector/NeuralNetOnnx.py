@@ -0,0 +1,101 @@
+# pyright: reportMissingImports=false
+
+import torch
+from typing import Optional
+from .NeuralNetPyTorch import NeuralNetPyTorch
+
+
+class NeuralNetOnnx(NeuralNetPyTorch):
+    """
+    NeuralNetOnnx runs an ONNX export of a NeuralNetPyTorch model (created
+    by the ModelExporter, make export) with the onnxruntime CPU provider,
+    references:
+    - https://onnxruntime.ai/docs/execution-providers/
+    - https://pytorch.org/docs/stable/onnx.html
+
+    The preprocessing (_load, _preprocess), labels and plotting are the
+    same as NeuralNetPyTorch, only the forward pass runs in onnxruntime.
+
+    Args:
+        model_name (str): The name of the model to use (with _ONNX suffix).
+        min_score (float, optional): The minimum score threshold for
+                                     object detection. Defaults to 0.7.
+        models_folder (str): The folder of the exported model artifacts.
+
+    Raises:
+        ValueError: If an invalid model_name is provided.
+        FileNotFoundError: If the ONNX artifact is not exported.
+        ImportError: If onnxruntime is not installed.
+
+    Attributes:
+        weights: The weights of the model (for labels).
+        session: The onnxruntime inference session.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        min_score: Optional[float] = 0.7,
+        models_folder: str = "models",
+    ):
+        """
+        Initializes a NeuralNetOnnx object.
+
+        Args:
+            model_name (str): The name of the model to use (with _ONNX suffix).
+            min_score (float, optional): The minimum score threshold for
+                                         object detection. Defaults to 0.7.
+            models_folder (str): The folder of the exported model artifacts.
+
+        Raises:
+            ValueError: If an invalid model_name is provided.
+            FileNotFoundError: If the ONNX artifact is not exported.
+            ImportError: If onnxruntime is not installed.
+
+        """
+
+        import onnxruntime  # optional dependency, only for ONNX models
+
+        if self.split_model_name(model_name)[1] != self.ONNX:
+            raise ValueError("Invalid ONNX model_name" + repr(model_name))
+        self.weights = self.get_weights(model_name)
+        self.min_score = min_score
+        self.buffers = {}
+        self.session = onnxruntime.InferenceSession(
+            self.get_artifact_path(models_folder, model_name),
+            providers=["CPUExecutionProvider"],
+        )
+        self.input_name = self.session.get_inputs()[0].name
+
+    def analyze_batch(self, images: list) -> list[dict]:
+        """
+        Analyzes several images, one onnxruntime run per image (the
+        export takes a single image), see NeuralNetPyTorch.analyze_batch.
+
+        Args:
+            images (list): The input images to analyze, each one
+                           a str, PIL.Image.Image or numpy.ndarray.
+
+        Returns:
+            list[dict]: One analysis result per input image (same order).
+
+        Raises:
+            FileNotFoundError: If an input image file is not found.
+
+        """
+
+        imgs = [self._load(image) for image in images]
+        results = []
+        for img, tensor in zip(imgs, self._preprocess(imgs)):
+            boxes, labels, scores = self.session.run(
+                None, {self.input_name: tensor.numpy()}
+            )
+            results.append(
+                self._result(
+                    img,
+                    torch.from_numpy(labels),
+                    torch.from_numpy(scores),
+                    torch.from_numpy(boxes),
+                )
+            )
+        return results
@@ -0,0 +1,333 @@
+# pyright: reportMissingImports=false
+
+import os
+import sys
+import logging
+import threading
+import traceback
+import numpy as np
+import torch
+import multiprocessing as mp
+from multiprocessing import connection, shared_memory
+from typing import Optional
+from PIL import Image
+from .NeuralNetPyTorch import NeuralNetPyTorch
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """
+    Attaches to an existing shared memory block owned by the parent (the
+    parent unlinks it), spawned workers share the parent's resource tracker
+    so registering the block again (before Python 3.13) is harmless.
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    return shared_memory.SharedMemory(name=name)
+
+
+def inference_worker(model_name, min_score, models_folder, conn, threads=None):
+    """
+    Worker process main loop, runs NeuralNetPyTorch on the frames found in
+    the shared memory block of each request and responds with compact label
+    index, score and box arrays per frame (the frames are never pickled).
+
+    Args:
+        model_name (str): The name of the model to use.
+        min_score (float): The minimum score threshold for object detection.
+        models_folder (str): The folder of the exported model artifacts.
+        conn (Connection): The worker end of its pipe, receives requests
+                           (job_id, shm_name, [(offset, shape)]) or None to
+                           stop the worker, sends responses (job_id,
+                           results, error).
+        threads (int): The torch intra-op threads (the CPUs shared by the
+                       workers), None for the torch default.
+    """
+    if threads is not None:
+        torch.set_num_threads(threads)  # not every worker using every CPU
+    net = NeuralNetPyTorch.create(model_name, min_score, models_folder)
+    shm = None
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            break  # pool closed
+        if request is None:
+            break
+        job_id, shm_name, frames_layout = request
+        try:
+            if shm is None or shm.name != shm_name:
+                if shm is not None:
+                    shm.close()
+                shm = _attach(shm_name)
+            frames = [
+                np.ndarray(shape, dtype=np.uint8, buffer=shm.buf, offset=offset)
+                for offset, shape in frames_layout
+            ]
+            results = []
+            for result in net.analyze_batch(frames):
+                results.append(
+                    (
+                        result["classes"].numpy(),
+                        result["scores"].numpy(),
+                        result["boxes"].numpy(),
+                    )
+                )
+            del frames  # release shared memory views
+            conn.send((job_id, results, None))
+        except Exception:
+            conn.send((job_id, None, traceback.format_exc()))
+    if shm is not None:
+        shm.close()
+
+
+class NeuralNetProcessPool(NeuralNetPyTorch):
+    """
+    NeuralNetProcessPool runs the NeuralNetPyTorch model (any variant,
+    see NeuralNetPyTorch.create) in one or more
+    worker processes, so inference doesn't compete for the GIL with frame
+    capture, image encoding or plotting in the main process.
+
+    Frames are handed over through a shared memory block per worker (not
+    pickled), results come back as compact label, score and box arrays.
+    A batch is split across the workers, so several workers pay off when
+    the detector batch size is at least the number of workers. Each worker
+    uses its share of the CPUs (torch threads) and has its own pipe (no
+    lock shared with the other workers), a dead worker (e.g. killed out of
+    memory) is restarted with a new pipe, its pending requests dropped.
+
+    Args:
+        model_name (str): The name of the model to use.
+        min_score (float, optional): The minimum score threshold for
+                                     object detection. Defaults to 0.7.
+        workers (int): The number of worker processes.
+        models_folder (str): The folder of the exported model artifacts.
+
+    Raises:
+        ValueError: If an invalid model_name or workers count is provided.
+
+    Attributes:
+        weights: The weights of the model (for labels, in main process).
+        workers: The worker processes and their shared memory blocks.
+    """
+
+    RESPONSE_TIMEOUT = 1  # seconds, max wait before checking workers health
+
+    def __init__(
+        self,
+        model_name: str,
+        min_score: Optional[float] = 0.7,
+        workers: int = 1,
+        models_folder: str = "models",
+    ):
+        """
+        Initializes a NeuralNetProcessPool object, starting the workers.
+
+        Args:
+            model_name (str): The name of the model to use.
+            min_score (float, optional): The minimum score threshold for
+                                         object detection. Defaults to 0.7.
+            workers (int): The number of worker processes.
+            models_folder (str): The folder of the exported model artifacts.
+
+        Raises:
+            ValueError: If an invalid model_name or workers count is provided.
+
+        """
+        if workers < 1:
+            raise ValueError("Invalid workers count %r" % workers)
+        self.logger = logging.getLogger(__name__)
+        self.weights = self.get_weights(model_name)  # labels only, no model
+        self.min_score = min_score
+        self.lock = threading.Lock()
+        self.job_id = 0
+        self.worker_args = (
+            model_name,
+            min_score,
+            models_folder,
+            max(1, (os.cpu_count() or 1) // workers),
+        )
+        # Spawn (not fork), forking a process with torch threads is unsafe
+        self.context = mp.get_context("spawn")
+        self.workers = []
+        for i in range(workers):
+            worker = {"process": None, "conn": None, "shm": None}
+            self.workers.append(worker)
+            self._start_worker(i)
+        self.logger.info(
+            "Started %i inference worker processes (%i threads each)"
+            % (workers, self.worker_args[3])
+        )
+
+    def _start_worker(self, i: int):
+        """
+        Starts (or restarts) the worker process i with a new pipe, the
+        requests pending in the pipe of a previous (dead) process are
+        dropped with it. The shared memory block is kept.
+        """
+        worker = self.workers[i]
+        if worker["conn"] is not None:
+            worker["conn"].close()
+        model_name, min_score, models_folder, threads = self.worker_args
+        conn, worker_conn = self.context.Pipe()
+        process = self.context.Process(
+            target=inference_worker,
+            args=(model_name, min_score, models_folder, worker_conn, threads),
+            name="NeuralNetWorker-%i" % i,
+            daemon=True,
+        )
+        process.start()
+        worker_conn.close()  # owned by the worker, EOF when it dies
+        worker.update({"process": process, "conn": conn})
+
+    def _restart_dead_workers(self) -> list[str]:
+        """
+        Restarts the dead worker processes (lock held).
+
+        Returns:
+            list[str]: The names of the dead workers restarted.
+        """
+        return [
+            self._restart_worker(i)
+            for i, worker in enumerate(self.workers)
+            if not worker["process"].is_alive()
+        ]
+
+    def _restart_worker(self, i: int) -> str:
+        """
+        Restarts the dead (or broken pipe) worker process i (lock held).
+
+        Returns:
+            str: The name of the worker restarted.
+        """
+        process = self.workers[i]["process"]
+        if process.is_alive():
+            process.kill()  # pipe closed, not usable anymore
+        process.join(timeout=5)
+        self.logger.error(
+            "Worker %s died (exit code %s), restarting"
+            % (process.name, process.exitcode)
+        )
+        self._start_worker(i)
+        return process.name
+
+    def _get_shm(self, worker: dict, size: int) -> shared_memory.SharedMemory:
+        """
+        Returns the shared memory block of a worker, (re)allocated
+        if it is smaller than the requested size.
+        """
+        shm = worker["shm"]
+        if shm is None or shm.size < size:
+            if shm is not None:
+                shm.close()
+                shm.unlink()  # the worker keeps its mapping until reattached
+            shm = shared_memory.SharedMemory(create=True, size=size)
+            worker["shm"] = shm
+        return shm
+
+    def analyze_batch(self, images: list) -> list[dict]:
+        """
+        Analyzes several images in the worker processes, the batch is
+        split evenly across the workers (see NeuralNetPyTorch.analyze_batch).
+
+        Args:
+            images (list): The input images to analyze, each one
+                           a str, PIL.Image.Image or numpy.ndarray.
+
+        Returns:
+            list[dict]: One analysis result per input image (same order).
+
+        Raises:
+            FileNotFoundError: If an input image file is not found.
+            RuntimeError: If a worker failed or died.
+
+        """
+        frames = [self._to_ndarray(image) for image in images]
+        chunk = -(-len(frames) // len(self.workers))  # ceil
+
+        with self.lock:
+            self._restart_dead_workers()
+            jobs = {}
+            pending = {}  # indexed per worker pipe, (worker index, job id)
+            for i, worker in enumerate(self.workers):
+                chunk_frames = frames[i * chunk : (i + 1) * chunk]
+                if len(chunk_frames) == 0:
+                    break
+                shm = self._get_shm(worker, sum(f.nbytes for f in chunk_frames))
+                layout, offset = [], 0
+                for frame in chunk_frames:
+                    view = np.ndarray(
+                        frame.shape, dtype=np.uint8, buffer=shm.buf, offset=offset
+                    )
+                    view[:] = frame
+                    layout.append((offset, frame.shape))
+                    offset += frame.nbytes
+                del view
+                self.job_id += 1
+                jobs[self.job_id] = i * chunk
+                pending[worker["conn"]] = (i, self.job_id)
+                try:
+                    worker["conn"].send((self.job_id, shm.name, layout))
+                except OSError:
+                    raise RuntimeError("Worker %s died" % self._restart_worker(i))
+
+            # A dead worker's job is lost, the batch fails (not the next ones)
+            outputs = {}
+            while len(pending) > 0:
+                ready = connection.wait(list(pending), timeout=self.RESPONSE_TIMEOUT)
+                if len(ready) == 0:
+                    dead = self._restart_dead_workers()
+                    if len(dead) > 0:
+                        raise RuntimeError("Worker %s died" % ", ".join(dead))
+                    continue
+                for conn in ready:
+                    i, expected = pending[conn]
+                    try:
+                        job_id, results, error = conn.recv()  # type: ignore
+                    except (EOFError, OSError):
+                        raise RuntimeError("Worker %s died" % self._restart_worker(i))
+                    if job_id != expected:
+                        continue  # stale response of a failed batch
+                    if error is not None:
+                        raise RuntimeError("Worker failed: " + error)
+                    outputs[job_id] = results
+                    del pending[conn]
+
+        analyzed = [None] * len(frames)
+        for job_id, start in jobs.items():
+            for j, (labels, scores, boxes) in enumerate(outputs[job_id]):
+                analyzed[start + j] = self._result(
+                    self._load(frames[start + j]),
+                    torch.from_numpy(labels),
+                    torch.from_numpy(scores),
+                    torch.from_numpy(boxes),
+                )
+        return analyzed  # type: ignore
+
+    def _to_ndarray(self, image) -> np.ndarray:
+        """
+        Returns the image as an uint8 BGR HxWxC ndarray (OpenCV layout).
+        """
+        if isinstance(image, str):
+            with Image.open(image) as img:  # raises FileNotFoundError
+                image = img.convert("RGB")
+        if isinstance(image, Image.Image):
+            return np.ascontiguousarray(np.asarray(image.convert("RGB"))[:, :, ::-1])
+        return np.ascontiguousarray(image, dtype=np.uint8)
+
+    def close(self):
+        """
+        Stops the worker processes and releases the shared memory blocks.
+        """
+        for worker in self.workers:
+            try:
+                worker["conn"].send(None)
+            except OSError:
+                pass  # dead worker
+        for worker in self.workers:
+            worker["process"].join(timeout=5)
+            worker["conn"].close()
+            if worker["shm"] is not None:
+                worker["shm"].close()
+                worker["shm"].unlink()
+                worker["shm"] = None
+        self.logger.info("Stopped %i inference worker processes" % len(self.workers))
@@ -1,12 +1,13 @@
 # pyright: reportMissingImports=false
 
 import os
+import numpy as np
 import torch
+from collections import OrderedDict
 from PIL import Image
 from typing import Optional
-from torchvision.io import read_image
-from torchvision.transforms import ToTensor, ToPILImage
-from torchvision.utils import draw_bounding_boxes
+from torchvision.io import read_image, ImageReadMode
+from torchvision.transforms.functional import pil_to_tensor
 from torchvision.models.detection import (
     fasterrcnn_mobilenet_v3_large_fpn,
     fasterrcnn_mobilenet_v3_large_320_fpn,
@@ -14,6 +15,8 @@ from torchvision.models.detection import (
     FasterRCNN_MobileNet_V3_Large_FPN_Weights,
 )
 from .AbstractNeuralNet import AbstractNeuralNet
+from .BoxedImage import BoxedImage
+from .ScoredLabels import ScoredLabels
 
 
 class NeuralNetPyTorch(AbstractNeuralNet):
@@ -24,22 +27,61 @@ class NeuralNetPyTorch(AbstractNeuralNet):
     - https://pytorch.org/vision/stable/_modules/torchvision/models/detection/ssdlite.html  # noqa
     - https://pytorch.org/vision/stable/_modules/torchvision/models/detection/faster_rcnn.html  # noqa
 
+    The pretrained weights are read from the weights cache in the models
+    folder if exported (no download, memory mapped and assigned to a model
+    built without initialization), otherwise from the torchvision cache
+    (downloaded on first use).
+
+    The model name is one of MODELS optionally followed by a variant suffix
+    for CPU inference: INT8 (dynamic int8 quantization of the linear layers),
+    TORCHSCRIPT (scripted artifact) or ONNX (onnxruntime, see NeuralNetOnnx),
+    the artifacts are created by the ModelExporter (make export).
+
     Args:
         model_name (str): The name of the model to use.
         min_score (float, optional): The minimum score threshold for
                                      object detection. Defaults to 0.7.
+        models_folder (str): The folder of the exported model artifacts.
 
     Raises:
         ValueError: If an invalid model_name is provided.
+        FileNotFoundError: If the model variant artifact is not exported.
 
     Attributes:
         weights: The weights of the model.
+        min_score: The minimum score threshold for object detection.
         model: The PyTorch model.
-        preprocess: The preprocessing steps for the input image.
+        buffers: The preallocated model input buffers per image resolution
+                 (the MAX_BUFFERS most recently used resolutions).
 
     """
 
-    def __init__(self, model_name: str, min_score: Optional[float] = 0.7):
+    # Model name => (model builder, weights enum)
+    MODELS = {
+        "FasterRCNN_MobileNet_V3_Large_FPN": (
+            fasterrcnn_mobilenet_v3_large_fpn,
+            FasterRCNN_MobileNet_V3_Large_FPN_Weights,
+        ),
+        "FasterRCNN_MobileNet_V3_Large_320_FPN": (
+            fasterrcnn_mobilenet_v3_large_320_fpn,
+            FasterRCNN_MobileNet_V3_Large_320_FPN_Weights,
+        ),
+    }
+
+    # Model name variant suffixes => exported artifact file extension
+    WEIGHTS = ".pth"  # weights cache file extension (state dict)
+    INT8 = "_INT8"
+    TORCHSCRIPT = "_TorchScript"
+    ONNX = "_ONNX"
+    VARIANTS = {INT8: None, TORCHSCRIPT: ".pt", ONNX: ".onnx"}
+    MAX_BUFFERS = 4  # input buffers kept (resolutions, e.g. cameras and ROIs)
+
+    def __init__(
+        self,
+        model_name: str,
+        min_score: Optional[float] = 0.7,
+        models_folder: str = "models",
+    ):
         """
         Initializes a NeuralNetPyTorch object.
 
@@ -47,27 +89,166 @@ class NeuralNetPyTorch(AbstractNeuralNet):
             model_name (str): The name of the model to use.
             min_score (float, optional): The minimum score threshold for
                                          object detection. Defaults to 0.7.
+            models_folder (str): The folder of the exported model artifacts.
 
         Raises:
             ValueError: If an invalid model_name is provided.
+            FileNotFoundError: If the model variant artifact is not exported.
 
         """
 
-        if model_name == "FasterRCNN_MobileNet_V3_Large_FPN":
-            self.weights = FasterRCNN_MobileNet_V3_Large_FPN_Weights.DEFAULT
-            self.model = fasterrcnn_mobilenet_v3_large_fpn(
-                weights=self.weights, box_score_thresh=min_score
-            )
-        elif model_name == "FasterRCNN_MobileNet_V3_Large_320_FPN":
-            self.weights = FasterRCNN_MobileNet_V3_Large_320_FPN_Weights.DEFAULT
-            self.model = fasterrcnn_mobilenet_v3_large_320_fpn(
-                weights=self.weights, box_score_thresh=min_score
+        base_name, variant = self.split_model_name(model_name)
+        self.weights = self.get_weights(base_name)
+        self.min_score = min_score
+        # (channels, height, width) => float tensor (N, C, H, W), LRU order
+        self.buffers = OrderedDict()
+
+        if variant == self.ONNX:
+            raise ValueError("ONNX models are served by NeuralNetOnnx")
+        elif variant == self.TORCHSCRIPT:
+            self.model = torch.jit.load(
+                self.get_artifact_path(models_folder, model_name)
             )
         else:
+            path = self.get_weights_path(models_folder, base_name)
+            if os.path.exists(path):
+                self.model = self._load_weights(base_name, path, min_score)
+            else:
+                builder = self.MODELS[base_name][0]
+                self.model = builder(weights=self.weights, box_score_thresh=min_score)
+            if variant == self.INT8:
+                self.model = torch.ao.quantization.quantize_dynamic(
+                    self.model, {torch.nn.Linear}, dtype=torch.qint8
+                )
+        self.model.eval()
+
+    @classmethod
+    def create(
+        cls,
+        model_name: str,
+        min_score: Optional[float] = 0.7,
+        models_folder: str = "models",
+    ) -> "NeuralNetPyTorch":
+        """
+        Returns the neural network implementation serving the model name.
+
+        Args:
+            model_name (str): The name of the model to use (with variant).
+            min_score (float, optional): The minimum score threshold.
+            models_folder (str): The folder of the exported model artifacts.
+
+        """
+
+        if cls.split_model_name(model_name)[1] == cls.ONNX:
+            from .NeuralNetOnnx import NeuralNetOnnx
+
+            return NeuralNetOnnx(model_name, min_score, models_folder)
+        return NeuralNetPyTorch(model_name, min_score, models_folder)
+
+    @classmethod
+    def split_model_name(cls, model_name: str) -> tuple[str, str]:
+        """
+        Splits a model name into base model name and variant suffix.
+
+        Args:
+            model_name (str): The name of the model, e.g. "X_INT8".
+
+        Returns:
+            tuple: The base model name and the variant suffix ("" if none).
+
+        Raises:
+            ValueError: If an invalid model_name is provided.
+
+        """
+
+        for variant in cls.VARIANTS:
+            if model_name.endswith(variant):
+                base_name = model_name[: -len(variant)]
+                if base_name in cls.MODELS:
+                    return base_name, variant
+        if model_name not in cls.MODELS:
             raise ValueError("Invalid model_name" + repr(model_name))
+        return model_name, ""
 
-        self.model.eval()
-        self.preprocess = self.weights.transforms()
+    @classmethod
+    def get_artifact_path(cls, models_folder: str, model_name: str) -> str:
+        """
+        Returns the path of an exported model variant artifact.
+
+        Args:
+            models_folder (str): The folder of the exported model artifacts.
+            model_name (str): The name of the model (with variant).
+
+        Raises:
+            ValueError: If the model variant has no artifact.
+            FileNotFoundError: If the artifact is not exported yet.
+
+        """
+
+        extension = cls.VARIANTS.get(cls.split_model_name(model_name)[1])
+        if extension is None:
+            raise ValueError("Model %r has no exported artifact" % model_name)
+        path = os.path.join(models_folder, model_name + extension)
+        if not os.path.exists(path):
+            raise FileNotFoundError(
+                "Model artifact %r not found, run 'make export'" % path
+            )
+        return path
+
+    @classmethod
+    def get_weights_path(cls, models_folder: str, model_name: str) -> str:
+        """
+        Returns the path of the weights cache (state dict) of a model, the
+        same for all its variants (may not exist, see ModelExporter).
+
+        Args:
+            models_folder (str): The folder of the exported model artifacts.
+            model_name (str): The name of the model (with or without variant).
+
+        Raises:
+            ValueError: If an invalid model_name is provided.
+
+        """
+
+        base_name = cls.split_model_name(model_name)[0]
+        return os.path.join(models_folder, base_name + cls.WEIGHTS)
+
+    def _load_weights(
+        self, base_name: str, path: str, min_score: Optional[float]
+    ) -> torch.nn.Module:
+        """
+        Returns the model with the weights of the weights cache, built on
+        the meta device (no memory, no random initialization) then the
+        memory mapped tensors are assigned (not copied), pages are read
+        on first use.
+        """
+
+        builder = self.MODELS[base_name][0]
+        with torch.device("meta"):
+            model = builder(
+                weights=None,
+                weights_backbone=None,
+                num_classes=len(self.weights.meta["categories"]),
+                box_score_thresh=min_score,
+            )
+        state_dict = torch.load(path, mmap=True, weights_only=True)
+        model.load_state_dict(state_dict, assign=True)
+        return model
+
+    @classmethod
+    def get_weights(cls, model_name: str):
+        """
+        Returns the default weights of a model (without loading them).
+
+        Args:
+            model_name (str): The name of the model (with or without variant).
+
+        Raises:
+            ValueError: If an invalid model_name is provided.
+
+        """
+
+        return cls.MODELS[cls.split_model_name(model_name)[0]][1].DEFAULT
 
     def analyze(self, image) -> dict:
         """
@@ -79,33 +260,145 @@ class NeuralNetPyTorch(AbstractNeuralNet):
 
         Returns:
             dict: A dictionary containing the analysis results,
-                  including the image, labels, scores, and boxes.
+                  including the image (uint8 BGR CxHxW tensor),
+                  labels, classes (indexes), scores, and boxes.
+
+        Raises:
+            FileNotFoundError: If the input image file is not found.
+
+        """
+
+        return self.analyze_batch([image])[0]
+
+    def analyze_batch(self, images: list) -> list[dict]:
+        """
+        Analyzes several images in a single forward pass of the model.
+
+        Args:
+            images (list): The input images to analyze, each one
+                           a str, PIL.Image.Image or numpy.ndarray.
+
+        Returns:
+            list[dict]: One analysis result per input image (same order),
+                        see analyze() for the dictionary content.
+
+        Raises:
+            FileNotFoundError: If an input image file is not found.
+
+        """
+
+        imgs = [self._load(image) for image in images]
+        batch = self._preprocess(imgs)
+
+        with torch.no_grad():
+            predictions = self.model(batch)
+        if isinstance(predictions, tuple):
+            predictions = predictions[1]  # TorchScript => (losses, detections)
+
+        return [
+            self._result(img, p["labels"], p["scores"], p["boxes"])
+            for img, p in zip(imgs, predictions)
+        ]
+
+    def _result(
+        self,
+        img: torch.Tensor,
+        labels: torch.Tensor,
+        scores: torch.Tensor,
+        boxes: torch.Tensor,
+    ) -> dict:
+        """
+        Builds an analysis result from the raw model outputs of one image,
+        keeping only the detections scored at least min_score (exported
+        models keep the lower score threshold used during the export).
+
+        Args:
+            img (torch.Tensor): The analyzed uint8 BGR CxHxW image.
+            labels (torch.Tensor): The detected class indexes.
+            scores (torch.Tensor): The detection scores.
+            boxes (torch.Tensor): The detection boxes (x1, y1, x2, y2).
+
+        Returns:
+            dict: The analysis result (see analyze()).
+
+        """
+
+        keep = scores >= self.min_score
+        categories = self.weights.meta["categories"]
+        return {
+            "image": img,  # uint8 BGR CxHxW tensor
+            "labels": [categories[i] for i in labels[keep]],
+            "classes": labels[keep],  # class indexes (int64)
+            "scores": scores[keep],
+            "boxes": boxes[keep],
+        }
+
+    def _load(self, image) -> torch.Tensor:
+        """
+        Loads an image from a file path or converts it to a tensor in
+        OpenCV channel order (BGR), as the frames from the Recorder.
+
+        Args:
+            image (str or PIL.Image.Image or numpy.ndarray): The image,
+                numpy arrays are expected in OpenCV layout (BGR HxWxC).
+
+        Returns:
+            torch.Tensor: The image as uint8 BGR CxHxW tensor, for numpy
+                          arrays a zero-copy view sharing their memory.
 
         Raises:
             FileNotFoundError: If the input image file is not found.
 
         """
 
-        img = None
         if isinstance(image, str):
             if os.path.exists(image):
-                img = read_image(image)  # PIL Image
+                return read_image(image, ImageReadMode.RGB).flip(0)
             else:
                 raise FileNotFoundError
+        elif isinstance(image, Image.Image):
+            return pil_to_tensor(image.convert("RGB")).flip(0)
         else:
-            if not isinstance(image, Image.Image):
-                img = Image.fromarray(image)  # PIL Image
+            return torch.from_numpy(image).permute(2, 0, 1)
+
+    def _preprocess(self, imgs: list[torch.Tensor]) -> list[torch.Tensor]:
+        """
+        Converts the uint8 BGR images to the float [0, 1] RGB model input,
+        written into preallocated buffers (reused across calls per resolution,
+        the least recently used ones dropped beyond MAX_BUFFERS resolutions,
+        e.g. a folder of photos of any size), the channel swap happens while
+        copying (no intermediate images).
 
-        batch = [self.preprocess(img)]
-        prediction = self.model(batch)[0]
-        labels = [self.weights.meta["categories"][i] for i in prediction["labels"]]
+        Args:
+            imgs (list[torch.Tensor]): The uint8 BGR CxHxW images.
 
-        return {
-            "image": img,  # PIL Image
-            "labels": labels,
-            "scores": prediction["scores"],
-            "boxes": prediction["boxes"],
-        }
+        Returns:
+            list[torch.Tensor]: The float CxHxW images (buffer views, only
+                                valid until the next call).
+
+        """
+
+        counts = {}
+        for img in imgs:
+            counts[tuple(img.shape)] = counts.get(tuple(img.shape), 0) + 1
+        for shape, count in counts.items():
+            if shape not in self.buffers or len(self.buffers[shape]) < count:
+                self.buffers[shape] = torch.empty((count,) + shape)
+            self.buffers.move_to_end(shape)
+        while len(self.buffers) > max(self.MAX_BUFFERS, len(counts)):
+            self.buffers.popitem(last=False)  # not used by this batch
+
+        batch = []
+        used = {}
+        for img in imgs:
+            shape = tuple(img.shape)
+            i = used.get(shape, 0)
+            used[shape] = i + 1
+            buffer = self.buffers[shape][i]
+            for c in range(3):
+                buffer[c].copy_(img[2 - c])  # BGR => RGB
+            batch.append(buffer.div_(255))
+        return batch
 
     def get_classes(self) -> list:
         """
@@ -118,6 +411,55 @@ class NeuralNetPyTorch(AbstractNeuralNet):
 
         return self.weights.meta["categories"]
 
+    def get_class_ids(self, labels: list) -> np.ndarray:
+        """
+        Returns the class indexes of labels, to filter the detections
+        by class (see get_detections), unknown labels are ignored.
+
+        Args:
+            labels (list): The class labels (e.g. ["cat"]).
+
+        Returns:
+            numpy.ndarray: The sorted class indexes (int64).
+        """
+        categories = np.array(self.get_classes(), dtype=object)
+        return np.flatnonzero(np.isin(categories, list(labels))).astype(np.int64)
+
+    def get_detections(
+        self,
+        result: dict,
+        min_score: Optional[float] = -1,
+        class_ids: Optional[np.ndarray] = None,
+    ) -> ScoredLabels:
+        """
+        Filters the detections of a result by score and class in a single
+        vectorized pass.
+
+        Args:
+            result (dict): The analysis result dictionary.
+            min_score (float, optional): The minimum score threshold.
+                                         Defaults to -1.
+            class_ids (numpy.ndarray, optional): The class indexes kept
+                                                 (see get_class_ids),
+                                                 None for all classes.
+
+        Returns:
+            ScoredLabels: The labels, classes, scores and boxes kept.
+        """
+        scores = result["scores"].detach().numpy()
+        classes = result["classes"].detach().numpy()
+        keep = scores >= (min_score if min_score is not None else -1)
+        if class_ids is not None:
+            keep &= np.isin(classes, class_ids)
+        indexes = np.flatnonzero(keep)
+        labels = result["labels"]
+        return ScoredLabels(
+            labels=[labels[i] for i in indexes],
+            classes=classes[indexes],
+            scores=scores[indexes],
+            boxes=result["boxes"].detach().numpy()[indexes],
+        )
+
     def get_scored_labels(self, result: dict, min_score: Optional[float] = -1) -> list:
         """
         Filters the labels based on the minimum score threshold.
@@ -128,19 +470,23 @@ class NeuralNetPyTorch(AbstractNeuralNet):
                                          Defaults to -1.
 
         Returns:
-            list: A list of scored labels.
+            list: A list of scored labels ('label', 'score' and 'box').
 
         """
+        return self.get_detections(result, min_score).to_dicts()
 
-        labels = result["labels"]
-        scores = result["scores"].detach().numpy()
-        boxes = result["boxes"].detach().numpy()
-        scored_labels = []
+    def render(self, result: dict) -> BoxedImage:
+        """
+        Returns the lazy boxed image of a result, the bounding boxes are
+        only drawn when its pixels are requested.
 
-        for i, box in enumerate(boxes):
-            if scores[i] >= min_score:
-                scored_labels.append({"label": labels[i], "score": scores[i]})
-        return scored_labels
+        Args:
+            result (dict): The analysis result dictionary.
+
+        Returns:
+            BoxedImage: The boxed image handle.
+        """
+        return BoxedImage.from_result(result)
 
     def plot(self, result: dict) -> Image.Image:
         """
@@ -153,57 +499,4 @@ class NeuralNetPyTorch(AbstractNeuralNet):
             PIL.Image.Image: The image with bounding boxes plotted.
 
         """
-
-        img = result["image"]
-        labels = result["labels"]
-        boxes = result["boxes"]
-        scores = result["scores"]
-
-        # Format labels to include scores
-        label_strings = [
-            f"{label}: {score:.2f}" for label, score in zip(labels, scores)
-        ]
-
-        # Convert PIL Image to tensor
-        img_tensor = ToTensor()(img)
-        img_tensor = img_tensor.mul(255).byte()
-
-        # Define a palette of vivid dark colors
-        palette = torch.tensor(
-            [
-                [0, 255, 0],  # Green (First one as preferred)
-                [255, 0, 0],  # Red
-                [0, 0, 255],  # Blue
-                [255, 255, 0],  # Yellow
-                [255, 0, 255],  # Magenta
-                [0, 255, 255],  # Cyan
-                [255, 128, 0],  # Orange
-                [128, 0, 255],  # Purple
-                [0, 128, 255],  # Sky Blue
-                [128, 255, 0],  # Lime
-                [0, 255, 128],  # Aqua
-                [255, 0, 128],  # Pink
-            ],
-            dtype=torch.uint8,
-        )
-
-        # Assign a color to each box (cycling through palette)
-        num_boxes = boxes.shape[0]
-        colors = [tuple(palette[i % len(palette)].tolist()) for i in range(num_boxes)]
-
-        # Draw bounding boxes with labels
-        img_tensor = draw_bounding_boxes(
-            img_tensor,
-            boxes,
-            labels=label_strings,
-            colors=colors,  # type: ignore
-            font_size=60,
-            width=10,
-            font="DejaVuSans",
-            fill=False,
-        )
-
-        # Convert tensor back to PIL Image
-        img = ToPILImage()(img_tensor)
-
-        return img
+        return self.render(result).get_image()
@@ -1,11 +1,14 @@
 import logging
 import threading
 import traceback
-import io
-from time import sleep
+from queue import Empty
 from datetime import datetime
-from typing import Optional
+from typing import Optional, Union
 from pycatdetector.channels.AbstractChannel import AbstractChannel
+from pycatdetector.ChannelWorker import ChannelWorker
+from pycatdetector.DetectionLog import DetectionLog
+from pycatdetector.ImageArtifact import ImageArtifact
+from pycatdetector.NotifySchedule import NotifySchedule
 from PIL import Image
 
 
@@ -17,46 +20,73 @@ class Notifier(threading.Thread):
     Attributes:
         detector: The detector object.
         must_stop: A boolean indicating whether the thread must stop.
-        queue_sleep: The sleep time in seconds for empty queue polling.
+        queue_timeout: The max time in seconds to wait for detections.
         channels: A dictionary mapping labels to channel objects.
         logger: The logger object.
         notifications: A dictionary mapping channel IDs
                        to their last notification time.
         detections: The detections queue.
         NOTIFY_DELAY: The delay in seconds for same object detection.
-        notify_window_start: The start time of the notification
-                             window in HH:MM 24h format.
-        notify_window_end: The end time of the notification
-                           window in HH:MM 24h format.
+        notify_window: A dictionary mapping channel names to their
+                       compiled notify windows (NotifySchedule).
     """
 
     NOTIFY_DELAY = 2 * 60  # seconds, less noise for same object detection
 
-    def __init__(self, detections):
+    def __init__(self, detections, log: Optional[DetectionLog] = None):
         """
         Initializes a Notifier object.
 
         Args:
             detections: The detections queue.
+            log: The durable detections log, if enabled the detections
+                 notified by a channel are appended to it (with the channels
+                 deciding to notify them) and the channel workers consume it
+                 (replay after a restart or a channel outage).
         """
         threading.Thread.__init__(self)
         self.logger = logging.getLogger(__name__)
         self.detector = None
         self.must_stop = False
-        self.queue_sleep = 1  # seconds, less queue polling, honor exit signals
+        self.queue_timeout = 1  # seconds, max wait, honor exit signals
         self.channels = {}  # indexed per object label (from the detected object)
         self.notifications = {}
         self.detections = detections
-        self.notify_window = {}  # indexed per channel (class name snake cased)
-
-    def add_channel(self, channel: AbstractChannel, labels: list[str]):
+        self.notify_window = {}  # indexed per channel name, NotifySchedule
+        self.cameras = {}  # indexed per channel, cameras ids (None => all)
+        self.workers = {}  # indexed per channel, ChannelWorker (own queue)
+        self.log = log
+
+    def add_channel(
+        self,
+        channel: AbstractChannel,
+        labels: list[str],
+        cameras: Optional[list[str]] = None,
+        queue_size: int = ChannelWorker.QUEUE_SIZE,
+        image_size: int = 0,
+        image_quality: int = ImageArtifact.QUALITY,
+    ):
         """
         Adds channel used for notifications when labels are detected.
 
         Args:
             channel: The channel instance.
             labels: A list of object labels (detection).
+            cameras: A list of camera ids to notify for (None => all).
+            queue_size: The max pending notifications of the channel worker.
+            image_size: The max width and height of the image sent (0 => full).
+            image_quality: The JPEG quality of the image sent.
         """
+        self.cameras[channel.get_name()] = None if cameras is None else set(cameras)
+        if channel.get_name() not in self.workers:
+            self.workers[channel.get_name()] = ChannelWorker(
+                channel, queue_size, image_size, image_quality, self.log, self.replay
+            )
+        if cameras is not None:
+            self.logger.info(
+                "Channel '%s' will notify for the cameras %s"
+                % (channel.get_name(), repr(cameras))
+            )
         for label in labels:
             self.logger.info(
                 "Channel '%s' will notify for the label '%s'"
@@ -77,18 +107,38 @@ class Notifier(threading.Thread):
         self, channel: AbstractChannel, window_name: str, window_schedule: dict
     ):
         """
-        Sets the channel's notification window (schedule).
+        Sets the channel's notification window (schedule), compiled once
+        into the channel NotifySchedule.
 
         Args:
             channel_name (str): The name of the channel.
             window_name (str): The name of the notification window.
-            window_schedule (dict): The schedule for the notification window.
+            window_schedule (dict): The schedule for the notification window
+                                    ('days', 'start', 'end' and optional
+                                    'timezone', see NotifySchedule).
+
+        Raises:
+            ValueError: If the schedule is invalid.
         """
         channel_name = channel.get_name()
         if channel_name not in self.notify_window:
-            self.notify_window[channel_name] = {}
+            self.notify_window[channel_name] = NotifySchedule()
+
+        self.notify_window[channel_name].add_window(window_name, window_schedule)
 
-        self.notify_window[channel_name][window_name] = window_schedule
+    def is_camera_routed(self, channel: AbstractChannel, camera_id: str) -> bool:
+        """
+        Checks if the channel notifies for detections of the camera.
+
+        Args:
+            channel: The channel instance.
+            camera_id: The id of the camera which took the detection image.
+
+        Returns:
+            A boolean indicating whether the camera is routed to the channel.
+        """
+        cameras = self.cameras.get(channel.get_name())
+        return cameras is None or camera_id in cameras
 
     def is_notify_window_open(self, channel: AbstractChannel) -> bool:
         """
@@ -104,80 +154,79 @@ class Notifier(threading.Thread):
                 % channel_name
             )
             return False
-        else:
-            opened = False
-            for window_name, schedule in self.notify_window[channel_name].items():
-                active_days = schedule["days"].split(",")
-                active_days = [day.strip().lower() for day in active_days]
-                now_day_name = datetime.now().strftime("%a").lower()
-                if now_day_name in active_days:
-                    notify_window_start = schedule["start"]
-                    notify_window_end = schedule["end"]
-                    now = datetime.now()
-                    start = datetime.strptime(notify_window_start, "%H:%M")
-                    start = start.replace(day=now.day, month=now.month, year=now.year)
-                    end = datetime.strptime(notify_window_end, "%H:%M")
-                    end = end.replace(day=now.day, month=now.month, year=now.year)
-                    opened = start <= now <= end
-                    if opened:
-                        self.logger.info(
-                            "Notify window '%s' for channel '%s' is open: %s <= %s <= %s"
-                            % (window_name, channel_name, start, now, end)
-                        )
-                        break
-            return opened
+        window_name = self.notify_window[channel_name].get_open_window()
+        if window_name is not None:
+            self.logger.debug(
+                "Notify window '%s' for channel '%s' is open"
+                % (window_name, channel_name)
+            )
+        return window_name is not None
 
     def run(self):
         """
         Starts the notifier thread.
         """
         self.logger.info("Started Thread ID: %s" % (threading.get_native_id()))
+        for worker in self.workers.values():
+            worker.start()
         while not self.must_stop:
 
-            if self.detections.empty():
-                self.logger.debug(
-                    "Sleeping %.2fs due to empty queue..." % self.queue_sleep
-                )
-                sleep(self.queue_sleep)
-                continue
+            if self.log is not None:
+                self.log.flush()  # batched commit and retention
 
-            detection = self.detections.get(block=False)
-            detected_label = detection["label"]
+            try:
+                detection = self.detections.get(timeout=self.queue_timeout)
+            except Empty:
+                continue  # idle, check stop signal
 
-            if detected_label in self.channels.keys():
+            # Shared by the channels (and the detections of the same frame)
+            artifact = detection.get("artifact")
+            if artifact is None and detection.get("image") is not None:
+                artifact = ImageArtifact(detection["image"])
 
-                for channel in self.channels[detected_label]:
+            if self.log is not None:
+                # Decided now (detection time), consumed by the channel
+                # workers from the log, the image encoded only if notified
+                channels = []
+                for channel in self.channels.get(detection["label"], []):
+                    try:
+                        if self.prepare(channel, detection)[0]:
+                            channels.append(channel.get_name())
+                    except:  # noqa -- flake8 skip
+                        self.logger.error(traceback.format_exc())
+                if len(channels) > 0:
+                    self.log.append(
+                        detection,
+                        artifact.get_data() if artifact is not None else None,
+                        channels,
+                    )
+                continue
 
-                    if self.is_notify_window_open(channel):
-                        self.logger.info(
-                            "Window open for channel '%s'" % channel.get_name()
-                        )
-                    else:
+            for channel in self.channels.get(detection["label"], []):
+                try:
+                    send, content = self.prepare(channel, detection, artifact)
+                    if send and self.workers[channel.get_name()].submit(content):
                         self.logger.info(
-                            "Window closed for channel '%s'" % channel.get_name()
-                        )
-                        continue
-
-                    try:
-                        detected_image = detection["image"]  # numpy array
-                        if self.notify(channel, detected_image):
-                            self.logger.info(
-                                "Notification sent on channel '%s' for %s"
-                                % (
-                                    channel.get_name(),
-                                    "detection: "
-                                    + repr(
-                                        {
-                                            "label": detection["label"],
-                                            "score": detection["score"],
-                                        }
-                                    ),
-                                )
+                            "Notification queued on channel '%s' for %s"
+                            % (
+                                channel.get_name(),
+                                "detection: "
+                                + repr(
+                                    {
+                                        "camera": detection.get("camera", "default"),
+                                        "label": detection["label"],
+                                        "score": detection["score"],
+                                    }
+                                ),
                             )
+                        )
+                except:  # noqa -- flake8 skip
+                    self.logger.error(traceback.format_exc())
 
-                    except:
-                        self.logger.error(traceback.format_exc())
-
+        for worker in self.workers.values():
+            worker.stop()
+        for worker in self.workers.values():
+            worker.join()
         self.logger.info("Stopped.")
 
     def stop(self):
@@ -187,50 +236,154 @@ class Notifier(threading.Thread):
         if not self.must_stop:
             self.logger.info("Stopping...")
             self.must_stop = True
+            self.detections.close()  # release detector if blocked on full queue
         else:
             self.logger.info("Already stopped")
 
+    def prepare(
+        self,
+        channel: AbstractChannel,
+        detection: dict,
+        artifact: Optional[ImageArtifact] = None,
+    ) -> tuple[bool, Optional[dict]]:
+        """
+        Decides if a channel notifies a detection (label and camera routed,
+        notify window open and same object delay elapsed) and prepares the
+        channel content.
+
+        Args:
+            channel: The channel instance.
+            detection: The detection ('label', 'camera' and 'score').
+            artifact: The detection image encodings, if any.
+
+        Returns:
+            A tuple, whether to notify and the channel content (or None).
+        """
+        camera_id = detection.get("camera", "default")
+        if channel not in self.channels.get(detection["label"], []):
+            return False, None
+
+        if not self.is_camera_routed(channel, camera_id):
+            self.logger.debug(
+                "Camera '%s' not routed to channel '%s'"
+                % (camera_id, channel.get_name())
+            )
+            return False, None
+
+        if self.is_notify_window_open(channel):
+            self.logger.info("Window open for channel '%s'" % channel.get_name())
+        else:
+            self.logger.info("Window closed for channel '%s'" % channel.get_name())
+            return False, None
+
+        send, content = self._content(channel, artifact, camera_id)
+        if content is not None and detection.get("timestamp") is not None:
+            content["timestamp"] = detection["timestamp"]  # detection time
+        return send, content
+
+    def replay(
+        self, channel: AbstractChannel, entry: dict
+    ) -> tuple[bool, Optional[dict]]:
+        """
+        Returns whether a channel notifies a logged detection (decided when
+        appended, see DetectionLog) and the channel content, the image named
+        after the detection time.
+
+        Args:
+            channel: The channel instance.
+            entry: The logged detection (see DetectionLog.read).
+
+        Returns:
+            A tuple, whether to notify and the channel content (or None).
+        """
+        camera_id = entry.get("camera") or "default"
+        if entry["channels"] is not None:
+            send = channel.get_name() in entry["channels"]
+        else:  # logged by a previous version, routed channels only
+            send = channel in self.channels.get(
+                entry["label"], []
+            ) and self.is_camera_routed(channel, camera_id)
+        if not send or entry["image"] is None:
+            return send, None
+
+        if entry["timestamp"] is not None:
+            detected = datetime.fromisoformat(entry["timestamp"])
+        else:
+            detected = datetime.fromtimestamp(entry["created"])
+        artifact = ImageArtifact.from_data(entry["image"])
+        content = {
+            "image_artifact": artifact,
+            "image_name": self._image_name(channel, camera_id, artifact, detected),
+        }
+        if entry["timestamp"] is not None:
+            content["timestamp"] = entry["timestamp"]  # detection time
+        return True, content
+
     def notify(
-        self, channel: AbstractChannel, image: Optional[Image.Image] = None
+        self,
+        channel: AbstractChannel,
+        image: Union[Image.Image, ImageArtifact, None] = None,
+        camera_id: str = "default",
     ) -> bool:
         """
-        Sends a notification to the specified channel with attached image.
+        Queues a notification to the specified channel with attached image,
+        sent by the channel worker thread (see ChannelWorker).
 
         Args:
             channel: The channel instance.
-            image (numpy.ndarray): The image to be sent with the notification.
+            image: The image to be sent with the notification, an
+                   ImageArtifact is encoded once for all the channels
+                   (by the first channel worker sending it).
+            camera_id: The id of the camera which took the image, same object
+                       delay is applied per channel and camera.
 
         Returns:
-            A boolean indicating whether the notification was sent.
+            A boolean indicating whether the notification was queued.
+        """
+        if image is not None and not isinstance(image, ImageArtifact):
+            image = ImageArtifact(image)
+        send, content = self._content(channel, image, camera_id)
+        return send and self.workers[channel.get_name()].submit(content)
+
+    def _content(
+        self,
+        channel: AbstractChannel,
+        artifact: Optional[ImageArtifact],
+        camera_id: str,
+    ) -> tuple[bool, Optional[dict]]:
+        """
+        Applies the same object delay (per channel and camera) and returns
+        whether to notify and the channel content (or None without image).
         """
         now = datetime.now()
-        channel_id = str(id(channel))
-        send = True
+        channel_id = str(id(channel)) + "-" + camera_id
         if channel_id in self.notifications:
             last = self.notifications[channel_id]
             delta_seconds = int((now - last).total_seconds())
             if delta_seconds <= self.NOTIFY_DELAY:
-                send = False
-        if send:
-
-            if image is not None:
-
-                image_format = "JPEG"
-                buffer = io.BytesIO()
-                image.save(fp=buffer, format=image_format)
-                image_data = buffer.getvalue()
-
-                image_name = (
-                    channel.get_name()
-                    + "-"
-                    + now.strftime("%Y-%m-%d_%H-%M-%S")
-                    + "."
-                    + image_format.lower()
-                )
-                channel.notify({"image_data": image_data, "image_name": image_name})
-            else:
-                channel.notify()
-
-            self.notifications[channel_id] = now
-
-        return send
+                return False, None
+        self.notifications[channel_id] = now
+
+        if artifact is None:
+            return True, None
+
+        image_name = self._image_name(channel, camera_id, artifact, now)
+        # Encoded by the channel worker (see ChannelWorker.send)
+        return True, {"image_artifact": artifact, "image_name": image_name}
+
+    def _image_name(
+        self,
+        channel: AbstractChannel,
+        camera_id: str,
+        artifact: ImageArtifact,
+        when: datetime,
+    ) -> str:
+        return (
+            channel.get_name()
+            + "-"
+            + camera_id
+            + "-"
+            + when.strftime("%Y-%m-%d_%H-%M-%S")
+            + "."
+            + artifact.get_extension()
+        )
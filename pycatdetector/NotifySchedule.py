@@ -0,0 +1,147 @@
+import bisect
+import numpy as np
+from datetime import datetime
+from time import time
+from typing import Optional
+from zoneinfo import ZoneInfo
+
+
+class NotifySchedule:
+    """
+    The NotifySchedule class represents the notify windows of a channel
+    compiled once into a minute-of-week index (per timezone), checking if
+    a window is open is an array lookup instead of parsing the schedules
+    on every detection.
+
+    A window schedule has the 'days' (e.g. "Mon,Tue,Wed"), the 'start' and
+    'end' times ("HH:MM", both minutes included) and optionally a
+    'timezone' (IANA name, e.g. "Europe/Berlin", default the local one).
+    A window ending before its start crosses midnight (e.g. 22:00 to
+    06:00), its days are the ones it starts on.
+
+    The open state is cached until the next transition (a window opening
+    or closing), so the lookups between transitions are free.
+    """
+
+    DAYS = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+    MINUTES = 7 * 24 * 60  # minutes per week
+    MAX_CACHE = 60 * 60  # seconds, max cached state (e.g. DST changes)
+
+    def __init__(self):
+        self.names = []  # window names, indexed by the index values
+        self.indexes = {}  # indexed per timezone key, window index per minute
+        self.timezones = {}  # indexed per timezone key, tzinfo (None => local)
+        self.transitions = {}  # indexed per timezone key, sorted minutes
+        self.cache = None  # (until timestamp, window name or None)
+
+    def add_window(self, name: str, schedule: dict):
+        """
+        Compiles a window into the index (the first window added wins
+        where windows overlap).
+
+        Args:
+            name (str): The window name.
+            schedule (dict): The window 'days', 'start', 'end' and
+                             optional 'timezone'.
+
+        Raises:
+            ValueError: If the schedule is invalid.
+        """
+        days = [day.strip().lower() for day in str(schedule["days"]).split(",")]
+        for day in days:
+            if day not in self.DAYS:
+                raise ValueError("Invalid day %r in window %r" % (day, name))
+        start = self.parse_time(schedule["start"], name)
+        end = self.parse_time(schedule["end"], name)
+        key = schedule.get("timezone") or ""
+        if key not in self.indexes:
+            self.indexes[key] = np.full(self.MINUTES, -1, dtype=np.int16)
+            try:
+                self.timezones[key] = ZoneInfo(key) if key else None
+            except (KeyError, ValueError):  # ZoneInfoNotFoundError is a KeyError
+                del self.indexes[key]
+                raise ValueError("Invalid timezone %r in window %r" % (key, name))
+
+        index = self.indexes[key]
+        window = len(self.names)
+        self.names.append(name)
+        length = (end - start) % (24 * 60) + 1  # end minute included
+        for day in days:
+            begin = self.DAYS.index(day) * 24 * 60 + start
+            minutes = np.arange(begin, begin + length) % self.MINUTES
+            free = minutes[index[minutes] < 0]
+            index[free] = window
+        changes = np.flatnonzero(index != np.roll(index, 1))
+        self.transitions[key] = changes.tolist()
+        self.cache = None
+
+    @staticmethod
+    def parse_time(value: str, name: str) -> int:
+        """
+        Returns the minute of the day of a "HH:MM" time.
+        """
+        try:
+            hours, minutes = (int(part) for part in str(value).split(":"))
+        except ValueError:
+            raise ValueError("Invalid time %r in window %r" % (value, name))
+        if not (0 <= hours < 24 and 0 <= minutes < 60):
+            raise ValueError("Invalid time %r in window %r" % (value, name))
+        return hours * 60 + minutes
+
+    def get_open_window(self, now: Optional[float] = None) -> Optional[str]:
+        """
+        Returns the name of the open window, None if all are closed.
+
+        Args:
+            now (float): The time (epoch seconds), default now (cached
+                         until the next transition).
+        """
+        if now is not None:
+            return self._lookup(now)[0]
+        timestamp = time()
+        cache = self.cache
+        if cache is None or timestamp >= cache[0]:
+            opened, until = self._lookup(timestamp)
+            cache = self.cache = (until, opened)
+        return cache[1]
+
+    def is_open(self, now: Optional[float] = None) -> bool:
+        """
+        Returns True if a window is open.
+
+        Args:
+            now (float): The time (epoch seconds), default now.
+        """
+        return self.get_open_window(now) is not None
+
+    def get_next_transition(self, now: Optional[float] = None) -> float:
+        """
+        Returns the time (epoch seconds) of the next window opening or
+        closing, at most MAX_CACHE seconds ahead.
+        """
+        return self._lookup(time() if now is None else now)[1]
+
+    def _lookup(self, timestamp: float) -> tuple[Optional[str], float]:
+        """
+        Returns the open window name (or None) and the next transition.
+        """
+        opened, until = None, timestamp + self.MAX_CACHE
+        for key, index in self.indexes.items():
+            local = datetime.fromtimestamp(timestamp, self.timezones[key])
+            minute = local.weekday() * 24 * 60 + local.hour * 60 + local.minute
+            if opened is None and index[minute] >= 0:
+                opened = self.names[index[minute]]
+            until = min(until, self._next_transition(key, minute, local, timestamp))
+        return opened, until
+
+    def _next_transition(
+        self, key: str, minute: int, local: datetime, timestamp: float
+    ) -> float:
+        transitions = self.transitions[key]
+        if len(transitions) == 0:
+            return float("inf")  # always open or always closed
+        i = bisect.bisect_right(transitions, minute)
+        delta = (transitions[i % len(transitions)] - minute) % self.MINUTES
+        delta = delta or self.MINUTES  # a single transition per week
+        minute_begin = timestamp - local.second - local.microsecond / 1e6
+        return minute_begin + delta * 60
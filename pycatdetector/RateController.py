@@ -0,0 +1,195 @@
+import logging
+import threading
+from time import monotonic
+from typing import Optional
+from .Metrics import Metrics
+from .Recorder import Recorder
+
+
+class RateController:
+    """
+    The RateController class adapts the sampling rate of the cameras
+    (Recorder sample_hz) to the measured inference cost, instead of a
+    fixed rate drifting into a full queue on slow hardware (or wasting a
+    fast one).
+
+    A camera samples at its max rate while active (motion or matches seen
+    in the last 'hold' seconds) and at the idle rate otherwise. The total
+    rate is capped by the capacity: the frames per second the detector
+    analyzes within the 'cpu_budget' (fraction of the time spent in
+    inference). The latency (estimated wait of a frame queued now, the
+    backlog analyzed first) above 'target_latency' shrinks the capacity
+    (multiplicative decrease), below it recovers (additive increase).
+
+    Args:
+        target_latency (float): The max seconds from sampling to result.
+        cpu_budget (float): The max fraction (0..1] of the time in inference.
+        idle_hz (float): The frames per second of an inactive camera.
+        hold (float): The seconds a camera stays active after its last
+                      motion or match.
+
+    Raises:
+        ValueError: If an invalid argument is provided.
+    """
+
+    TARGET_LATENCY = 2.0  # seconds
+    CPU_BUDGET = 0.8  # fraction of the time in inference
+    IDLE_HZ = 0.2  # frames per second (one frame every 5 seconds)
+    HOLD = 10  # seconds
+    MIN_HZ = 0.05  # floor of any camera rate (overloaded)
+    SMOOTHING = 0.2  # inference cost moving average weight of a new sample
+    DECREASE = 0.7  # capacity factor when the latency is over the target
+    INCREASE = 0.05  # capacity recovered per update under the target
+    MIN_SCALE = 0.1
+    MIN_CHANGE = 0.05  # min relative rate change applied to a recorder
+
+    def __init__(
+        self,
+        target_latency: float = TARGET_LATENCY,
+        cpu_budget: float = CPU_BUDGET,
+        idle_hz: float = IDLE_HZ,
+        hold: float = HOLD,
+    ):
+        self.logger = logging.getLogger(__name__)
+        if target_latency <= 0:
+            raise ValueError("Invalid target_latency %r" % target_latency)
+        if not 0 < cpu_budget <= 1:
+            raise ValueError("Invalid cpu_budget %r" % cpu_budget)
+        if idle_hz <= 0:
+            raise ValueError("Invalid idle_hz %r" % idle_hz)
+        self.target_latency = target_latency
+        self.cpu_budget = cpu_budget
+        self.idle_hz = idle_hz
+        self.hold = hold
+        self.cameras = {}  # indexed per camera id
+        self.cost = None  # seconds of inference per frame (moving average)
+        self.latency = 0.0
+        self.scale = 1.0  # capacity fraction (latency feedback)
+        self.lock = threading.Lock()
+        self.metrics = Metrics.get_default()
+        self.metrics.describe(
+            "sample_hz", Metrics.GAUGE, "Frames per second sampled (rate controller)"
+        )
+        self.metrics.describe(
+            "rate_latency_seconds", Metrics.GAUGE, "Estimated sampling to result time"
+        )
+
+    def add_camera(self, camera_id: str, recorder: Recorder, max_hz: float):
+        """
+        Adds a camera, its recorder samples between the idle rate and
+        max_hz (e.g. the configured sample_hz), idle until active.
+
+        Args:
+            camera_id (str): The camera id.
+            recorder (Recorder): The camera recorder (sampler).
+            max_hz (float): The frames per second of the active camera.
+        """
+        if max_hz <= 0:
+            raise ValueError("Invalid max_hz %r for %r" % (max_hz, camera_id))
+        with self.lock:
+            self.cameras[camera_id] = {
+                "recorder": recorder,
+                "max_hz": max_hz,
+                "active_until": 0.0,
+                "active": False,
+                "rate": recorder.sample_hz,
+            }
+            self._apply(camera_id, min(self.idle_hz, max_hz))
+
+    def get_rate(self, camera_id: str) -> float:
+        """
+        Returns the current frames per second of a camera.
+        """
+        return self.cameras[camera_id]["rate"]
+
+    def set_active(self, camera_id: str, now: Optional[float] = None):
+        """
+        Marks a camera active (motion or match), for 'hold' seconds, its
+        rate is raised right away.
+
+        Args:
+            camera_id (str): The camera id.
+            now (float): The monotonic time, default now.
+        """
+        now = monotonic() if now is None else now
+        with self.lock:
+            camera = self.cameras.get(camera_id)
+            if camera is None:
+                return
+            camera["active_until"] = now + self.hold
+            if not camera["active"]:
+                self._adjust(now)
+
+    def update(
+        self, seconds: float, frames: int, backlog: int, now: Optional[float] = None
+    ) -> dict:
+        """
+        Feeds an analysis measurement back (see Detector) and adjusts the
+        cameras rate.
+
+        Args:
+            seconds (float): The analysis time of the batch.
+            frames (int): The frames of the batch.
+            backlog (int): The frames still queued (all the cameras).
+            now (float): The monotonic time, default now.
+
+        Returns:
+            dict: The frames per second, indexed per camera id.
+        """
+        if frames <= 0:
+            return {}
+        now = monotonic() if now is None else now
+        with self.lock:
+            cost = seconds / frames
+            if self.cost is None:
+                self.cost = cost
+            else:
+                self.cost += self.SMOOTHING * (cost - self.cost)
+
+            self.latency = (backlog + frames) * self.cost
+            if self.latency > self.target_latency:
+                self.scale = max(self.MIN_SCALE, self.scale * self.DECREASE)
+            else:
+                self.scale = min(1.0, self.scale + self.INCREASE)
+            self.metrics.set("rate_latency_seconds", self.latency)
+            return self._adjust(now)
+
+    def _adjust(self, now: float) -> dict:
+        """
+        Sets the cameras rate, wanted (max or idle) rates scaled down to
+        the capacity if needed (lock held).
+        """
+        wanted = {}
+        for camera_id, camera in self.cameras.items():
+            active = camera["active_until"] > now
+            if active != camera["active"]:
+                camera["active"] = active
+                self.logger.info(
+                    "Camera '%s' %s" % (camera_id, "active" if active else "idle")
+                )
+            if active:
+                wanted[camera_id] = camera["max_hz"]
+            else:
+                wanted[camera_id] = min(self.idle_hz, camera["max_hz"])
+
+        ratio = 1.0
+        total = sum(wanted.values())
+        if self.cost is not None and self.cost > 0 and total > 0:
+            capacity = self.cpu_budget / self.cost * self.scale
+            ratio = min(1.0, capacity / total)
+
+        for camera_id, rate in wanted.items():
+            self._apply(camera_id, max(self.MIN_HZ, rate * ratio))
+        return {camera_id: camera["rate"] for camera_id, camera in self.cameras.items()}
+
+    def _apply(self, camera_id: str, rate: float):
+        camera = self.cameras[camera_id]
+        if abs(rate - camera["rate"]) <= camera["rate"] * self.MIN_CHANGE:
+            return  # not worth it (noise)
+        self.logger.debug(
+            "Camera '%s' rate: %.2fHz => %.2fHz (latency %.2fs, scale %.2f)"
+            % (camera_id, camera["rate"], rate, self.latency, self.scale)
+        )
+        camera["rate"] = rate
+        camera["recorder"].set_sample_hz(rate)
+        self.metrics.set("sample_hz", rate, camera=camera_id)
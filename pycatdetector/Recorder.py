@@ -1,29 +1,95 @@
 import cv2
 import threading
 import logging
-from time import sleep
-from queue import SimpleQueue
+from time import sleep, monotonic
+from typing import Callable, Optional
 from urllib.parse import urlparse
+from .BoundedQueue import BoundedQueue
+from .Metrics import Metrics
 
 
 class Recorder(threading.Thread):
+    """
+    The Recorder class represents a thread that reads the frames of a
+    camera RTSP stream, sampling them at 'sample_hz' (wall-clock) into
+    the images queue. Frames between samples are grabbed but not decoded.
+
+    Args:
+        rtspUrl (str): The camera RTSP stream URL.
+        camera_id (str): The camera unique identifier.
+        images (BoundedQueue): The images queue, a single-slot queue with
+                               drop_oldest policy gives latest-frame-wins.
+        sample_hz (float): The frames per second sent to the images queue.
+    """
 
     RECONNECT_DELAY = 10  # seconds
     CORRUPTED_DELAY = 1
     CORRUPTED_MAX_FRAMES = 60  # max corrupted frames (1 frame <=> 1 sec)
+    QUEUE_SIZE = 10  # default images queue size (frames)
+    SAMPLE_HZ = 1.0  # default sampled frames per second
     must_stop = False
 
-    def __init__(self, rtspUrl):
-        threading.Thread.__init__(self)
+    def __init__(
+        self,
+        rtspUrl,
+        camera_id="default",
+        images: Optional[BoundedQueue] = None,
+        sample_hz: float = SAMPLE_HZ,
+    ):
+        threading.Thread.__init__(self, name="Recorder-" + camera_id)
         self.rtspUrl = rtspUrl
+        self.camera_id = camera_id
         self.logger = logging.getLogger(__name__)
-        self.images = SimpleQueue()
+        if images is None:
+            images = BoundedQueue(self.QUEUE_SIZE, BoundedQueue.DROP_OLDEST, "images")
+        self.images = images
+        if sample_hz <= 0:
+            raise ValueError("Invalid sample_hz %r for %r" % (sample_hz, camera_id))
+        self.sample_hz = sample_hz
+        self.listeners = []  # called with (camera_id, frame) per sampled frame
+        self.metrics = Metrics.get_default()
+        self.metrics.describe(
+            "frames_read_total", Metrics.COUNTER, "Frames grabbed from the stream"
+        )
+        self.metrics.describe(
+            "frames_sampled_total", Metrics.COUNTER, "Frames sent to the images queue"
+        )
+        self.metrics.describe(
+            "frames_corrupted_total", Metrics.COUNTER, "Failed or corrupted frames"
+        )
+        self.metrics.describe(
+            "reconnects_total", Metrics.COUNTER, "Camera stream (re)connections"
+        )
 
     def get_images(self):
         return self.images
 
+    def get_camera_id(self) -> str:
+        return self.camera_id
+
+    def set_sample_hz(self, sample_hz: float):
+        """
+        Sets the frames per second sent to the images queue, applied from
+        the next frame while recording (e.g. by the RateController).
+        """
+        if sample_hz <= 0:
+            raise ValueError(
+                "Invalid sample_hz %r for %r" % (sample_hz, self.camera_id)
+            )
+        self.sample_hz = sample_hz
+
+    def add_listener(self, listener: Callable[[str, object], None]):
+        """
+        Adds a callable invoked with the camera id and every sampled frame
+        (e.g. ClipRecorder.add_frame), it must not block.
+        """
+        self.listeners.append(listener)
+
     def run(self):
-        self.logger.info("Starting with Thread ID: %s" % (threading.get_native_id()))
+        self.logger.info(
+            "Starting camera '%s' with Thread ID: %s"
+            % (self.camera_id, threading.get_native_id())
+        )
         self._record()
         self.logger.info("Stopped.")
 
@@ -31,6 +97,7 @@ class Recorder(threading.Thread):
         if not self.must_stop:
             self.logger.info("Stopping...")
             self.must_stop = True
+            self.images.close()  # release if blocked on a full queue
         else:
             self.logger.info("Already stopped.")
 
@@ -57,6 +124,7 @@ class Recorder(threading.Thread):
 
         while not self.must_stop:
             conn_error = False
+            self.metrics.inc("reconnects_total", camera=self.camera_id)
 
             cap = cv2.VideoCapture(self.rtspUrl, cv2.CAP_FFMPEG)
 
@@ -82,24 +150,30 @@ class Recorder(threading.Thread):
                     "Connected successfully. Resolution: %dx%d, Reported FPS: %.1f"
                     % (width, height, fps)
                 )
-                reads = 0
                 total_reads = 0
                 total_writes = 0
                 corrupted_count = 0
-                frames_to_skip = fps - 1
+                last_sample = float("-inf")  # first frame is sampled
 
-                self.logger.info("Connected. FPS: %i, SKIP: %i" % (fps, frames_to_skip))
+                self.logger.info(
+                    "Connected. FPS: %.1f, Sample: %.2fHz" % (fps, self.sample_hz)
+                )
 
                 while not self.must_stop:
                     try:
-                        ret, frame = cap.read()  # return numpy.array
-                        reads += 1
+                        # Advance the stream without decoding (cheap), only
+                        # the frames to be sampled are decoded (retrieve)
+                        ret = cap.grab()
                         total_reads += 1
+                        self.metrics.inc("frames_read_total", camera=self.camera_id)
 
                         # Check if read was successful
                         if not ret:
                             self.logger.warning("Failed to read frame from stream")
                             corrupted_count += 1
+                            self.metrics.inc(
+                                "frames_corrupted_total", camera=self.camera_id
+                            )
                             if corrupted_count > self.CORRUPTED_MAX_FRAMES:
                                 self.logger.error(
                                     "Too many failed reads, reconnecting..."
@@ -107,13 +181,27 @@ class Recorder(threading.Thread):
                                 break
                             continue
 
-                        corrupted = frame is None or len(frame.shape) != 3
+                        # Read per frame, the rate may change (set_sample_hz)
+                        sample_period = 1 / self.sample_hz
+                        now = monotonic()
+                        if now - last_sample < sample_period:
+                            continue  # skip frame (not decoded)
+                        last_sample += sample_period
+                        if last_sample + sample_period <= now:
+                            # Fell behind (e.g. stalled stream), no catch up burst
+                            last_sample = now
+
+                        ret, frame = cap.retrieve()  # return numpy.array
+                        corrupted = not ret or frame is None or len(frame.shape) != 3
                     except Exception as e:
                         self.logger.error("Error reading frame: %s" % (e))
                         break  # Exit inner loop to reconnect
 
                     if corrupted:
                         corrupted_count += 1
+                        self.metrics.inc(
+                            "frames_corrupted_total", camera=self.camera_id
+                        )
                         if corrupted_count > self.CORRUPTED_MAX_FRAMES:
                             self.logger.error(
                                 "Reached max amount of corrupted frames."
@@ -122,13 +210,14 @@ class Recorder(threading.Thread):
                             )
                             break  # retry conn
                         else:
-                            self.logger.warn(
-                                "Bad: %i/%i, R: %i, W: %i, Q: %i"
+                            self.logger.warning(
+                                "Bad: %i/%i, R: %i, W: %i, D: %i, Q: %i"
                                 % (
                                     corrupted_count,
                                     self.CORRUPTED_MAX_FRAMES,
                                     total_reads,
                                     total_writes,
+                                    self.images.dropped,
                                     self.images.qsize(),
                                 )
                             )
@@ -136,34 +225,34 @@ class Recorder(threading.Thread):
                     else:
                         corrupted_count = 0  # reset counter
 
-                        if reads % frames_to_skip == 0:
-                            if greyscale:
-                                frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-                            if saveImage:
-                                cv2.imwrite(
-                                    "recording/opencv/imgx-"
-                                    + str(total_reads)
-                                    + ".jpg",
-                                    frame,
-                                )
-                            if showVisor:
-                                cv2.imshow("frame", frame)
-                                if cv2.waitKey(1) & 0xFF == ord("q"):
-                                    break
-
-                            reads = 0
-                            total_writes += 1
-                            self.images.put(frame)
-                            self.logger.debug(
-                                "Bad: %i/%i, R: %i, W: %i, Q: %i"
-                                % (
-                                    corrupted_count,
-                                    self.CORRUPTED_MAX_FRAMES,
-                                    total_reads,
-                                    total_writes,
-                                    self.images.qsize(),
-                                )
+                        if greyscale:
+                            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+                        if saveImage:
+                            cv2.imwrite(
+                                "recording/opencv/imgx-" + str(total_reads) + ".jpg",
+                                frame,
+                            )
+                        if showVisor:
+                            cv2.imshow("frame", frame)
+                            if cv2.waitKey(1) & 0xFF == ord("q"):
+                                break
+
+                        total_writes += 1
+                        self.images.put(frame)
+                        for listener in self.listeners:
+                            listener(self.camera_id, frame)
+                        self.metrics.inc("frames_sampled_total", camera=self.camera_id)
+                        self.logger.debug(
+                            "Bad: %i/%i, R: %i, W: %i, D: %i, Q: %i"
+                            % (
+                                corrupted_count,
+                                self.CORRUPTED_MAX_FRAMES,
+                                total_reads,
+                                total_writes,
+                                self.images.dropped,
+                                self.images.qsize(),
                             )
+                        )
 
             cap.release()
             if showVisor:
@@ -0,0 +1,139 @@
+import logging
+import threading
+from time import monotonic
+from queue import Empty
+from typing import Optional
+from .BoundedQueue import BoundedQueue
+
+
+class Scheduler:
+    """
+    The Scheduler class multiplexes the image queues of several cameras
+    (one Recorder per camera) into a single source for the Detector, so
+    one loaded neural network serves every camera.
+
+    Queues are served using smooth weighted round-robin, a camera with
+    weight 2 gets twice the inference slots of a camera with weight 1
+    while both have images queued, idle cameras don't consume slots.
+
+    Attributes:
+        cameras (dict): Per camera id, its image queue, weight and
+                        current (smooth weighted round-robin) credit.
+        ready (Condition): Notified each time an image is queued.
+    """
+
+    def __init__(self):
+        """
+        Initializes an empty Scheduler (without cameras).
+        """
+        self.logger = logging.getLogger(__name__)
+        self.cameras = {}
+        self.ready = threading.Condition()
+
+    def add_camera(self, camera_id: str, images: BoundedQueue, weight: int = 1):
+        """
+        Adds a camera image queue to be served by the scheduler.
+
+        Args:
+            camera_id (str): The camera unique identifier.
+            images (BoundedQueue): The images queue of the camera's recorder.
+            weight (int): The relative share of inference slots (>= 1).
+
+        Raises:
+            ValueError: If the camera id is duplicated or weight is invalid.
+        """
+        if camera_id in self.cameras:
+            raise ValueError("Duplicated camera id " + repr(camera_id))
+        if weight < 1:
+            raise ValueError("Invalid weight %s for camera %r" % (weight, camera_id))
+        self.cameras[camera_id] = {"images": images, "weight": weight, "current": 0}
+        images.add_listener(self._on_image)
+        self.logger.info("Camera '%s' added with weight %i" % (camera_id, weight))
+
+    def _on_image(self):
+        """
+        Wakes up a consumer waiting for images (see get).
+        """
+        with self.ready:
+            self.ready.notify()
+
+    def get_camera_ids(self) -> list[str]:
+        """
+        Returns the list of camera ids.
+        """
+        return list(self.cameras.keys())
+
+    def empty(self) -> bool:
+        """
+        Returns True if all the camera queues are empty.
+        """
+        return all(camera["images"].empty() for camera in self.cameras.values())
+
+    def qsize(self) -> int:
+        """
+        Returns the total number of queued images across all cameras.
+        """
+        return sum(camera["images"].qsize() for camera in self.cameras.values())
+
+    def get_nowait(self) -> tuple[str, object]:
+        """
+        Picks the next image using smooth weighted round-robin over
+        the cameras with queued images.
+
+        Returns:
+            tuple: The camera id and the image.
+
+        Raises:
+            Empty: If all the camera queues are empty.
+        """
+        with self.ready:
+            ready = [
+                (camera_id, camera)
+                for camera_id, camera in self.cameras.items()
+                if not camera["images"].empty()
+            ]
+            if len(ready) == 0:
+                raise Empty
+
+            total = 0
+            selected_id, selected = ready[0]
+            for camera_id, camera in ready:
+                camera["current"] += camera["weight"]
+                total += camera["weight"]
+                if camera["current"] > selected["current"]:
+                    selected_id, selected = camera_id, camera
+            selected["current"] -= total
+
+            return selected_id, selected["images"].get(False)
+
+    def get(
+        self, block: bool = True, timeout: Optional[float] = None
+    ) -> tuple[str, object]:
+        """
+        Gets the next image from the cameras queues (see get_nowait).
+
+        Args:
+            block (bool): Wait until an image is available.
+            timeout (float): The maximum time in seconds to wait.
+
+        Returns:
+            tuple: The camera id and the image.
+
+        Raises:
+            Empty: If no image is available (after the timeout if blocking).
+        """
+        deadline = None if timeout is None else monotonic() + timeout
+        with self.ready:
+            while True:
+                try:
+                    return self.get_nowait()
+                except Empty:
+                    if not block:
+                        raise
+                    if deadline is None:
+                        self.ready.wait()
+                    else:
+                        remaining = deadline - monotonic()
+                        if remaining <= 0:
+                            raise
+                        self.ready.wait(remaining)
@@ -0,0 +1,37 @@
+import numpy as np
+from dataclasses import dataclass
+
+
+@dataclass
+class ScoredLabels:
+    """
+    The ScoredLabels class represents the detections of an analysis result
+    kept after filtering (see AbstractNeuralNet.get_detections), as
+    parallel arrays instead of a dict per detection.
+
+    Attributes:
+        labels (list[str]): The detected class labels (e.g. "cat").
+        classes (numpy.ndarray): The detected class indexes (int64, N).
+        scores (numpy.ndarray): The detection scores (float32, N).
+        boxes (numpy.ndarray): The boxes [x1, y1, x2, y2] (float32, N x 4).
+    """
+
+    labels: list[str]
+    classes: np.ndarray
+    scores: np.ndarray
+    boxes: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def to_dicts(self) -> list[dict]:
+        """
+        Returns a dict per detection ('label', 'score' and 'box'), the
+        base of the detections sent to the notifier.
+        """
+        return [
+            {"label": label, "score": float(score), "box": box}
+            for label, score, box in zip(
+                self.labels, self.scores.tolist(), self.boxes.tolist()
+            )
+        ]
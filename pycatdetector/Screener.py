@@ -1,8 +1,9 @@
 import logging
 import matplotlib
 import matplotlib.pyplot as plt
-from time import sleep
-from queue import SimpleQueue
+from queue import Empty
+from .BoundedQueue import BoundedQueue
+from .BoxedImage import BoxedImage
 
 
 class Screener:
@@ -10,21 +11,23 @@ class Screener:
     A class that represents a image screener for PyCatDetector.
 
     Attributes:
-        images (SimpleQueue): A queue containing images from the detector.
+        images (BoundedQueue): A queue containing images from the detector.
         must_stop (bool): flag indicating whether the thread must stop.
         logger (object): logger object for logging messages.
-        SLEEP_TIME (float): sleep time in seconds between image updates.
+        QUEUE_TIMEOUT (float): max wait in seconds for images between
+                               window events processing.
     """
 
-    SLEEP_TIME = 0.5  # seconds
+    QUEUE_TIMEOUT = 0.5  # seconds
 
-    def __init__(self, images: SimpleQueue):
+    def __init__(self, images: BoundedQueue):
         """
         Initializes a new instance of the Screener class.
 
         Args:
-            images (SimpleQueue): A queue containing images from the detector,
-                                  images are PIL.Image.Image objects.
+            images (BoundedQueue): A queue containing images from the detector,
+                                  images are PIL.Image.Image or BoxedImage
+                                  objects.
         """
         self.images = images
         self.must_stop = False
@@ -63,16 +66,16 @@ class Screener:
         ax = fig.add_subplot()
         imgs = self.images
         while not self.must_stop:
+            try:
+                img = imgs.get(timeout=self.QUEUE_TIMEOUT)
+            except Empty:
+                fig.canvas.flush_events()  # keep the window responsive
+                continue
+            if isinstance(img, BoxedImage):
+                img = img.get_image()  # drawn when shown
             ax.clear()
-            if not imgs.empty():
-                img = imgs.get(block=False)
-                ax.imshow(img)
-                fig.canvas.draw()
-                fig.canvas.flush_events()
-            else:
-                self.logger.debug(
-                    "Sleeping %.2f, due to empty queue..." % self.SLEEP_TIME
-                )
-                sleep(self.SLEEP_TIME)
+            ax.imshow(img)
+            fig.canvas.draw()
+            fig.canvas.flush_events()
         plt.close("all")
         self.logger.info("Closed.")
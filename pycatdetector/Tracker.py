@@ -0,0 +1,154 @@
+import numpy as np
+from time import monotonic
+from typing import Optional
+
+
+class Tracker:
+    """
+    The Tracker class represents a lightweight multi-object tracker of a
+    camera, the detections of consecutive frames are associated to tracks
+    by label and bounding box overlap (IoU, greedy best match first), so
+    an object staying in front of the camera is a single track instead of
+    a new detection per frame:
+    - https://en.wikipedia.org/wiki/Jaccard_index
+
+    A track starts (enter event) with the first unmatched detection and
+    ends (leave event) when it wasn't seen for 'max_age' seconds and in
+    'min_misses' frames. With a motion gate (see MotionGate) a static scene
+    sends no frames until the heartbeat, the time gated isn't evidence the
+    object left: a still object missed in a single heartbeat frame keeps its
+    track (GATED_MIN_MISSES), a leaving object moves and sends frames.
+
+    Args:
+        iou_threshold (float): The min IoU to associate a detection to a
+                               track (0 => any detection of the same label
+                               continues the track).
+        max_age (float): The seconds a track is kept without detections.
+        min_misses (int): The frames without detections ending a track.
+    """
+
+    IOU_THRESHOLD = 0.3
+    MAX_AGE = 10  # seconds
+    MIN_MISSES = 1  # frames
+    GATED_MIN_MISSES = 3  # frames, camera behind a motion gate
+
+    def __init__(
+        self,
+        iou_threshold: float = IOU_THRESHOLD,
+        max_age: float = MAX_AGE,
+        min_misses: int = MIN_MISSES,
+    ):
+        if not 0 <= iou_threshold <= 1:
+            raise ValueError("Invalid iou_threshold %r" % iou_threshold)
+        if max_age < 0:
+            raise ValueError("Invalid max_age %r" % max_age)
+        if min_misses < 1:
+            raise ValueError("Invalid min_misses %r" % min_misses)
+        self.iou_threshold = iou_threshold
+        self.max_age = max_age
+        self.min_misses = min_misses
+        self.tracks = {}  # indexed per track id
+        self.next_id = 1
+
+    def get_tracks(self) -> list[dict]:
+        """
+        Returns the live tracks ('id', 'label', 'box', 'score', 'begin',
+        'last_seen', 'hits' and 'misses').
+        """
+        return list(self.tracks.values())
+
+    def update(
+        self, detections: list[dict], now: Optional[float] = None
+    ) -> tuple[list[dict], list[dict]]:
+        """
+        Associates the detections of a frame to the tracks, each detection
+        gets its 'track_id' and 'track_new' (True if it started the track)
+        keys, and expires the tracks not seen for max_age seconds (and
+        min_misses frames).
+
+        Args:
+            detections (list): The detections of the frame ('label' and
+                               'box' [x1, y1, x2, y2] keys, 'score').
+            now (float): The frame time (monotonic seconds), default now.
+
+        Returns:
+            tuple: The started and the ended tracks.
+        """
+        if now is None:
+            now = monotonic()
+        started = []
+        tracks = list(self.tracks.values())
+        matched, continued = set(), set()  # detection and track indexes
+        if len(tracks) > 0 and len(detections) > 0:
+            ious = iou(
+                np.array([d["box"] for d in detections], dtype=np.float64),
+                np.array([t["box"] for t in tracks], dtype=np.float64),
+            )
+            labels = np.array([d["label"] for d in detections], dtype=object)
+            track_labels = np.array([t["label"] for t in tracks], dtype=object)
+            ious[labels[:, None] != track_labels[None, :]] = -1
+            # Greedy: the best overlapping pairs first
+            for flat in np.argsort(-ious, axis=None):
+                i, j = np.unravel_index(flat, ious.shape)
+                if ious[i, j] < 0 or ious[i, j] < self.iou_threshold:  # sorted
+                    break
+                if i in matched or j in continued:
+                    continue
+                self._continue(tracks[j], detections[i], now)
+                matched.add(i)
+                continued.add(j)
+        for i, detection in enumerate(detections):
+            if i not in matched:
+                started.append(self._start(detection, now))
+        ended = []
+        for j, track in enumerate(tracks):
+            if j in continued:
+                continue
+            track["misses"] += 1
+            if track["misses"] >= self.min_misses:
+                if now - track["last_seen"] > self.max_age:
+                    ended.append(track)
+        for track in ended:
+            del self.tracks[track["id"]]
+        return started, ended
+
+    def _start(self, detection: dict, now: float) -> dict:
+        track = {
+            "id": self.next_id,
+            "label": detection["label"],
+            "box": list(detection["box"]),
+            "score": float(detection["score"]),
+            "begin": now,
+            "last_seen": now,
+            "hits": 1,
+            "misses": 0,  # frames since last seen
+        }
+        self.next_id += 1
+        self.tracks[track["id"]] = track
+        detection["track_id"] = track["id"]
+        detection["track_new"] = True
+        return track
+
+    def _continue(self, track: dict, detection: dict, now: float):
+        track["box"] = list(detection["box"])
+        track["score"] = max(track["score"], float(detection["score"]))
+        track["last_seen"] = now
+        track["hits"] += 1
+        track["misses"] = 0
+        detection["track_id"] = track["id"]
+        detection["track_new"] = False
+
+
+def iou(boxes_a: np.ndarray, boxes_b: np.ndarray) -> np.ndarray:
+    """
+    Returns the IoU matrix (N x M) of two arrays of [x1, y1, x2, y2] boxes.
+    """
+    x1 = np.maximum(boxes_a[:, None, 0], boxes_b[None, :, 0])
+    y1 = np.maximum(boxes_a[:, None, 1], boxes_b[None, :, 1])
+    x2 = np.minimum(boxes_a[:, None, 2], boxes_b[None, :, 2])
+    y2 = np.minimum(boxes_a[:, None, 3], boxes_b[None, :, 3])
+    intersection = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (boxes_a[:, 2] - boxes_a[:, 0]) * (boxes_a[:, 3] - boxes_a[:, 1])
+    area_b = (boxes_b[:, 2] - boxes_b[:, 0]) * (boxes_b[:, 3] - boxes_b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - intersection
+    return np.where(union > 0, intersection / np.maximum(union, 1e-9), 0.0)
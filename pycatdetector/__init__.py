@@ -1,21 +1,69 @@
 # Package pycatdetector
 # https://docs.python.org/3/tutorial/modules.html
-from .Config import Config
-from .Detector import Detector
-from .Encoder import Encoder
-from .AbstractNeuralNet import AbstractNeuralNet
-from .NeuralNetPyTorch import NeuralNetPyTorch
-from .Notifier import Notifier
-from .Recorder import Recorder
-from .Screener import Screener
+# The classes are imported on first use, see LazyPackage
+import sys
+from typing import TYPE_CHECKING
+from .LazyPackage import LazyPackage
+
+if TYPE_CHECKING:
+    from .Config import Config
+    from .Analyzer import Analyzer
+    from .BoundedQueue import BoundedQueue
+    from .BoxedImage import BoxedImage
+    from .ChannelWorker import ChannelWorker
+    from .ClipRecorder import ClipRecorder
+    from .DetectionLog import DetectionLog
+    from .Detector import Detector
+    from .Encoder import Encoder
+    from .EncoderWorker import EncoderWorker
+    from .FileReader import FileReader
+    from .FrameRegion import FrameRegion
+    from .ImageArtifact import ImageArtifact
+    from .AbstractNeuralNet import AbstractNeuralNet
+    from .NeuralNetPyTorch import NeuralNetPyTorch
+    from .NeuralNetOnnx import NeuralNetOnnx
+    from .NeuralNetProcessPool import NeuralNetProcessPool
+    from .ModelExporter import ModelExporter
+    from .Metrics import Metrics
+    from .MetricsServer import MetricsServer
+    from .MotionGate import MotionGate
+    from .Notifier import Notifier
+    from .RateController import RateController
+    from .Recorder import Recorder
+    from .Scheduler import Scheduler
+    from .ScoredLabels import ScoredLabels
+    from .Screener import Screener
+    from .Tracker import Tracker
 
 __all__ = [
     "Config",
+    "Analyzer",
+    "BoundedQueue",
+    "BoxedImage",
+    "ChannelWorker",
+    "ClipRecorder",
+    "DetectionLog",
     "Detector",
     "Encoder",
+    "EncoderWorker",
+    "FileReader",
+    "FrameRegion",
+    "ImageArtifact",
     "AbstractNeuralNet",
     "NeuralNetPyTorch",
+    "NeuralNetOnnx",
+    "NeuralNetProcessPool",
+    "ModelExporter",
+    "Metrics",
+    "MetricsServer",
+    "MotionGate",
     "Notifier",
+    "RateController",
     "Recorder",
+    "Scheduler",
+    "ScoredLabels",
     "Screener",
+    "Tracker",
 ]
+
+sys.modules[__name__].__class__ = LazyPackage
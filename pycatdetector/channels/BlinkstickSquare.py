@@ -2,6 +2,7 @@ import requests
 import logging
 from typing import Optional, Dict, Any
 from .AbstractChannel import AbstractChannel
+from .HttpClient import HttpClient
 
 
 class BlinkstickSquare(AbstractChannel):
@@ -20,7 +21,7 @@ class BlinkstickSquare(AbstractChannel):
         self.url = config.get("url")
         self.querystring = config.get("querystring")
         self.authorization = config.get("authorization")
-        self.timeout = config.get("timeout")
+        self.http = HttpClient(config)
         self.logger = logging.getLogger(__name__)
 
     def get_name(self) -> str:
@@ -54,7 +55,7 @@ class BlinkstickSquare(AbstractChannel):
                 headers["Authorization"] = self.authorization
 
             # Make the GET request
-            response = requests.get(full_url, headers=headers, timeout=self.timeout)
+            response = self.http.get(full_url, headers=headers)
 
             if response.status_code == 200:
                 self.logger.info(
@@ -1,8 +1,9 @@
 import logging
 from datetime import datetime
 from typing import Optional, Dict, Any
-from discord_webhook import DiscordWebhook as discord_webhook
+import json
 from .AbstractChannel import AbstractChannel  # Import the abstract base class
+from .HttpClient import HttpClient
 
 
 class DiscordWebhook(AbstractChannel):
@@ -26,6 +27,7 @@ class DiscordWebhook(AbstractChannel):
         self.logger = logging.getLogger(__name__)
         self.url: str = str(config.get("url"))
         self.message: str = str(config.get("message"))
+        self.http = HttpClient(config)
 
     def get_name(self) -> str:
         """
@@ -47,7 +49,7 @@ class DiscordWebhook(AbstractChannel):
 
         content = str(datetime.now()) + " - " + content
 
-        webhook = discord_webhook(url=self.url, content=content)
+        payload = {"content": content}
 
         if (
             custom_content
@@ -58,7 +60,11 @@ class DiscordWebhook(AbstractChannel):
             image_data = custom_content["image_data"]
             image_name = custom_content["image_name"]
 
-            webhook.add_file(file=image_data, filename=image_name)
+            # Multipart upload, the message goes in 'payload_json'
+            files = {
+                "payload_json": (None, json.dumps(payload)),
+                "files[0]": (image_name, image_data),
+            }
 
             self.logger.info(
                 "Request: URL:"
@@ -68,12 +74,13 @@ class DiscordWebhook(AbstractChannel):
                 + ", Image: "
                 + image_name
             )
+            response = self.http.post(self.url, files=files)
         else:
             self.logger.info(
                 "Request: URL:" + self.url + ", Message: " + content + ", Image: None"
             )
+            response = self.http.post(self.url, json=payload)
 
-        response = webhook.execute()
         self.logger.info("Response: " + repr(response))
 
         return response.ok
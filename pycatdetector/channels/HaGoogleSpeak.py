@@ -1,8 +1,8 @@
 import logging
-from time import sleep
-from requests import post, get
+import threading
 from typing import Optional, Dict, Any
 from .AbstractChannel import AbstractChannel  # Import the abstract base class
+from .HttpClient import HttpClient
 
 
 class HaGoogleSpeak(AbstractChannel):  # Inherit from AbstractChannel
@@ -44,6 +44,10 @@ class HaGoogleSpeak(AbstractChannel):  # Inherit from AbstractChannel
         self.media_player_entity_id = self.config["media_player_entity_id"]
         self.volume_level = self.config["volume_level"]
         self.message = self.config["message"]
+        self.http = HttpClient(config)  # keep-alive, 3 API calls per notify
+        self.lock = threading.Lock()
+        self.restore_timer: Optional[threading.Timer] = None
+        self.restore_volume: Optional[float] = None  # volume before speaking
 
     def get_name(self) -> str:
         """
@@ -59,10 +63,10 @@ class HaGoogleSpeak(AbstractChannel):  # Inherit from AbstractChannel
         if method == "post":
             self.logger.info("POST: %s" % url)
             self.logger.debug("DATA: %s" % repr(data))
-            response = post(url, headers=headers, json=data)
+            response = self.http.post(url, headers=headers, json=data)
         elif method == "get":
             self.logger.info("GET: %s" % url)
-            response = get(url, headers=headers)
+            response = self.http.get(url, headers=headers)
         else:
             raise ValueError("Invalid HTTP method '%s'" % method)
 
@@ -126,7 +130,14 @@ class HaGoogleSpeak(AbstractChannel):  # Inherit from AbstractChannel
         """
         Send a notification by setting the volume and speaking a text message.
         """
-        current_volume = self._get_volume()  # Save the current volume
+        with self.lock:
+            if self.restore_timer is not None:
+                # Still speaking, keep the volume saved before the first one
+                self.restore_timer.cancel()
+                self.restore_timer = None  # a fired one won't restore now
+                current_volume = self.restore_volume
+            else:
+                current_volume = self._get_volume()  # Save the current volume
         self._set_volume(self.volume_level)  # Set the volume to desired level
 
         if isinstance(custom_content, dict) and "message" in custom_content:
@@ -137,7 +148,30 @@ class HaGoogleSpeak(AbstractChannel):  # Inherit from AbstractChannel
         notified = self._speak(message)
 
         if current_volume is not None:
-            sleep(self._calculate_speech_time(message) * 1.1)  # +10% delay
-            self._set_volume(current_volume)  # Restore the volume
+            # Restore the volume once spoken (+10% delay), without blocking
+            with self.lock:
+                self.restore_volume = current_volume
+                self.restore_timer = threading.Timer(
+                    self._calculate_speech_time(message) * 1.1,
+                    self._restore_volume,
+                )
+                self.restore_timer.daemon = True
+                self.restore_timer.start()
 
         return notified
+
+    def _restore_volume(self):
+        """
+        Restores the volume saved before speaking (deferred by notify).
+        """
+        with self.lock:
+            if threading.current_thread() is not self.restore_timer:
+                return  # replaced by a newer message
+            volume = self.restore_volume
+            self.restore_timer = None
+            self.restore_volume = None
+        if volume is not None:
+            try:
+                self._set_volume(volume)
+            except Exception as e:
+                self.logger.error("Failed to restore volume level: %s" % e)
@@ -0,0 +1,71 @@
+import logging
+import requests
+from requests.adapters import HTTPAdapter
+from typing import Dict, Any
+from urllib3.util.retry import Retry
+
+
+class HttpClient:
+    """
+    The HTTP client of a channel (each channel builds its own), a
+    per-channel pooled session: a requests session with keep-alive
+    connections (no TCP/TLS handshake per notification), a default
+    timeout and retries with exponential backoff:
+    - https://requests.readthedocs.io/en/latest/user/advanced/#session-objects
+    - https://urllib3.readthedocs.io/en/stable/reference/urllib3.util.html
+
+    Connection errors are retried for every method, error statuses only
+    for idempotent methods (e.g. GET), a POST is never sent twice.
+
+    Args:
+        config (dict): The channel configuration, optional keys 'timeout'
+                       (seconds), 'retries', 'backoff' (seconds) and
+                       'pool_size' (max connections per host).
+    """
+
+    TIMEOUT = 10  # seconds, connect and read
+    RETRIES = 3
+    BACKOFF = 0.5  # seconds, doubled on every retry
+    POOL_SIZE = 2  # max connections per host
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+    def __init__(self, config: Dict[str, Any]):
+        self.logger = logging.getLogger(__name__)
+        self.timeout = float(config.get("timeout") or self.TIMEOUT)
+        retry = Retry(
+            total=int(config.get("retries", self.RETRIES)),
+            backoff_factor=float(config.get("backoff", self.BACKOFF)),
+            status_forcelist=self.RETRY_STATUSES,
+            raise_on_status=False,  # the last response is returned
+        )
+        pool_size = int(config.get("pool_size", self.POOL_SIZE))
+        adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=pool_size, max_retries=retry
+        )
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Sends a request through the pooled session, see requests.request.
+
+        Raises:
+            requests.exceptions.RequestException: If the request failed
+                                                  after the retries.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        self.logger.debug("%s: %s" % (method.upper(), url))
+        return self.session.request(method, url, **kwargs)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("get", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("post", url, **kwargs)
+
+    def close(self):
+        """
+        Closes the pooled connections.
+        """
+        self.session.close()
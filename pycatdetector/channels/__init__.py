@@ -1,8 +1,24 @@
 # Package pycatdetector
 # https://docs.python.org/3/tutorial/modules.html
-from .AbstractChannel import AbstractChannel
-from .HaGoogleSpeak import HaGoogleSpeak
-from .DiscordWebhook import DiscordWebhook
-from .BlinkstickSquare import BlinkstickSquare
+# The channels are imported on first use (only the enabled ones and their
+# dependencies are loaded), see LazyPackage
+import sys
+from typing import TYPE_CHECKING
+from ..LazyPackage import LazyPackage
 
-__all__ = ["AbstractChannel", "HaGoogleSpeak", "DiscordWebhook", "BlinkstickSquare"]
+if TYPE_CHECKING:
+    from .AbstractChannel import AbstractChannel
+    from .HttpClient import HttpClient
+    from .HaGoogleSpeak import HaGoogleSpeak
+    from .DiscordWebhook import DiscordWebhook
+    from .BlinkstickSquare import BlinkstickSquare
+
+__all__ = [
+    "AbstractChannel",
+    "HttpClient",
+    "HaGoogleSpeak",
+    "DiscordWebhook",
+    "BlinkstickSquare",
+]
+
+sys.modules[__name__].__class__ = LazyPackage
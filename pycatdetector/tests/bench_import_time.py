@@ -0,0 +1,62 @@
+import sys
+import json
+import subprocess
+
+# Import time and memory (max RSS) of the entry points, each measured in a
+# fresh interpreter (best of ROUNDS), and the heavy dependencies loaded
+ROUNDS = 3
+HEAVY = ["torch", "torchvision", "cv2", "matplotlib", "requests", "PIL"]
+ENTRY_POINTS = {
+    "package": "import pycatdetector",
+    "config": "from pycatdetector.Config import Config",
+    "main": "import main",
+    "notifier": "from pycatdetector.Notifier import Notifier",
+    "detector": "from pycatdetector.Detector import Detector",
+    "net": "from pycatdetector.NeuralNetPyTorch import NeuralNetPyTorch",
+}
+PROBE = """
+import json, resource, sys, time
+begin = time.perf_counter()
+%s
+seconds = time.perf_counter() - begin
+print(json.dumps({
+    "ms": round(seconds * 1000, 1),
+    "rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    "heavy": [name for name in %r if name in sys.modules],
+}))
+"""
+
+
+def measure(statement: str) -> dict:
+    runs = []
+    for _ in range(ROUNDS):
+        output = subprocess.run(
+            [sys.executable, "-c", PROBE % (statement, HEAVY)],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        runs.append(json.loads(output.splitlines()[-1]))
+    return min(runs, key=lambda run: run["ms"])
+
+
+def test_main():
+    print()
+    print("Entry point      Import (ms)   RSS (MB)  Heavy dependencies")
+    results = {}
+    for name, statement in ENTRY_POINTS.items():
+        results[name] = measure(statement)
+        print(
+            "%-16s %11.1f %10.1f  %s"
+            % (
+                name,
+                results[name]["ms"],
+                results[name]["rss_mb"],
+                ", ".join(results[name]["heavy"]) or "-",
+            )
+        )
+
+    # The configuration check and the package don't load the heavy ones
+    for name in ["package", "config", "main"]:
+        assert results[name]["heavy"] == []
+    assert "torch" not in results["notifier"]["heavy"]
@@ -0,0 +1,69 @@
+import os
+import numpy as np
+import torch
+from time import perf_counter
+from PIL import Image
+from pycatdetector.NeuralNetPyTorch import NeuralNetPyTorch
+
+ROUNDS = 4  # times each image is analyzed per mode
+BATCH_SIZE = 4
+
+
+def load_images() -> list:
+    dirname = os.path.join(os.curdir, "pycatdetector", "tests", "images")
+    images = []
+    for filename in sorted(os.listdir(dirname)):
+        with Image.open(os.path.join(dirname, filename)) as img:
+            images.append(img.convert("RGB"))
+    return images
+
+
+def test_main():
+    m_name = "FasterRCNN_MobileNet_V3_Large_320_FPN"
+    nn = NeuralNetPyTorch(m_name)
+    images = load_images() * ROUNDS
+    nn.analyze(images[0])  # warm-up, not measured
+
+    begin = perf_counter()
+    single = [nn.analyze(image) for image in images]
+    single_fps = len(images) / (perf_counter() - begin)
+
+    begin = perf_counter()
+    batched = []
+    for i in range(0, len(images), BATCH_SIZE):
+        batched.extend(nn.analyze_batch(images[i : i + BATCH_SIZE]))
+    batched_fps = len(images) / (perf_counter() - begin)
+
+    print()
+    print("Model: %s, Images: %i" % (m_name, len(images)))
+    print("Single:  %.2f FPS" % single_fps)
+    print("Batched: %.2f FPS (Batch Size: %i)" % (batched_fps, BATCH_SIZE))
+    print("Speedup: %.2fx" % (batched_fps / single_fps))
+
+    assert len(single) == len(batched)
+    for a, b in zip(single, batched):
+        assert a["labels"] == b["labels"]
+
+
+def test_preprocess_1080p():
+    m_name = "FasterRCNN_MobileNet_V3_Large_320_FPN"
+    nn = NeuralNetPyTorch(m_name)
+    legacy = nn.weights.transforms()
+    frame = np.random.randint(0, 255, (1080, 1920, 3), dtype=np.uint8)  # BGR
+
+    begin = perf_counter()
+    for _ in range(ROUNDS):
+        legacy(Image.fromarray(frame))  # PIL round trip (previous path)
+    legacy_ms = (perf_counter() - begin) / ROUNDS * 1000
+
+    begin = perf_counter()
+    for _ in range(ROUNDS):
+        nn._preprocess([nn._load(frame)])  # tensor-native path
+    tensor_ms = (perf_counter() - begin) / ROUNDS * 1000
+
+    print()
+    print("Preprocess 1080p, PIL: %.2fms, Tensor: %.2fms" % (legacy_ms, tensor_ms))
+
+    batch = nn._preprocess([nn._load(frame)])
+    assert batch[0].shape == (3, 1080, 1920)
+    assert (batch[0][0] * 255).round().byte().equal(torch.from_numpy(frame[:, :, 2]))
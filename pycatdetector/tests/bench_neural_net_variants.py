@@ -0,0 +1,70 @@
+import os
+import importlib.util
+from time import perf_counter
+from torchvision.ops import box_iou
+from pycatdetector.NeuralNetPyTorch import NeuralNetPyTorch
+from pycatdetector.ModelExporter import ModelExporter
+
+M_NAME = "FasterRCNN_MobileNet_V3_Large_320_FPN"
+MIN_SCORE = 0.5
+ROUNDS = 3  # times each image is analyzed per variant
+
+
+def agreement(reference: dict, result: dict) -> tuple[float, float]:
+    """
+    Returns the ratio of reference labels found by the result (same
+    label, IoU >= 0.5) and the mean IoU of those matches.
+    """
+    if len(reference["labels"]) == 0:
+        return (1.0 if len(result["labels"]) == 0 else 0.0), 1.0
+    if len(result["labels"]) == 0:
+        return 0.0, 0.0
+    ious = box_iou(reference["boxes"], result["boxes"])
+    matched = []
+    for i, label in enumerate(reference["labels"]):
+        candidates = [
+            ious[i, j].item()
+            for j, other in enumerate(result["labels"])
+            if other == label and ious[i, j] >= 0.5
+        ]
+        if len(candidates) > 0:
+            matched.append(max(candidates))
+    ratio = len(matched) / len(reference["labels"])
+    return ratio, (sum(matched) / len(matched) if len(matched) > 0 else 0.0)
+
+
+def test_main(tmp_path):
+    models_folder = str(tmp_path)
+    ModelExporter(M_NAME, models_folder).export_torchscript()
+    variants = ["", NeuralNetPyTorch.INT8, NeuralNetPyTorch.TORCHSCRIPT]
+    if importlib.util.find_spec("onnxruntime") is not None:
+        ModelExporter(M_NAME, models_folder).export_onnx()
+        variants.append(NeuralNetPyTorch.ONNX)
+    else:
+        print("onnxruntime not installed, ONNX variant skipped.")
+
+    dirname = os.path.join(os.curdir, "pycatdetector", "tests", "images")
+    images = [os.path.join(dirname, f) for f in sorted(os.listdir(dirname))]
+
+    references = None
+    print()
+    for variant in variants:
+        nn = NeuralNetPyTorch.create(M_NAME + variant, MIN_SCORE, models_folder)
+        results = [nn.analyze(image) for image in images]  # warm-up
+        begin = perf_counter()
+        for _ in range(ROUNDS):
+            for image in images:
+                nn.analyze(image)
+        latency_ms = (perf_counter() - begin) / (ROUNDS * len(images)) * 1000
+
+        if references is None:
+            references = results  # eager model as reference
+        scores = [agreement(a, b) for a, b in zip(references, results)]
+        matched = sum(s[0] for s in scores) / len(scores)
+        iou = sum(s[1] for s in scores) / len(scores)
+        print(
+            "%-45s Latency: %7.2fms, Matched: %5.1f%%, IoU: %.3f"
+            % (M_NAME + variant, latency_ms, matched * 100, iou)
+        )
+        if variant in [NeuralNetPyTorch.TORCHSCRIPT, NeuralNetPyTorch.ONNX]:
+            assert matched > 0.9  # same weights, same math
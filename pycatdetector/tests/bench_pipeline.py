@@ -0,0 +1,301 @@
+import os
+import sys
+import json
+import math
+import threading
+import subprocess
+import cv2
+import numpy as np
+import torch
+from datetime import datetime
+from time import monotonic, sleep, time
+from typing import Optional
+from pycatdetector.BoundedQueue import BoundedQueue
+from pycatdetector.Detector import Detector
+from pycatdetector.Metrics import Metrics
+from pycatdetector.NeuralNetPyTorch import NeuralNetPyTorch
+from pycatdetector.Notifier import Notifier
+from pycatdetector.Recorder import Recorder
+from pycatdetector.Scheduler import Scheduler
+from pycatdetector.channels.AbstractChannel import AbstractChannel
+
+# End to end Recorder => Detector => Notifier benchmark over a synthetic
+# local video (replayed through the Recorder like an RTSP stream), results
+# are written as JSON (BENCH_OUTPUT, default ./bench/pipeline-<commit>.json)
+# and compared with a previous run if BENCH_BASELINE is set (fails on a
+# regression beyond BENCH_TOLERANCE, default 0.25 => 25%).
+
+MODEL = "FasterRCNN_MobileNet_V3_Large_320_FPN"
+DURATION = 20  # seconds measured
+WARM_UP = 3  # seconds, not measured
+SAMPLE_HZ = 5  # frames per second sent to the detector
+VIDEO_SECONDS = 30
+VIDEO_FPS = 25
+VIDEO_SIZE = (1280, 720)
+MIN_SCORE = 0.5
+IMAGES = os.path.join(os.curdir, "pycatdetector", "tests", "images")
+ALWAYS = {"days": "Mon,Tue,Wed,Thu,Fri,Sat,Sun", "start": "00:00", "end": "23:59"}
+
+# Higher is better (others lower is better) when compared with a baseline
+HIGHER_IS_BETTER = ["capture_fps", "sampled_fps", "inference_fps"]
+COMPARED = HIGHER_IS_BETTER + [
+    "inference_p50_ms",
+    "inference_p95_ms",
+    "inference_p99_ms",
+    "notify_latency_p50_ms",
+    "notify_latency_p95_ms",
+]
+
+
+class BenchChannel(AbstractChannel):
+    """
+    A channel recording the detection to notification latency.
+    """
+
+    def __init__(self, config):
+        self.latencies = []
+
+    def notify(self, custom_content: Optional[dict] = None) -> bool:
+        if custom_content is not None and "timestamp" in custom_content:
+            detected = datetime.fromisoformat(custom_content["timestamp"])
+            self.latencies.append(time() - detected.timestamp())
+        return True
+
+    def get_name(self) -> str:
+        return "BenchChannel"
+
+
+class TimedNet(NeuralNetPyTorch):
+    """
+    A NeuralNetPyTorch recording the analysis time of every batch.
+    """
+
+    def __init__(self, model_name: str, min_score: float):
+        super().__init__(model_name, min_score)
+        self.timings = []
+        self.frames = 0
+
+    def analyze_batch(self, images: list) -> list[dict]:
+        begin = monotonic()
+        results = super().analyze_batch(images)
+        self.timings.append(monotonic() - begin)
+        self.frames += len(images)
+        return results
+
+
+def make_video(path: str):
+    """
+    Writes a synthetic video, the test images sliding over a background.
+    """
+    width, height = VIDEO_SIZE
+    sprites = []
+    for filename in sorted(os.listdir(IMAGES)):
+        sprite = cv2.imread(os.path.join(IMAGES, filename), cv2.IMREAD_COLOR)
+        scale = (height / 2) / max(sprite.shape[:2])
+        sprites.append(cv2.resize(sprite, None, fx=scale, fy=scale))
+    writer = cv2.VideoWriter(
+        path, cv2.VideoWriter.fourcc(*"MJPG"), VIDEO_FPS, (width, height)
+    )
+    rng = np.random.default_rng(0)
+    background = rng.integers(40, 90, (height, width, 3), dtype=np.uint8)
+    frames = VIDEO_SECONDS * VIDEO_FPS
+    for i in range(frames):
+        frame = background.copy()
+        sprite = sprites[(i // (VIDEO_FPS * 5)) % len(sprites)]
+        h, w = sprite.shape[:2]
+        x = int((width - w) * (i % (VIDEO_FPS * 5)) / (VIDEO_FPS * 5))
+        y = (height - h) // 2
+        frame[y : y + h, x : x + w] = sprite
+        writer.write(frame)
+    writer.release()
+
+
+def thread_cpu(thread: threading.Thread) -> float:
+    """
+    Returns the CPU seconds (user + system) used by a thread (Linux).
+    """
+    try:
+        path = "/proc/self/task/%i/stat" % thread.native_id
+        with open(path) as file:
+            fields = file.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    except (OSError, TypeError):
+        return 0.0
+
+
+def process_memory() -> dict:
+    """
+    Returns the current and peak RSS in MiB (Linux).
+    """
+    memory = {"rss_mb": 0.0, "rss_peak_mb": 0.0}
+    try:
+        with open("/proc/self/status") as file:
+            for line in file:
+                if line.startswith("VmRSS:"):
+                    memory["rss_mb"] = round(int(line.split()[1]) / 1024, 1)
+                elif line.startswith("VmHWM:"):
+                    memory["rss_peak_mb"] = round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return memory
+
+
+def percentile(values: list, q: float) -> Optional[float]:
+    if len(values) == 0:
+        return None  # not measured (not 0ms)
+    return round(float(np.percentile(values, q)) * 1000, 2)  # ms
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """
+    Returns the metrics regressed beyond the tolerance (ratio), or not
+    measured anymore.
+    """
+    regressions = []
+    print("Metric                    Baseline     Current    Change")
+    for name in COMPARED:
+        old, new = baseline.get(name), results.get(name)
+        if old is None:
+            continue  # not measured by the baseline
+        if new is None:
+            print("%-24s %10.2f %11s" % (name, old, "missing"))
+            regressions.append(name)
+            continue
+        if old == 0:
+            change = 0.0 if new == 0 else math.copysign(math.inf, new)
+        else:
+            change = (new - old) / old
+        print("%-24s %10.2f %11.2f %+8.1f%%" % (name, old, new, change * 100))
+        worse = -change if name in HIGHER_IS_BETTER else change
+        if worse > tolerance:
+            regressions.append(name)
+    return regressions
+
+
+def test_main(tmp_path):
+    video = str(tmp_path / "bench.avi")
+    make_video(video)
+
+    metrics = Metrics.get_default()
+    net = TimedNet(MODEL, MIN_SCORE)
+    images = BoundedQueue(1, BoundedQueue.DROP_OLDEST, "images")
+    recorder = Recorder(video, "bench", images, SAMPLE_HZ)
+    recorder.RECONNECT_DELAY = 0  # replay the video in a loop
+    scheduler = Scheduler()
+    scheduler.add_camera("bench", images)
+    detector = Detector(
+        images=scheduler,
+        screener_enabled=False,
+        net=net,
+        notify_min_score=MIN_SCORE,
+        encoder=None,
+    )
+    notifier = Notifier(detector.get_detections())
+    notifier.NOTIFY_DELAY = -1  # notify every detection
+    channel = BenchChannel({})
+    notifier.add_channel(channel, net.get_classes())
+    notifier.add_notify_window(channel, "always", ALWAYS)
+    detector.set_labels(notifier.get_labels())
+    stages = {
+        "recorder": recorder,
+        "detector": detector,
+        "notifier": notifier,
+        "channel": notifier.workers[channel.get_name()],
+    }
+
+    recorder.start()
+    detector.start()
+    notifier.start()
+    sleep(WARM_UP)
+
+    read = metrics.get("frames_read_total", camera="bench") or 0
+    sampled = metrics.get("frames_sampled_total", camera="bench") or 0
+    net.timings.clear()
+    channel.latencies.clear()
+    frames = net.frames
+    cpu = {name: thread_cpu(thread) for name, thread in stages.items()}
+    process_cpu = sum(os.times()[:2])
+    begin = monotonic()
+    sleep(DURATION)
+    elapsed = monotonic() - begin
+
+    read = (metrics.get("frames_read_total", camera="bench") or 0) - read
+    sampled = (metrics.get("frames_sampled_total", camera="bench") or 0) - sampled
+    frames = net.frames - frames
+    timings = list(net.timings)
+    latencies = list(channel.latencies)
+    cpu = {name: thread_cpu(thread) - cpu[name] for name, thread in stages.items()}
+    process_cpu = sum(os.times()[:2]) - process_cpu
+    memory = process_memory()
+
+    recorder.stop()
+    detector.stop()
+    notifier.stop()
+    for thread in [recorder, detector, notifier]:
+        thread.join(timeout=30)
+
+    results = {
+        "commit": git_commit(),
+        "timestamp": datetime.now().astimezone().isoformat(),
+        "python": sys.version.split()[0],
+        "torch": torch.__version__,
+        "torch_threads": torch.get_num_threads(),
+        "model": MODEL,
+        "video": "%ix%i@%i" % (VIDEO_SIZE + (VIDEO_FPS,)),
+        "sample_hz": SAMPLE_HZ,
+        "seconds": round(elapsed, 2),
+        "capture_fps": round(read / elapsed, 2),
+        "sampled_fps": round(sampled / elapsed, 2),
+        "inference_fps": round(frames / elapsed, 2),
+        "inference_p50_ms": percentile(timings, 50),
+        "inference_p95_ms": percentile(timings, 95),
+        "inference_p99_ms": percentile(timings, 99),
+        "notifications": len(latencies),
+        "notify_latency_p50_ms": percentile(latencies, 50),
+        "notify_latency_p95_ms": percentile(latencies, 95),
+        "notify_latency_p99_ms": percentile(latencies, 99),
+        # CPU utilization (1.0 = a core), 'other' are the threads of the
+        # libraries (e.g. torch intra-op, OpenCV decoding)
+        "cpu": {
+            name: round(seconds / elapsed, 3)
+            for name, seconds in dict(
+                cpu, other=process_cpu - sum(cpu.values()), total=process_cpu
+            ).items()
+        },
+        "rss_mb": memory["rss_mb"],
+        "rss_peak_mb": memory["rss_peak_mb"],
+    }
+
+    output = os.environ.get("BENCH_OUTPUT") or os.path.join(
+        os.curdir, "bench", "pipeline-%s.json" % results["commit"]
+    )
+    os.makedirs(os.path.dirname(output) or os.curdir, exist_ok=True)
+    with open(output, "w") as file:
+        json.dump(results, file, indent=2)
+    print()
+    print(json.dumps(results, indent=2))
+    print("Results: " + output)
+
+    assert frames > 0
+    assert not recorder.is_alive() and not detector.is_alive()
+    assert len(latencies) > 0, "No notification sent, notify path broken?"
+
+    baseline = os.environ.get("BENCH_BASELINE")
+    if baseline:
+        with open(baseline) as file:
+            regressions = compare(
+                results, json.load(file), float(os.environ.get("BENCH_TOLERANCE", 0.25))
+            )
+        assert regressions == [], "Regressed: %r" % regressions
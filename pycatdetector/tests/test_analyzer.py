@@ -0,0 +1,84 @@
+import io
+import os
+import csv
+import json
+import cv2
+import numpy as np
+from pycatdetector.Analyzer import Analyzer
+from pycatdetector.Detector import Detector
+from pycatdetector.FileReader import FileReader
+from pycatdetector.NeuralNetPyTorch import NeuralNetPyTorch
+
+IMAGES = os.path.join(os.curdir, "pycatdetector", "tests", "images")
+
+
+def make_video(path: str, frames: int = 20, fps: float = 10):
+    writer = cv2.VideoWriter(path, cv2.VideoWriter.fourcc(*"MJPG"), fps, (160, 120))
+    for i in range(frames):
+        writer.write(np.full((120, 160, 3), i * 10, dtype=np.uint8))
+    writer.release()
+
+
+def test_sources(tmp_path):
+    make_video(str(tmp_path / "b.avi"))
+    make_video(str(tmp_path / "a.avi"))
+    (tmp_path / "notes.txt").write_text("")
+    assert FileReader.list_sources([str(tmp_path)]) == [
+        str(tmp_path / "a.avi"),
+        str(tmp_path / "b.avi"),
+    ]
+    assert FileReader.list_sources([IMAGES]) == [IMAGES]
+
+
+def test_main(tmp_path):
+    make_video(str(tmp_path / "video.avi"), frames=20, fps=10)
+    net = NeuralNetPyTorch("FasterRCNN_MobileNet_V3_Large_320_FPN", 0.0)
+    labels = [label for label in net.get_classes() if label != "N/A"]
+    images = len(os.listdir(IMAGES))
+
+    analyzer = Analyzer(net, labels, 0.0, batch_size=4, jobs=2, sample_hz=5)
+    output = io.StringIO()
+    summary = analyzer.run([IMAGES, str(tmp_path)], output, "jsonl")
+    print()
+    print(summary)
+    assert summary["sources"] == 2
+    assert summary["frames"] == images + 10  # every 2nd video frame
+    assert summary["errors"] == 0 and summary["fps"] > 0
+
+    rows = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert len(rows) == summary["detections"]
+    for row in rows:
+        assert set(row) == set(Analyzer.COLUMNS)
+        assert row["label"] in labels and len(row["box"]) == 4
+    positions = {row["position"] for row in rows if row["source"].endswith(".avi")}
+    assert positions <= {i / 5 for i in range(10)}
+
+    output = io.StringIO()
+    analyzer.run([IMAGES], output, "csv")
+    output.seek(0)
+    assert next(csv.reader(output)) == Analyzer.COLUMNS
+
+
+def test_errors(monkeypatch):
+    net = NeuralNetPyTorch("FasterRCNN_MobileNet_V3_Large_320_FPN", 0.0)
+    images = len(os.listdir(IMAGES))
+
+    def process(self, camera_id, result, info=None):
+        raise RuntimeError("process failed")
+
+    # Failed frames are counted, the run still ends
+    monkeypatch.setattr(Detector, "process", process)
+    analyzer = Analyzer(net, ["cat"], 0.0, batch_size=2, jobs=1)
+    summary = analyzer.run([IMAGES], io.StringIO())
+    assert summary["frames"] == 0 and summary["errors"] == images
+
+    # Detector thread died: the run ends instead of waiting for it
+    monkeypatch.setattr(Detector, "run", lambda self: None)
+    summary = analyzer.run([IMAGES], io.StringIO())
+    assert summary["frames"] == 0 and summary["errors"] == 0
+
+
+def test_format():
+    assert Analyzer.get_format("out.csv") == "csv"
+    assert Analyzer.get_format(None) == "jsonl"
+    assert Analyzer.get_format("out.txt", "csv") == "csv"
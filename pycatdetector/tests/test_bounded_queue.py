@@ -0,0 +1,40 @@
+import threading
+import pytest
+from queue import Empty
+from pycatdetector.BoundedQueue import BoundedQueue
+
+
+def test_main():
+    queue = BoundedQueue(2, BoundedQueue.DROP_OLDEST)
+    for i in range(4):
+        assert queue.put(i)
+    assert queue.qsize() == 2 and queue.dropped == 2
+    assert queue.get(block=False) == 2
+
+    queue = BoundedQueue(2, BoundedQueue.DROP_NEWEST)
+    results = [queue.put(i) for i in range(4)]
+    assert results == [True, True, False, False]
+    assert queue.get(block=False) == 0
+
+    queue = BoundedQueue(1, BoundedQueue.BLOCK)
+    queue.put(0)
+    producer = threading.Thread(target=queue.put, args=(1,))
+    producer.start()
+    producer.join(0.1)
+    assert producer.is_alive()  # blocked, queue is full
+    assert queue.get(timeout=1) == 0
+    producer.join(1)
+    assert queue.get(timeout=1) == 1
+
+    queue.put(2)
+    producer = threading.Thread(target=queue.put, args=(3,))
+    producer.start()
+    queue.close()  # releases blocked producers
+    producer.join(1)
+    assert not producer.is_alive()
+
+    with pytest.raises(Empty):
+        BoundedQueue().get(timeout=0.05)
+
+    with pytest.raises(ValueError):
+        BoundedQueue(1, "drop_all")
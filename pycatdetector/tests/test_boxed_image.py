@@ -0,0 +1,40 @@
+import numpy as np
+import torch
+from pycatdetector.BoxedImage import BoxedImage
+from pycatdetector.ImageArtifact import ImageArtifact
+
+
+def make_result() -> dict:
+    frame = np.full((240, 320, 3), 64, dtype=np.uint8)
+    return {
+        "image": torch.from_numpy(frame).permute(2, 0, 1),  # BGR CxHxW
+        "labels": ["cat"],
+        "scores": torch.tensor([0.9]),
+        "boxes": torch.tensor([[50.0, 60.0, 150.0, 200.0]]),
+    }
+
+
+def test_main():
+    result = make_result()
+    boxed = BoxedImage.from_result(result)
+    assert boxed.array is None  # nothing drawn yet
+    assert boxed.get_size() == (320, 240)
+
+    array = boxed.get_array()
+    assert boxed.get_array() is array  # cached
+    assert array.shape == (240, 320, 3)
+    assert tuple(array[130, 50]) == BoxedImage.PALETTE[0]  # left edge, green
+    assert tuple(array[130, 100]) == (64, 64, 64)  # inside, untouched
+    assert tuple(result["image"][:, 130, 50].tolist()) == (64, 64, 64)
+
+    image = boxed.get_image()
+    assert image.size == (320, 240)
+    assert image.getpixel((50, 130)) == (0, 255, 0)  # RGB
+
+
+def test_artifact():
+    boxed = BoxedImage.from_result(make_result())
+    artifact = ImageArtifact(boxed)
+    assert boxed.array is None
+    assert artifact.get_data(max_size=160)[:2] == b"\xff\xd8"  # JPEG
+    assert boxed.array is not None
@@ -0,0 +1,51 @@
+import threading
+from time import monotonic
+from pycatdetector.Notifier import Notifier
+from pycatdetector.BoundedQueue import BoundedQueue
+from pycatdetector.channels.AbstractChannel import AbstractChannel
+
+
+class FakeChannel(AbstractChannel):
+    def __init__(self, config):
+        self.name = config["name"]
+        self.delay = config["delay"]
+        self.notified = threading.Event()
+
+    def notify(self, custom_content=None) -> bool:
+        self.notified.wait(self.delay)  # slow endpoint
+        self.notified.set()
+        return True
+
+    def get_name(self) -> str:
+        return self.name
+
+
+def test_main():
+    slow = FakeChannel({"name": "Slow", "delay": 5})
+    fast = FakeChannel({"name": "Fast", "delay": 0})
+    detections = BoundedQueue()
+    notifier = Notifier(detections)
+    notifier.add_channel(slow, ["cat"])
+    notifier.add_channel(fast, ["cat"])
+    for channel in [slow, fast]:
+        notifier.add_notify_window(
+            channel,
+            "always",
+            {"days": "Mon,Tue,Wed,Thu,Fri,Sat,Sun", "start": "00:00", "end": "23:59"},
+        )
+    notifier.start()
+
+    begin = monotonic()
+    detections.put({"label": "cat", "score": 0.9, "image": None, "camera": "a"})
+    assert fast.notified.wait(2)  # not held up by the slow channel
+    elapsed = monotonic() - begin
+    print()
+    print("Fast channel notified in %.3fs" % elapsed)
+    assert not slow.notified.is_set()
+
+    slow.notified.set()  # release the slow endpoint
+    notifier.stop()
+    notifier.join(timeout=5)
+    assert not notifier.is_alive()
+    for worker in notifier.workers.values():
+        assert not worker.is_alive()
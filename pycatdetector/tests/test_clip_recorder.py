@@ -0,0 +1,82 @@
+import os
+import cv2
+import numpy as np
+from time import monotonic, time
+from pycatdetector.ClipRecorder import ClipRecorder
+
+
+def make_frame(value: int) -> np.ndarray:
+    return np.full((240, 320, 3), value, dtype=np.uint8)
+
+
+def count_frames(path: str) -> int:
+    capture = cv2.VideoCapture(path)
+    count = 0
+    while capture.read()[0]:
+        count += 1
+    capture.release()
+    return count
+
+
+def test_main(tmp_path):
+    clips = ClipRecorder(str(tmp_path), pre_roll=2, post_roll=60)
+    clips.add_camera("test", 4)
+    start = float(int(monotonic()) - 5)  # exact sums of 1/4 seconds
+
+    # 5 seconds at 4 fps, only the last 2 seconds are kept
+    for i in range(20):
+        clips.process_frame("test", start + i / 4, make_frame(i * 10))
+    assert len(clips.cameras["test"]["ring"]) == 9
+
+    clips.events["test"] = start + 4.75
+    clips.process_events()
+    path = clips.get_clip_path("test")
+    assert path is not None and os.path.basename(path).startswith("clip-test-")
+    assert clips.cameras["test"]["end"] == start + 4.75 + 60
+    for i in range(20, 25):
+        clips.process_frame("test", start + i / 4, make_frame(i * 5))
+    clips.close_clip("test")
+
+    assert clips.get_clip_path("test") is None
+    assert count_frames(path) == 9 + 5
+
+
+def test_rate(tmp_path):
+    clips = ClipRecorder(str(tmp_path), pre_roll=2, post_roll=60)
+    clips.add_camera("test", 4)
+    start = float(int(monotonic()) - 5)
+
+    # Sampled at 1 fps (rate lowered): each frame repeated to 4 fps
+    for i in range(5):
+        clips.process_frame("test", start + i, make_frame(i * 10))
+    clips.events["test"] = start + 4.5
+    clips.process_events()
+    path = clips.get_clip_path("test")
+    assert path is not None  # pre-roll: 2 frames at start + 3 and start + 4
+    # Then sampled at 8 fps (faster than the clip): every other frame dropped
+    for i in range(8):
+        clips.process_frame("test", start + 5 + i / 8, make_frame(i * 5))
+    clips.close_clip("test")
+
+    # From start + 3 to start + 6 (nearest 1/4 second) at 4 fps, real time
+    assert count_frames(path) == 3 * 4 + 1
+
+
+def test_rotate(tmp_path):
+    clips = ClipRecorder(str(tmp_path), max_age=60, max_bytes=250)
+    for i, age in enumerate([0, 10, 20, 120]):
+        path = os.path.join(str(tmp_path), "clip-test-%i.avi" % i)
+        with open(path, "wb") as file:
+            file.write(b"0" * 100)
+        os.utime(path, (time() - age, time() - age))
+    other = os.path.join(str(tmp_path), "notes.txt")
+    open(other, "w").close()
+
+    clips.rotate()
+
+    # The oldest one expired, the third newest exceeded max_bytes
+    assert sorted(os.listdir(str(tmp_path))) == [
+        "clip-test-0.avi",
+        "clip-test-1.avi",
+        "notes.txt",
+    ]
@@ -0,0 +1,102 @@
+import os
+import threading
+from time import monotonic
+from PIL import Image
+from pycatdetector.BoundedQueue import BoundedQueue
+from pycatdetector.ChannelWorker import ChannelWorker
+from pycatdetector.DetectionLog import DetectionLog
+from pycatdetector.Notifier import Notifier
+from pycatdetector.channels.AbstractChannel import AbstractChannel
+
+ALWAYS = {"days": "Mon,Tue,Wed,Thu,Fri,Sat,Sun", "start": "00:00", "end": "23:59"}
+
+
+class FlakyChannel(AbstractChannel):
+    def __init__(self, config):
+        self.failures = config["failures"]  # next notifications failing
+        self.sent = []
+        self.notified = threading.Event()
+
+    def notify(self, custom_content=None) -> bool:
+        if self.failures > 0:
+            self.failures -= 1
+            return False
+        self.sent.append(custom_content)
+        self.notified.set()
+        return True
+
+    def get_name(self) -> str:
+        return "Flaky"
+
+
+def start_notifier(
+    log: DetectionLog, channel: AbstractChannel, window: bool = True
+) -> Notifier:
+    notifier = Notifier(BoundedQueue(), log)
+    notifier.add_channel(channel, ["cat"])
+    if window:
+        notifier.add_notify_window(channel, "always", ALWAYS)
+    notifier.start()
+    return notifier
+
+
+def test_main(tmp_path):
+    path = os.path.join(tmp_path, "detections.db")
+    log = DetectionLog(path, sync_interval=0)
+    assert log.get_offset("a") == 0
+    ids = [log.append({"label": "cat", "score": 0.9}, b"JPEG") for _ in range(3)]
+    assert [entry["id"] for entry in log.read(0)] == ids
+    assert log.read(0)[0]["channels"] is None
+    log.append({"label": "cat", "score": 0.9}, None, ["a"])
+    assert log.read(ids[-1])[0]["channels"] == ["a"]
+    log.commit_offset("b", ids[-1] + 1)
+    log.commit_offset("a", ids[0])
+    log.close()
+
+    log = DetectionLog(path, max_bytes=8)  # reopened, durable
+    assert log.get_offset("a") == ids[0]
+    assert log.get_offset("c") == ids[-1] + 1  # new channel, no replay
+    assert log.get_pending() == {"a": 3, "b": 0, "c": 0}
+    log.flush()  # prunes the oldest images beyond 8 bytes
+    assert [entry["id"] for entry in log.read(0)] == ids[1:] + [ids[-1] + 1]
+    log.close()
+
+
+def test_replay(tmp_path, monkeypatch):
+    monkeypatch.setattr(ChannelWorker, "RETRY_DELAY", 0.01)
+    path = os.path.join(tmp_path, "detections.db")
+    image = Image.new("RGB", (64, 48))
+
+    # Channel down: retried, not delivered before the restart
+    log = DetectionLog(path)
+    channel = FlakyChannel({"failures": 10**6})
+    notifier = start_notifier(log, channel)
+    timestamp = "2024-05-01T22:30:05+02:00"
+    notifier.detections.put(
+        {"label": "cat", "score": 0.9, "image": image, "timestamp": timestamp}
+    )
+    notifier.detections.put({"label": "dog", "score": 0.9, "image": None})
+    deadline = monotonic() + 5
+    while channel.failures > 10**6 - 3 and monotonic() < deadline:
+        threading.Event().wait(0.01)
+    assert channel.failures <= 10**6 - 3
+    notifier.stop()
+    notifier.join(timeout=5)
+    log.close()
+
+    # Restarted with the channel back after 2 more failures: replayed, as
+    # decided at detection time (even with the notify window now closed)
+    log = DetectionLog(path)
+    channel = FlakyChannel({"failures": 2})
+    notifier = start_notifier(log, channel, window=False)
+    assert channel.notified.wait(5)
+    notifier.stop()
+    notifier.join(timeout=5)
+    print()
+    print("Sent: %r" % [content["image_name"] for content in channel.sent])
+    assert len(channel.sent) == 1 and channel.sent[0]["image_data"][:2] == b"\xff\xd8"
+    assert channel.sent[0]["image_name"] == "Flaky-default-2024-05-01_22-30-05.jpeg"
+    assert channel.sent[0]["timestamp"] == timestamp
+    assert len(log.read(0)) == 1  # the 'dog' one not notified, not logged
+    assert log.get_pending() == {"Flaky": 0}
+    log.close()
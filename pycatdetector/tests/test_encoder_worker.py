@@ -0,0 +1,37 @@
+import cv2
+import numpy as np
+from PIL import Image
+from pycatdetector.BoundedQueue import BoundedQueue
+from pycatdetector.EncoderWorker import EncoderWorker
+
+
+def test_main(tmp_path):
+    encoder = EncoderWorker(str(tmp_path))
+    encoder.start()
+    red = Image.new("RGB", (64, 48), (255, 0, 0))
+    for _ in range(3):
+        assert encoder.add_image("test", red)
+    encoder.stop()
+    encoder.join()
+
+    path = encoder.get_video_path("test")
+    capture = cv2.VideoCapture(path)
+    frames = []
+    while True:
+        ok, frame = capture.read()
+        if not ok:
+            break
+        frames.append(frame)
+    capture.release()
+    assert len(frames) == 3
+    assert np.argmax(frames[0][0, 0]) == 2  # red, BGR
+
+
+def test_drop_oldest(tmp_path):
+    images = BoundedQueue(2, BoundedQueue.DROP_OLDEST, "encoder")
+    encoder = EncoderWorker(str(tmp_path), images)  # not started, full queue
+    image = np.zeros((48, 64, 3), dtype=np.uint8)
+    for _ in range(5):
+        assert encoder.add_image("test", image)  # never blocks the detector
+    assert images.qsize() == 2
+    assert images.dropped == 3
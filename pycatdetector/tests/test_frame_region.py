@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+import torch
+from pycatdetector.FrameRegion import FrameRegion
+
+
+def test_main():
+    frame = np.zeros((1080, 1920, 3), dtype=np.uint8)
+    region = FrameRegion([0.25, 0.5, 0.5, 0.5], max_size=480)
+    image = region.crop(frame)
+    print()
+    print("Crop: %s => %s" % (frame.shape, image.shape))
+    assert image.shape == (270, 480, 3)  # 960x540 crop, downscaled
+
+    # A box of the analyzed image is mapped back to the frame
+    result = {
+        "image": torch.from_numpy(image).permute(2, 0, 1),
+        "labels": ["cat"],
+        "scores": torch.tensor([0.9]),
+        "boxes": torch.tensor([[0.0, 0.0, 240.0, 135.0]]),
+    }
+    result = region.map_result(result, frame)
+    assert result["boxes"].tolist() == [[480.0, 540.0, 960.0, 810.0]]
+    assert result["image"].shape == (3, 1080, 1920)
+
+
+def test_polygon():
+    frame = np.full((100, 200, 3), 255, dtype=np.uint8)
+    region = FrameRegion([[0.0, 0.0], [0.5, 0.0], [0.0, 1.0]])  # triangle
+    image = region.crop(frame)
+    assert image.shape == (100, 100, 3)
+    assert image[5, 5].tolist() == [255, 255, 255]  # inside
+    assert image[95, 95].tolist() == [0, 0, 0]  # outside, blacked out
+
+    full = FrameRegion()
+    assert full.is_full_frame() and full.crop(frame) is frame
+
+    with pytest.raises(ValueError):
+        FrameRegion([0.5, 0.5, 0.6, 0.1])  # out of the frame
+    with pytest.raises(ValueError):
+        FrameRegion([[0.1, 0.1], [0.2, 0.2]])
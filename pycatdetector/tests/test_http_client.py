@@ -0,0 +1,59 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pycatdetector.channels.HttpClient import HttpClient
+from pycatdetector.channels.DiscordWebhook import DiscordWebhook
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    connections = set()
+    requests = []
+    failures = 0  # next GET requests answered with 503
+
+    def do_GET(self):
+        Handler.connections.add(self.client_address)
+        Handler.requests.append(("GET", self.path, b""))
+        if Handler.failures > 0:
+            Handler.failures -= 1
+            self.reply(503)
+        else:
+            self.reply(200)
+
+    def do_POST(self):
+        Handler.connections.add(self.client_address)
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        Handler.requests.append(("POST", self.path, body))
+        self.reply(204)
+
+    def reply(self, status: int):
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def test_main():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = "http://127.0.0.1:%i" % server.server_address[1]
+    try:
+        http = HttpClient({"backoff": 0})
+        for _ in range(5):
+            assert http.get(url + "/blink").ok
+        print()
+        print("Connections: %i" % len(Handler.connections))
+        assert len(Handler.connections) == 1  # reused (keep-alive)
+
+        Handler.failures = 2
+        assert http.get(url + "/retry").ok  # retried on 503
+
+        channel = DiscordWebhook({"url": url + "/webhook", "message": "Cat!"})
+        assert channel.notify({"image_data": b"JPEG", "image_name": "cat.jpg"})
+        method, path, body = Handler.requests[-1]
+        assert (method, path) == ("POST", "/webhook")
+        assert b'filename="cat.jpg"' in body and b"Cat!" in body
+    finally:
+        server.shutdown()
+        server.server_close()
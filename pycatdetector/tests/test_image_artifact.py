@@ -0,0 +1,29 @@
+import io
+import threading
+from PIL import Image
+from pycatdetector.ImageArtifact import ImageArtifact
+
+
+def test_main():
+    artifact = ImageArtifact(Image.new("RGB", (1280, 720), (255, 0, 0)))
+    full = artifact.get_data()
+    assert artifact.get_data() is full  # encoded once, cached
+
+    thumbnail = artifact.get_data(320, 60)
+    with Image.open(io.BytesIO(thumbnail)) as image:
+        assert image.format == "JPEG" and image.size == (320, 180)
+    assert len(thumbnail) < len(full)
+
+    # Concurrent channel workers share a single encoding
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(artifact.get_data(640)))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert all(data is results[0] for data in results)
+    print()
+    print("Encoded: %r" % {k: len(v) for k, v in artifact.encoded.items()})
@@ -0,0 +1,41 @@
+import sys
+import subprocess
+import pytest
+import pycatdetector
+
+
+def run(code: str) -> str:
+    # A fresh interpreter, the modules already imported by the other tests
+    # would hide what the statement imports
+    return subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    ).stdout.strip()
+
+
+def test_main():
+    # Importing the package, a class or the channels doesn't load the others
+    loaded = run(
+        "import sys, pycatdetector, pycatdetector.channels\n"
+        "from pycatdetector.Config import Config\n"
+        "from pycatdetector import Tracker\n"
+        "print(sorted(m for m in ('torch', 'cv2', 'matplotlib', 'requests')"
+        " if m in sys.modules))"
+    )
+    assert loaded == "[]"
+
+    # The package attributes are the classes, also after a submodule import
+    classes = run(
+        "import pycatdetector, pycatdetector.channels\n"
+        "from pycatdetector.BoundedQueue import BoundedQueue\n"
+        "import pycatdetector.Metrics\n"
+        "print(pycatdetector.BoundedQueue is BoundedQueue,"
+        " isinstance(pycatdetector.Metrics, type),"
+        " pycatdetector.channels.AbstractChannel.__name__,"
+        " 'Detector' in dir(pycatdetector))"
+    )
+    assert classes == "True True AbstractChannel True"
+
+
+def test_missing():
+    with pytest.raises(AttributeError):
+        pycatdetector.Missing
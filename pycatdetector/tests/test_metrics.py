@@ -0,0 +1,60 @@
+import urllib.request
+from pycatdetector.Metrics import Metrics
+from pycatdetector.MetricsServer import MetricsServer
+
+
+def test_main():
+    metrics = Metrics()
+    metrics.describe("frames_read_total", Metrics.COUNTER, "Frames grabbed")
+    metrics.describe("inference_seconds", Metrics.HISTOGRAM, "Analysis", (0.1, 1))
+    metrics.inc("frames_read_total", camera="a")
+    metrics.inc("frames_read_total", 2, camera="a")
+    metrics.inc("frames_read_total", camera='b"')
+    metrics.observe("inference_seconds", 0.05)
+    metrics.observe("inference_seconds", 0.5)
+    metrics.observe("inference_seconds", 5)
+    depth = [3]
+    metrics.add_callback("queue_depth", lambda: depth[0], queue="images")
+
+    text = metrics.render()
+    print()
+    print(text)
+    assert "# TYPE pycatdetector_frames_read_total counter" in text
+    assert 'pycatdetector_frames_read_total{camera="a"} 3' in text
+    assert 'pycatdetector_frames_read_total{camera="b\\""} 1' in text
+    assert 'pycatdetector_inference_seconds_bucket{le="0.1"} 1' in text
+    assert 'pycatdetector_inference_seconds_bucket{le="1"} 2' in text
+    assert 'pycatdetector_inference_seconds_bucket{le="+Inf"} 3' in text
+    assert "pycatdetector_inference_seconds_count 3" in text
+    assert 'pycatdetector_queue_depth{queue="images"} 3' in text
+    assert metrics.get("frames_read_total", camera="a") == 3
+
+    depth[0] = 7  # sampled on every render
+    assert 'pycatdetector_queue_depth{queue="images"} 7' in metrics.render()
+
+    # Re-added (e.g. a restarted worker) replaces it, removed on stop
+    metrics.add_callback("queue_depth", lambda: 1, queue="images")
+    text = metrics.render()
+    assert text.count('pycatdetector_queue_depth{queue="images"}') == 1
+    assert 'pycatdetector_queue_depth{queue="images"} 1' in text
+    metrics.remove_callback("queue_depth", queue="images")
+    assert 'queue="images"' not in metrics.render()
+
+
+def test_server():
+    metrics = Metrics()
+    metrics.inc("reconnects_total", camera="a")
+    server = MetricsServer("127.0.0.1", 0, metrics)
+    server.start()
+    try:
+        url = "http://127.0.0.1:%i/metrics" % server.get_port()
+        with urllib.request.urlopen(url, timeout=5) as response:
+            assert response.status == 200
+            assert "text/plain" in response.headers["Content-Type"]
+            assert 'pycatdetector_reconnects_total{camera="a"} 1' in (
+                response.read().decode("utf-8")
+            )
+    finally:
+        server.stop()
+        server.join(timeout=5)
+    assert not server.is_alive()
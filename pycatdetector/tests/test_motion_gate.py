@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+from pycatdetector.BoundedQueue import BoundedQueue
+from pycatdetector.MotionGate import MotionGate
+
+
+def make_frame(square: tuple = None) -> np.ndarray:
+    """
+    Returns a 720p grey BGR frame, with a white square at (x, y) if given.
+    """
+    frame = np.full((720, 1280, 3), 64, dtype=np.uint8)
+    if square is not None:
+        x, y = square
+        frame[y : y + 120, x : x + 120] = 255
+    return frame
+
+
+@pytest.mark.parametrize("method", MotionGate.METHODS)
+def test_main(method):
+    images = BoundedQueue()
+    gate = MotionGate("test", BoundedQueue(), images, method, heartbeat=0)
+
+    assert gate.process(make_frame())  # first frame, no reference
+    for _ in range(20):
+        assert not gate.process(make_frame())  # static scene
+    assert gate.process(make_frame((600, 300)))  # cat enters
+    print()
+    print("%s: %r" % (method, gate.get_counters()))
+    assert gate.get_counters() == {"passed": 2, "gated": 20}
+    assert images.qsize() == 2
+
+
+def test_rois():
+    rois = [[0.0, 0.0, 0.25, 0.25]]  # top left corner only
+    gate = MotionGate("test", BoundedQueue(), BoundedQueue(), rois=rois, heartbeat=0)
+    gate.process(make_frame())
+    assert not gate.process(make_frame((900, 500)))  # outside the roi
+    assert gate.process(make_frame((50, 50)))
+
+    with pytest.raises(ValueError):
+        MotionGate("test", BoundedQueue(), BoundedQueue(), rois=[[0, 0, 2, 1]])
+    with pytest.raises(ValueError):
+        MotionGate("test", BoundedQueue(), BoundedQueue(), method="unknown")
+
+
+def test_heartbeat():
+    gate = MotionGate("test", BoundedQueue(), BoundedQueue(), heartbeat=60)
+    gate.process(make_frame())
+    assert not gate.process(make_frame())
+    gate.last_passed -= 60  # a minute without forwarding frames
+    assert gate.process(make_frame())
@@ -0,0 +1,39 @@
+import os
+from PIL import Image
+from pycatdetector.NeuralNetPyTorch import NeuralNetPyTorch
+from pycatdetector.NeuralNetProcessPool import NeuralNetProcessPool
+
+
+def test_main():
+    m_name = "FasterRCNN_MobileNet_V3_Large_320_FPN"
+    dirname = os.path.join(os.curdir, "pycatdetector", "tests", "images")
+    images = []
+    for filename in sorted(os.listdir(dirname)):
+        with Image.open(os.path.join(dirname, filename)) as img:
+            images.append(img.convert("RGB"))
+
+    expected = NeuralNetPyTorch(m_name).analyze_batch(images)
+
+    pool = NeuralNetProcessPool(m_name, workers=2)
+    try:
+        results = pool.analyze_batch(images)
+        results += [pool.analyze(images[0])]  # reuses the shared memory
+
+        # A dead worker (e.g. killed out of memory) is restarted
+        dead = pool.workers[0]["process"]
+        dead.kill()
+        dead.join()
+        restarted = pool.analyze_batch(images)
+        assert pool.workers[0]["process"] is not dead
+        assert pool.workers[0]["process"].is_alive()
+    finally:
+        pool.close()
+
+    print()
+    for result in results:
+        print(repr(pool.get_scored_labels(result, 0.9)))
+
+    assert len(results) == len(images) + 1
+    for a, b in zip(expected + expected[:1] + expected, results + restarted):
+        assert a["labels"] == b["labels"]
+        assert a["boxes"].allclose(b["boxes"])
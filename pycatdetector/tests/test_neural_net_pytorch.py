@@ -1,4 +1,6 @@
 import os
+import torch
+from pycatdetector.ModelExporter import ModelExporter
 from pycatdetector.NeuralNetPyTorch import NeuralNetPyTorch
 
 
@@ -20,3 +22,42 @@ def test_main():
             assert False
         else:
             assert "cat" in labels
+
+
+def test_weights_cache(tmp_path):
+    m_name = "FasterRCNN_MobileNet_V3_Large_320_FPN"
+    models_folder = str(tmp_path)
+    path = ModelExporter(m_name, models_folder).export_weights()
+    assert path == NeuralNetPyTorch.get_weights_path(models_folder, m_name + "_INT8")
+
+    # Same results loading the weights cache (meta device + memory mapped)
+    image = os.path.join(os.curdir, "pycatdetector", "tests", "images", "cat1.jpg")
+    cached = NeuralNetPyTorch(m_name, 0.1, models_folder).analyze(image)
+    built = NeuralNetPyTorch(m_name, 0.1).analyze(image)
+    assert torch.equal(cached["classes"], built["classes"])
+    assert torch.allclose(cached["scores"], built["scores"])
+
+
+def test_buffers():
+    nn = NeuralNetPyTorch("FasterRCNN_MobileNet_V3_Large_320_FPN")
+    image = torch.full((3, 24, 32), 255, dtype=torch.uint8)
+
+    # A repeated resolution reuses its buffer
+    nn._preprocess([image, image])
+    buffer = nn.buffers[(3, 24, 32)]
+    assert nn._preprocess([image])[0].data_ptr() == buffer.data_ptr()
+
+    # Many resolutions (e.g. a photos folder): the least recently used dropped
+    for size in range(10, 30):
+        batch = nn._preprocess([torch.zeros((3, size, size), dtype=torch.uint8)])
+        assert len(nn.buffers) <= NeuralNetPyTorch.MAX_BUFFERS
+    assert list(nn.buffers)[-1] == (3, 29, 29) and (3, 24, 32) not in nn.buffers
+    assert batch[0].shape == (3, 29, 29)
+
+    # A batch of more resolutions than kept still gets a buffer per image
+    images = [torch.zeros((3, size, 8), dtype=torch.uint8) for size in range(1, 7)]
+    batch = nn._preprocess(images + [image])
+    assert [tuple(img.shape) for img in batch] == [
+        tuple(img.shape) for img in images + [image]
+    ]
+    assert float(batch[-1].max()) == 1.0
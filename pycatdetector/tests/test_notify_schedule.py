@@ -0,0 +1,76 @@
+import pytest
+from time import time
+from datetime import datetime
+from zoneinfo import ZoneInfo
+from pycatdetector.NotifySchedule import NotifySchedule
+
+UTC = ZoneInfo("UTC")
+
+
+def at(day: int, hour: int, minute: int = 0, second: int = 0) -> float:
+    """
+    Returns the epoch seconds of a UTC time on the 2024-01-01 (Mon) week.
+    """
+    return datetime(2024, 1, day, hour, minute, second, tzinfo=UTC).timestamp()
+
+
+def test_main():
+    schedule = NotifySchedule()
+    weekdays = {"days": "Mon,Tue,Wed,Thu,Fri", "start": "08:00", "end": "17:59"}
+    schedule.add_window("weekdays", dict(weekdays, timezone="UTC"))
+    assert not schedule.is_open(at(1, 7, 59, 59))
+    assert schedule.get_open_window(at(1, 8)) == "weekdays"
+    assert schedule.is_open(at(5, 17, 59, 59))  # end minute included
+    assert not schedule.is_open(at(5, 18))
+    assert not schedule.is_open(at(6, 12))  # Saturday
+
+    assert schedule.get_next_transition(at(1, 7, 30, 15)) == at(1, 8)
+    assert schedule.get_next_transition(at(5, 18)) == at(5, 18) + 60 * 60  # capped
+
+
+def test_overnight():
+    schedule = NotifySchedule()
+    schedule.add_window(
+        "night", {"days": "Sun", "start": "22:00", "end": "06:00", "timezone": "UTC"}
+    )
+    assert schedule.is_open(at(7, 23))  # Sunday night
+    assert schedule.is_open(at(1, 6, 0, 30))  # Monday morning (week wrap)
+    assert not schedule.is_open(at(1, 6, 1))
+    assert not schedule.is_open(at(1, 23))  # Monday night
+
+
+def test_timezone():
+    schedule = NotifySchedule()
+    schedule.add_window(
+        "berlin",
+        {"days": "Mon", "start": "09:00", "end": "09:59", "timezone": "Europe/Berlin"},
+    )
+    assert schedule.is_open(at(1, 8, 30))  # 09:30 CET
+    assert not schedule.is_open(at(1, 9, 30))
+
+
+def test_overlap():
+    schedule = NotifySchedule()
+    schedule.add_window("all", {"days": "Mon", "start": "00:00", "end": "23:59"})
+    schedule.add_window("noon", {"days": "Mon,Tue", "start": "12:00", "end": "12:59"})
+    noon = datetime(2024, 1, 1, 12, 30).timestamp()  # local time
+    assert schedule.get_open_window(noon) == "all"
+    assert schedule.get_open_window(noon + 24 * 60 * 60) == "noon"
+    opened = schedule.is_open()  # now, cached until the next transition
+    assert schedule.cache is not None
+    assert schedule.is_open(time()) == opened
+
+
+def test_invalid():
+    schedule = NotifySchedule()
+    with pytest.raises(ValueError):
+        schedule.add_window(
+            "x", {"days": "Mon,Funday", "start": "00:00", "end": "01:00"}
+        )
+    with pytest.raises(ValueError):
+        schedule.add_window("x", {"days": "Mon", "start": "25:00", "end": "01:00"})
+    with pytest.raises(ValueError):
+        schedule.add_window(
+            "x", {"days": "Mon", "start": "0:00", "end": "1:00", "timezone": "Mars/X"}
+        )
+    assert not schedule.is_open()
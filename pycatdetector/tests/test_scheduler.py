@@ -0,0 +1,38 @@
+import threading
+import pytest
+from queue import Empty
+from pycatdetector.BoundedQueue import BoundedQueue
+from pycatdetector.Scheduler import Scheduler
+
+
+def test_main():
+    scheduler = Scheduler()
+    queues = {"a": BoundedQueue(), "b": BoundedQueue()}
+    scheduler.add_camera("a", queues["a"], weight=2)
+    scheduler.add_camera("b", queues["b"], weight=1)
+    for i in range(6):
+        queues["a"].put("a%i" % i)
+        queues["b"].put("b%i" % i)
+
+    assert scheduler.qsize() == 12
+    picked = [scheduler.get(block=False)[0] for _ in range(6)]
+    print()
+    print("Picked: " + repr(picked))
+    assert picked.count("a") == 4 and picked.count("b") == 2
+
+    # Idle cameras don't consume slots
+    while not queues["a"].empty():
+        queues["a"].get(False)
+    assert scheduler.get(block=False) == ("b", "b2")
+
+    while not scheduler.empty():
+        scheduler.get(block=False)
+    with pytest.raises(Empty):
+        scheduler.get(timeout=0.05)
+
+    with pytest.raises(ValueError):
+        scheduler.add_camera("a", BoundedQueue())
+
+    # Blocking get wakes up as soon as an image is queued
+    threading.Timer(0.1, queues["b"].put, args=("b9",)).start()
+    assert scheduler.get(timeout=5) == ("b", "b9")
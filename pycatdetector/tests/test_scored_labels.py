@@ -0,0 +1,34 @@
+import numpy as np
+import torch
+from pycatdetector.NeuralNetPyTorch import NeuralNetPyTorch
+
+
+def test_main():
+    nn = NeuralNetPyTorch("FasterRCNN_MobileNet_V3_Large_320_FPN", 0.0)
+    categories = nn.get_classes()
+    classes = torch.tensor(
+        [categories.index(label) for label in ["cat", "dog", "cat", "person"]]
+    )
+    result = nn._result(
+        torch.zeros((3, 240, 320), dtype=torch.uint8),
+        classes,
+        torch.tensor([0.95, 0.9, 0.5, 0.99]),
+        torch.tensor([[float(i), 0.0, i + 10.0, 10.0] for i in range(4)]),
+    )
+    class_ids = nn.get_class_ids(["cat", "dog", "unknown"])
+    assert sorted(class_ids.tolist()) == sorted(
+        [categories.index("cat"), categories.index("dog")]
+    )
+
+    found = nn.get_detections(result, 0.8, class_ids)
+    assert len(found) == 2
+    assert found.labels == ["cat", "dog"]
+    assert np.allclose(found.scores, [0.95, 0.9])
+    assert found.boxes.shape == (2, 4) and found.boxes[1, 0] == 1
+
+    assert len(nn.get_detections(result)) == 4
+    assert len(nn.get_detections(result, 0.8, nn.get_class_ids([]))) == 0
+
+    dicts = nn.get_scored_labels(result, 0.9)
+    assert [d["label"] for d in dicts] == ["cat", "dog", "person"]
+    assert dicts[0]["box"] == [0.0, 0.0, 10.0, 10.0]
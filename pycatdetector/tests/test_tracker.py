@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+from pycatdetector.Tracker import Tracker, iou
+
+
+def cat(x: float, score: float = 0.9) -> dict:
+    return {"label": "cat", "score": score, "box": [x, 100.0, x + 100.0, 200.0]}
+
+
+def test_iou():
+    boxes = np.array([[0, 0, 10, 10], [5, 0, 15, 10]], dtype=np.float64)
+    ious = iou(boxes, boxes)
+    assert ious[0, 0] == 1
+    assert ious[0, 1] == pytest.approx(50 / 150)
+    assert iou(boxes[:1], np.array([[20, 20, 30, 30]], dtype=np.float64))[0, 0] == 0
+
+
+def test_main():
+    tracker = Tracker(iou_threshold=0.3, max_age=5)
+
+    detections = [cat(0)]
+    started, ended = tracker.update(detections, 0)
+    assert len(started) == 1 and ended == []
+    assert detections[0]["track_new"]
+    track_id = detections[0]["track_id"]
+
+    # The cat walks slowly, same track
+    for t in range(1, 10):
+        detections = [cat(t * 10)]
+        started, ended = tracker.update(detections, t)
+        assert started == [] and ended == []
+        assert not detections[0]["track_new"]
+        assert detections[0]["track_id"] == track_id
+
+    # A second cat far away and a dog over the first cat, new tracks
+    detections = [cat(90), cat(600), dict(cat(90), label="dog")]
+    started, ended = tracker.update(detections, 10)
+    assert [d["track_new"] for d in detections] == [False, True, True]
+    assert len(tracker.get_tracks()) == 3
+
+    # Nothing seen for max_age, every track ends (leave events)
+    started, ended = tracker.update([], 16)
+    assert started == [] and len(ended) == 3
+    assert ended[0]["id"] == track_id and ended[0]["hits"] == 11
+    assert tracker.get_tracks() == []
+
+    detections = [cat(90)]
+    tracker.update(detections, 17)
+    assert detections[0]["track_new"]
+    assert detections[0]["track_id"] > track_id
+
+
+def test_gated():
+    # Motion gate: a still cat is only analyzed every 60s heartbeat
+    tracker = Tracker(max_age=10, min_misses=Tracker.GATED_MIN_MISSES)
+    detections = [cat(0)]
+    tracker.update(detections, 0)
+    track_id = detections[0]["track_id"]
+
+    # Missed in a heartbeat frame, then seen again: the same track
+    assert tracker.update([], 60) == ([], [])
+    detections = [cat(5)]
+    assert tracker.update(detections, 120) == ([], [])
+    assert detections[0]["track_id"] == track_id and not detections[0]["track_new"]
+
+    # Left (motion frames without it), ended once max_age elapsed
+    for t in [121, 122, 123]:
+        assert tracker.update([], t) == ([], [])
+    started, ended = tracker.update([], 131)
+    assert [track["id"] for track in ended] == [track_id]
+
+
+def test_invalid():
+    with pytest.raises(ValueError):
+        Tracker(iou_threshold=1.5)
+    with pytest.raises(ValueError):
+        Tracker(max_age=-1)
+    with pytest.raises(ValueError):
+        Tracker(min_misses=0)